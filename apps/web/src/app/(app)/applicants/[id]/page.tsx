@@ -153,6 +153,11 @@ export default function ApplicantDetailPage() {
                 </p>
               </div>
             </div>
+            {score?.explanations?.length ? (
+              <p className="text-xs text-[var(--muted-foreground)]">
+                Feature contributions in log-odds of default; positive values raise the PD.
+              </p>
+            ) : null}
             <div className="grid gap-3 md:grid-cols-2">
               {topContributions(score?.explanations).map((item) => (
                 <div
@@ -166,6 +171,7 @@ export default function ApplicantDetailPage() {
                     <p className="text-sm font-medium">{item.value}</p>
                   </div>
                   <span
+                    title="Change in log-odds of default, not in PD"
                     className={`text-sm font-semibold ${
                       item.contribution >= 0
                         ? "text-rose-600"
@@ -50,6 +50,7 @@ export interface Applicant {
 export interface FeatureContribution {
   feature: string;
   value: number;
+  /** SHAP value in log-odds of default (not a PD delta). */
   contribution: number;
 }
 
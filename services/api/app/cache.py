@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .config import settings
+from .metrics import cache_result, metrics
+from .registry import registry
+
+
+def score_cache_key(payload: dict[str, Any], features: list[str], version: str, explain: bool) -> str:
+    """Content address for one scoring request.
+
+    The feature vector is canonicalised to floats in model feature order, so
+    equal applicants hash equally however the payload was produced.
+    """
+    vector = json.dumps([float(payload[feature]) for feature in features])
+    return hashlib.sha256(f"{version}|{int(explain)}|{vector}".encode()).hexdigest()
+
+
+class SharedScoreCache:
+    """SQLite-file cache layer shared by processes and kept across restarts."""
+
+    PURGE_EVERY = 1_000
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS score_cache ("
+                "key TEXT PRIMARY KEY, version TEXT NOT NULL, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5.0)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def get(self, key: str) -> Optional[tuple[float, dict[str, Any]]]:
+        row = (
+            self._connection()
+            .execute("SELECT expires_at, value FROM score_cache WHERE key = ? AND expires_at > ?", (key, time.time()))
+            .fetchone()
+        )
+        return (row[0], json.loads(row[1])) if row else None
+
+    def set(self, key: str, version: str, expires_at: float, value: dict[str, Any]) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO score_cache (key, version, expires_at, value) VALUES (?, ?, ?, ?)",
+                (key, version, expires_at, json.dumps(value)),
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                connection.execute("DELETE FROM score_cache WHERE expires_at <= ?", (time.time(),))
+
+    def retain_version(self, version: str) -> None:
+        with self._connection() as connection:
+            connection.execute("DELETE FROM score_cache WHERE version != ?", (version,))
+
+    def clear(self) -> None:
+        with self._connection() as connection:
+            connection.execute("DELETE FROM score_cache")
+
+
+class ScoreCache:
+    """Bounded LRU of scoring results with TTL and an optional shared layer.
+
+    Keys embed the artifact version, so a new model can never serve an old
+    result. The memory layer holds one version and only moves forward: a
+    request still holding the previous snapshot after a reload bypasses the
+    cache instead of flushing it, as does one that gets ahead of
+    ``current_version`` (the registry's). The shared layer is pruned from the
+    registry's reload hook, through ``retain_version``, never from lookups.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        ttl: float = 3_600.0,
+        shared: Optional[SharedScoreCache] = None,
+        current_version: Optional[Callable[[], Optional[str]]] = None,
+    ) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared = shared
+        self.current_version = current_version
+        self.version: Optional[str] = None
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def _accepts(self, version: str) -> bool:
+        if version == self.version:
+            return True
+        current = self.current_version() if self.current_version is not None else version
+        if version != current:
+            return False
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+        return True
+
+    def retain_version(self, version: str) -> None:
+        """Drop entries from every other version, in memory and in the shared layer."""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+        if self.shared is not None:
+            self.shared.retain_version(version)
+
+    def get(self, key: str, version: str) -> Optional[dict[str, Any]]:
+        if not self.enabled or not self._accepts(version):
+            return None
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                cache_result("score", True)
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+        cache_result("score", False)
+
+        if self.shared is None:
+            return None
+        shared = self.shared.get(key)
+        cache_result("score_shared", shared is not None)
+        if shared is None:
+            return None
+        self._remember(key, *shared)
+        return shared[1]
+
+    def _remember(self, key: str, expires_at: float, value: dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def set(self, key: str, version: str, value: dict[str, Any]) -> None:
+        if not self.enabled or not self._accepts(version):
+            return
+        expires_at = time.time() + self.ttl
+        self._remember(key, expires_at, value)
+        if self.shared is not None:
+            self.shared.set(key, version, expires_at, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+score_cache = ScoreCache(
+    max_entries=settings.score_cache_size,
+    ttl=settings.score_cache_ttl,
+    shared=SharedScoreCache(Path(settings.score_cache_path)) if settings.score_cache_path else None,
+    current_version=lambda: registry.version,
+)
+registry.add_reload_hook(lambda snapshot: score_cache.retain_version(snapshot.version))
+
+metrics.gauge("score_cache_entries", "Entries in the in-process score cache.", collect=lambda: {(): len(score_cache)})
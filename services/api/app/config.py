@@ -11,6 +11,42 @@ class Settings(BaseSettings):
         default="sqlite:///./creditlens.db",
         validation_alias="DATABASE_URL",
     )
+    database_async: bool = Field(
+        default=False,
+        validation_alias="DATABASE_ASYNC",
+    )
+    async_database_url: str = Field(
+        default="",
+        validation_alias="ASYNC_DATABASE_URL",
+    )
+    db_pool_size: int = Field(
+        default=10,
+        validation_alias="DB_POOL_SIZE",
+    )
+    db_max_overflow: int = Field(
+        default=20,
+        validation_alias="DB_MAX_OVERFLOW",
+    )
+    db_pool_timeout: float = Field(
+        default=30.0,
+        validation_alias="DB_POOL_TIMEOUT",
+    )
+    db_pool_recycle: int = Field(
+        default=-1,
+        validation_alias="DB_POOL_RECYCLE",
+    )
+    sqlite_journal_mode: str = Field(
+        default="WAL",
+        validation_alias="SQLITE_JOURNAL_MODE",
+    )
+    sqlite_synchronous: str = Field(
+        default="NORMAL",
+        validation_alias="SQLITE_SYNCHRONOUS",
+    )
+    sqlite_busy_timeout_ms: int = Field(
+        default=5_000,
+        validation_alias="SQLITE_BUSY_TIMEOUT_MS",
+    )
     cors_origins: str = Field(
         default="http://localhost:3000,http://127.0.0.1:3000",
         validation_alias="CORS_ORIGINS",
@@ -19,6 +55,133 @@ class Settings(BaseSettings):
         default=1_000_000,
         validation_alias="MAX_REQUEST_SIZE",
     )
+    max_batch_request_size: int = Field(
+        default=25_000_000,
+        validation_alias="MAX_BATCH_REQUEST_SIZE",
+    )
+    # Bulk ingest streams the body and holds one chunk at a time, so this
+    # bounds how long one request may run rather than memory: 200 MB is
+    # roughly two million CSV applicants.
+    max_ingest_request_size: int = Field(
+        default=200_000_000,
+        validation_alias="MAX_INGEST_REQUEST_SIZE",
+    )
+    seed_sample_size: int = Field(
+        default=200,
+        validation_alias="SEED_SAMPLE_SIZE",
+    )
+    drift_bucket_seconds: int = Field(
+        default=3_600,
+        validation_alias="DRIFT_BUCKET_SECONDS",
+    )
+    ingest_chunk_size: int = Field(
+        default=5_000,
+        validation_alias="INGEST_CHUNK_SIZE",
+    )
+    score_batch_max_rows: int = Field(
+        default=50_000,
+        validation_alias="SCORE_BATCH_MAX_ROWS",
+    )
+    score_batch_chunk_size: int = Field(
+        default=5_000,
+        gt=0,
+        validation_alias="SCORE_BATCH_CHUNK_SIZE",
+    )
+    artifact_check_interval: float = Field(
+        default=2.0,
+        validation_alias="ARTIFACT_CHECK_INTERVAL",
+    )
+    compiled_scoring: bool = Field(
+        default=True,
+        validation_alias="COMPILED_SCORING",
+    )
+    worker_processes: int = Field(
+        default=0,
+        validation_alias="WORKER_PROCESSES",
+    )
+    worker_queue_size: int = Field(
+        default=64,
+        validation_alias="WORKER_QUEUE_SIZE",
+    )
+    endpoint_concurrency: dict[str, int] = Field(
+        default={"score": 32, "score_batch": 4, "applicant_score": 16},
+        validation_alias="ENDPOINT_CONCURRENCY",
+    )
+    retry_after_seconds: int = Field(
+        default=1,
+        validation_alias="RETRY_AFTER_SECONDS",
+    )
+
+    score_cache_size: int = Field(
+        default=10_000,
+        validation_alias="SCORE_CACHE_SIZE",
+    )
+    score_cache_ttl: float = Field(
+        default=3_600.0,
+        validation_alias="SCORE_CACHE_TTL",
+    )
+    score_cache_path: str = Field(
+        default="",
+        validation_alias="SCORE_CACHE_PATH",
+    )
+    explanation_poll_interval: float = Field(
+        default=2.0,
+        validation_alias="EXPLANATION_POLL_INTERVAL",
+    )
+    explanation_max_attempts: int = Field(
+        default=3,
+        validation_alias="EXPLANATION_MAX_ATTEMPTS",
+    )
+    explanation_lease_seconds: float = Field(
+        default=60.0,
+        gt=0,
+        validation_alias="EXPLANATION_LEASE_SECONDS",
+    )
+    explanation_run_chunk_size: int = Field(
+        default=500,
+        validation_alias="EXPLANATION_RUN_CHUNK_SIZE",
+    )
+    rescore_chunk_size: int = Field(
+        default=5_000,
+        validation_alias="RESCORE_CHUNK_SIZE",
+    )
+    rescore_processes: int = Field(
+        default=0,
+        validation_alias="RESCORE_PROCESSES",
+    )
+    fairness_bootstrap_resamples: int = Field(
+        default=1_000,
+        validation_alias="FAIRNESS_BOOTSTRAP_RESAMPLES",
+    )
+    fairness_bootstrap_jobs: int = Field(
+        default=2,
+        ge=0,
+        validation_alias="FAIRNESS_BOOTSTRAP_JOBS",
+    )
+    shadow_models: str = Field(
+        default="",
+        validation_alias="SHADOW_MODELS",
+    )
+    shadow_queue_size: int = Field(
+        default=10_000,
+        validation_alias="SHADOW_QUEUE_SIZE",
+    )
+    shadow_batch_size: int = Field(
+        default=256,
+        validation_alias="SHADOW_BATCH_SIZE",
+    )
+    shadow_flush_interval: float = Field(
+        default=1.0,
+        validation_alias="SHADOW_FLUSH_INTERVAL",
+    )
+    startup_warmup: bool = Field(
+        default=True,
+        validation_alias="STARTUP_WARMUP",
+    )
+    metrics_enabled: bool = Field(
+        default=True,
+        validation_alias="METRICS_ENABLED",
+    )
 
     def cors_origin_list(self) -> list[str]:
         return [origin.strip() for origin in self.cors_origins.split(",") if origin.strip()]
@@ -1,19 +1,161 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Iterator, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine, make_url
 from sqlmodel import SQLModel, Session, create_engine
+from starlette.concurrency import run_in_threadpool
 
 from .config import settings
 
-connect_args = {}
-if settings.database_url.startswith("sqlite"):
-    connect_args = {"check_same_thread": False}
+ASYNC_DRIVERS = {"sqlite": "sqlite+aiosqlite", "postgresql": "postgresql+asyncpg"}
+
+
+def _is_sqlite(url: str) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _is_memory_sqlite(url: str) -> bool:
+    database = make_url(url).database
+    return _is_sqlite(url) and (not database or database == ":memory:" or "mode=memory" in url)
+
+
+def _engine_options(url: str) -> dict[str, Any]:
+    options: dict[str, Any] = {"echo": False}
+    if _is_sqlite(url):
+        options["connect_args"] = {"check_same_thread": False}
+    if not _is_memory_sqlite(url):
+        # In-memory SQLite uses a single shared connection; sizing only
+        # applies to real connection pools.
+        options.update(
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_timeout=settings.db_pool_timeout,
+            pool_recycle=settings.db_pool_recycle,
+        )
+    return options
+
+
+def _apply_sqlite_pragmas(dbapi_connection: Any, connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"PRAGMA busy_timeout = {int(settings.sqlite_busy_timeout_ms)}")
+        cursor.execute(f"PRAGMA journal_mode = {settings.sqlite_journal_mode}")
+        cursor.execute(f"PRAGMA synchronous = {settings.sqlite_synchronous}")
+    finally:
+        cursor.close()
+
+
+def build_engine(url: str) -> Engine:
+    """Create a pooled engine; SQLite connections get WAL and busy_timeout."""
+    engine = create_engine(url, **_engine_options(url))
+    if _is_sqlite(url):
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
+
+def async_url_for(url: str) -> str:
+    parsed = make_url(url)
+    driver = ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        raise ValueError(f"No async driver known for {parsed.drivername}")
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+def build_async_engine(url: str) -> Any:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    engine = create_async_engine(url, **_engine_options(url))
+    if _is_sqlite(url):
+        event.listen(engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    return engine
+
 
-engine = create_engine(settings.database_url, echo=False, connect_args=connect_args)
+engine = build_engine(settings.database_url)
+async_engine: Optional[Any] = None
+if settings.database_async:
+    async_engine = build_async_engine(settings.async_database_url or async_url_for(settings.database_url))
 
 
 def init_db() -> None:
     SQLModel.metadata.create_all(engine)
+    add_missing_columns(engine)
+    # create_all skips indexes on tables that already exist.
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+
+def add_missing_columns(bind: Engine) -> list[str]:
+    """Add nullable columns that were added to the models after their table was created.
+
+    create_all never alters existing tables. Only nullable columns without a
+    server default are handled; anything else needs a real migration.
+    """
+    from sqlalchemy import inspect
+    from sqlalchemy.schema import CreateColumn
+
+    inspector = inspect(bind)
+    added = []
+    with bind.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing or not column.nullable or column.server_default is not None:
+                    continue
+                definition = CreateColumn(column).compile(dialect=bind.dialect)
+                connection.exec_driver_sql(f'ALTER TABLE "{table.name}" ADD COLUMN {definition}')
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def get_session() -> Iterator[Session]:
+    """Request-scoped session dependency; the connection returns to the pool when the request ends."""
+    with Session(engine) as session:
+        yield session
+
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """Session for scripts and background threads, closed on exit."""
+    with Session(engine) as session:
+        yield session
+
+
+class ReadSession:
+    """Read-only queries for ``async def`` endpoints.
+
+    With ``DATABASE_ASYNC`` enabled queries run on the async engine and never
+    occupy a threadpool slot; otherwise they run on a pooled sync session in
+    the threadpool, so endpoints work the same either way.
+    """
+
+    def __init__(self, session: Any, is_async: bool) -> None:
+        self.session = session
+        self.is_async = is_async
+
+    async def all(self, statement: Any) -> list[Any]:
+        if self.is_async:
+            return list(await self.session.exec(statement))
+        return await run_in_threadpool(lambda: list(self.session.exec(statement)))
+
+    async def get(self, model: Any, ident: Any) -> Any:
+        if self.is_async:
+            return await self.session.get(model, ident)
+        return await run_in_threadpool(self.session.get, model, ident)
+
+
+async def get_read_session() -> AsyncIterator[ReadSession]:
+    if async_engine is None:
+        with Session(engine) as session:
+            yield ReadSession(session, is_async=False)
+        return
 
+    from sqlmodel.ext.asyncio.session import AsyncSession
 
-def get_session() -> Session:
-    return Session(engine)
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        yield ReadSession(session, is_async=True)
@@ -0,0 +1,527 @@
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Any, Callable, ContextManager, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import event, func, insert, update
+from sqlmodel import Session, delete, select
+
+from ml.features import FEATURE_COLUMNS
+from ml.monitoring import drift_series, feature_aggregates, grouped_feature_aggregates, summarize_aggregates
+
+from .config import settings
+from .metrics import stage
+from .models import Applicant, DriftAggregate, DriftWindowBin
+from .registry import current_snapshot
+
+logger = logging.getLogger(__name__)
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3_600, "d": 86_400, "w": 604_800}
+MAX_SERIES_POINTS = 5_000
+DEFERRED_KEY = "drift_deferred"
+
+_rebuild_lock = threading.Lock()
+_deferred_lock = threading.Lock()
+# While a rebuild runs, committed deltas wait here instead of touching the tables.
+_deferred: Optional[list[tuple[pd.DataFrame, Optional[datetime]]]] = None
+
+
+class InvalidWindow(ValueError):
+    pass
+
+
+class AggregatesStale(RuntimeError):
+    """The aggregates were built for another baseline and need a rebuild."""
+
+
+def parse_duration(value: str) -> int:
+    """Seconds in a duration such as ``90s``, ``15m``, ``24h`` or ``30d``."""
+    match = re.fullmatch(r"\s*(\d+)\s*([smhdw])\s*", value or "")
+    if not match or int(match.group(1)) <= 0:
+        raise InvalidWindow(f"Invalid duration: {value!r}")
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def window_resolutions() -> list[int]:
+    """Bucket sizes kept in ``DriftWindowBin``: the configured bucket and one day."""
+    bucket_seconds = settings.drift_bucket_seconds
+    daily = DURATION_UNITS["d"]
+    if daily > bucket_seconds and daily % bucket_seconds == 0:
+        return [bucket_seconds, daily]
+    return [bucket_seconds]
+
+
+def epoch_seconds(created_at: datetime) -> int:
+    return int(created_at.replace(tzinfo=timezone.utc).timestamp())
+
+
+def baseline_version(baseline: dict[str, Any]) -> str:
+    features = {
+        feature: {key: values[key] for key in ("bins", "baseline_pct", "mean", "std")}
+        for feature, values in baseline["features"].items()
+    }
+    return hashlib.sha256(json.dumps(features, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def current_baseline() -> Optional[dict[str, Any]]:
+    try:
+        return current_snapshot().baseline
+    except FileNotFoundError:
+        return None
+
+
+def stored_version(session: Session) -> Optional[str]:
+    return session.exec(select(DriftAggregate.baseline_version).limit(1)).first()
+
+
+def clear_aggregates(session: Session) -> None:
+    """Delete both aggregate tables in the caller's transaction.
+
+    Used whenever applicants are wiped: clearing one table but not the other
+    would leave windows counting rows that no longer exist.
+    """
+    session.exec(delete(DriftAggregate))
+    session.exec(delete(DriftWindowBin))
+
+
+def aggregates_current(session: Session, version: str) -> bool:
+    """Whether both aggregate tables were built for ``version``.
+
+    Databases that predate the window table have totals but no window rows;
+    treating them as stale makes the next summary backfill the windows.
+    """
+    if stored_version(session) != version:
+        return False
+    window_version = session.exec(select(DriftWindowBin.baseline_version).limit(1)).first()
+    if window_version is not None:
+        return window_version == version
+    counted = session.exec(
+        select(func.sum(DriftAggregate.count)).where(DriftAggregate.feature == FEATURE_COLUMNS[0])
+    ).first()
+    return not counted
+
+
+def _upsert_window_bins(session: Session, rows: list[dict[str, Any]]) -> None:
+    dialect = session.get_bind().dialect.name
+    if dialect in {"sqlite", "postgresql"}:
+        if dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        statement = dialect_insert(DriftWindowBin)
+        statement = statement.on_conflict_do_update(
+            index_elements=["resolution", "bucket_start", "feature", "bin_index"],
+            set_={
+                "count": DriftWindowBin.count + statement.excluded.count,
+                "total": DriftWindowBin.total + statement.excluded.total,
+                "total_sq": DriftWindowBin.total_sq + statement.excluded.total_sq,
+            },
+        )
+        session.exec(statement, params=rows)
+        return
+
+    for row in rows:
+        result = session.exec(
+            update(DriftWindowBin)
+            .where(
+                DriftWindowBin.resolution == row["resolution"],
+                DriftWindowBin.bucket_start == row["bucket_start"],
+                DriftWindowBin.feature == row["feature"],
+                DriftWindowBin.bin_index == row["bin_index"],
+            )
+            .values(
+                count=DriftWindowBin.count + row["count"],
+                total=DriftWindowBin.total + row["total"],
+                total_sq=DriftWindowBin.total_sq + row["total_sq"],
+            )
+        )
+        if not result.rowcount:
+            session.exec(insert(DriftWindowBin), params=[row])
+
+
+def record_applicants(
+    session: Session,
+    frame: pd.DataFrame,
+    baseline: Optional[dict[str, Any]] = None,
+    created_at: Optional[datetime] = None,
+) -> bool:
+    """Add ``frame`` to the running aggregates inside the caller's transaction.
+
+    Every row lands in the time bucket of ``created_at`` (default now).
+    Returns False without touching the tables when there is no baseline or the
+    aggregates were built for a different one; a rebuild will count the rows.
+    While a rebuild runs, ``frame`` is held until the caller commits and
+    applied once the rebuilt tables are in place. Index ``frame`` by
+    applicant id, named ``id`` as ``applicant_frame`` does, so the rebuild
+    can skip rows its own scan already counted.
+    """
+    baseline = baseline if baseline is not None else current_baseline()
+    if baseline is None or frame.empty:
+        return False
+    with _deferred_lock:
+        rebuilding = _deferred is not None
+    if rebuilding:
+        session.info.setdefault(DEFERRED_KEY, []).append((frame, created_at))
+        return True
+    version = baseline_version(baseline)
+    if not aggregates_current(session, version):
+        return False
+
+    epoch = epoch_seconds(created_at or datetime.utcnow())
+    buckets = [(resolution, epoch - epoch % resolution) for resolution in window_resolutions()]
+    window_rows: list[dict[str, Any]] = []
+    with stage("drift", "record"):
+        for feature, bins in feature_aggregates(frame, baseline).items():
+            for bin_index, (count, total, total_sq) in bins.items():
+                if not count:
+                    continue
+                session.exec(
+                    update(DriftAggregate)
+                    .where(DriftAggregate.feature == feature, DriftAggregate.bin_index == bin_index)
+                    .values(
+                        count=DriftAggregate.count + count,
+                        total=DriftAggregate.total + total,
+                        total_sq=DriftAggregate.total_sq + total_sq,
+                    )
+                )
+                window_rows.extend(
+                    {
+                        "resolution": resolution,
+                        "bucket_start": bucket,
+                        "feature": feature,
+                        "bin_index": bin_index,
+                        "baseline_version": version,
+                        "count": count,
+                        "total": total,
+                        "total_sq": total_sq,
+                    }
+                    for resolution, bucket in buckets
+                )
+        _upsert_window_bins(session, window_rows)
+    return True
+
+
+@event.listens_for(Session, "after_commit")
+def _release_deferred(session: Session) -> None:
+    entries = session.info.pop(DEFERRED_KEY, None)
+    if not entries:
+        return
+    with _deferred_lock:
+        if _deferred is not None:
+            _deferred.extend(entries)
+            return
+    # The rebuild finished between record_applicants and this commit.
+    with Session(session.get_bind()) as other:
+        for frame, created_at in entries:
+            record_applicants(other, frame, created_at=created_at)
+        other.commit()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_deferred(session: Session) -> None:
+    session.info.pop(DEFERRED_KEY, None)
+
+
+def applicant_frame(applicants: Iterable[Applicant]) -> pd.DataFrame:
+    applicants = list(applicants)
+    if any(applicant.id is None for applicant in applicants):
+        raise ValueError("Flush applicants before building their drift frame; it is indexed by id")
+    rows = [[getattr(applicant, column) for column in FEATURE_COLUMNS] for applicant in applicants]
+    index = pd.Index([applicant.id for applicant in applicants], name="id")
+    return pd.DataFrame(rows, columns=FEATURE_COLUMNS, index=index, dtype=float)
+
+
+def _merge_bins(target: dict[int, list[float]], bins: dict[int, list[float]]) -> None:
+    for bin_index, values in bins.items():
+        merged = target.setdefault(bin_index, [0, 0.0, 0.0])
+        for position, value in enumerate(values):
+            merged[position] += value
+
+
+def rebuild_aggregates(session: Session, baseline: dict[str, Any], chunk_size: int = 50_000) -> int:
+    """Recompute every aggregate, totals and time buckets, in one bounded-memory scan.
+
+    One rebuild runs at a time per process; a second caller waits for the
+    first. Applicants recorded meanwhile are applied after the rebuilt
+    tables are committed, minus those the scan already counted.
+    """
+    global _deferred
+
+    with _rebuild_lock:
+        with _deferred_lock:
+            _deferred = []
+        watermark: Optional[int] = None
+        try:
+            rows, watermark = _rebuild_tables(session, baseline, chunk_size)
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            with _deferred_lock:
+                entries, _deferred = _deferred, None
+            for frame, created_at in entries:
+                if watermark is not None and frame.index.name == "id":
+                    frame = frame[frame.index > watermark]
+                record_applicants(session, frame, baseline=baseline, created_at=created_at)
+            session.commit()
+    return rows
+
+
+def rebuild_active() -> bool:
+    return _rebuild_lock.locked()
+
+
+def rebuild_in_background(
+    session_factory: Callable[[], ContextManager[Session]],
+    baseline: dict[str, Any],
+    force: bool = False,
+) -> bool:
+    """Rebuild on a background thread unless one is running or, without ``force``, not needed."""
+    if rebuild_active():
+        return False
+    if not force:
+        with session_factory() as session:
+            if aggregates_current(session, baseline_version(baseline)):
+                return False
+
+    def target() -> None:
+        try:
+            with session_factory() as session:
+                rebuild_aggregates(session, baseline)
+        except Exception:
+            logger.exception("Drift aggregate rebuild failed")
+
+    threading.Thread(target=target, name="drift-rebuild", daemon=True).start()
+    return True
+
+
+def _rebuild_tables(session: Session, baseline: dict[str, Any], chunk_size: int) -> tuple[int, int]:
+    """Rewrite both tables; returns the applicants counted and the highest id among them."""
+    version = baseline_version(baseline)
+    resolutions = window_resolutions()
+    merged: dict[str, dict[int, list[float]]] = {
+        feature: {bin_index: [0, 0.0, 0.0] for bin_index in range(-1, len(values["bins"]) - 1)}
+        for feature, values in baseline["features"].items()
+    }
+    windows: dict[tuple[int, int], dict[str, dict[int, list[float]]]] = {}
+    columns = [getattr(Applicant, column) for column in FEATURE_COLUMNS]
+
+    def scan(condition: Any) -> tuple[int, int]:
+        statement = select(Applicant.id, Applicant.created_at, *columns).where(condition)
+        result = session.exec(statement.execution_options(yield_per=chunk_size))
+        rows, last_id = 0, 0
+        for partition in result.partitions():
+            frame = pd.DataFrame(partition, columns=["id", "created_at", *FEATURE_COLUMNS])
+            rows += len(frame)
+            last_id = max(last_id, int(frame["id"].max()))
+            epochs = pd.to_datetime(frame["created_at"]).to_numpy(dtype="datetime64[s]").astype(np.int64)
+            frame = frame[FEATURE_COLUMNS].astype(float)
+            for feature, bins in feature_aggregates(frame, baseline).items():
+                _merge_bins(merged[feature], bins)
+            # The finest resolution is grouped from rows; coarser ones from it.
+            grouped = grouped_feature_aggregates(frame, epochs - epochs % resolutions[0], baseline)
+            for bucket, features in grouped.items():
+                for resolution in resolutions:
+                    key = (resolution, bucket - bucket % resolution)
+                    for feature, bins in features.items():
+                        _merge_bins(windows.setdefault(key, {}).setdefault(feature, {}), bins)
+        return rows, last_id
+
+    watermark = session.exec(select(func.max(Applicant.id))).one() or 0
+    rows, _ = scan(Applicant.id <= watermark)
+    clear_aggregates(session)
+    # The deletes wait for open writers (SQLite serializes them), so this
+    # also counts applicants committed during the scan by callers that
+    # updated the rows just deleted.
+    late_rows, late_id = scan(Applicant.id > watermark)
+    rows += late_rows
+    watermark = max(watermark, late_id)
+
+    window_rows = [
+        {
+            "resolution": resolution,
+            "bucket_start": bucket,
+            "feature": feature,
+            "bin_index": bin_index,
+            "baseline_version": version,
+            "count": int(count),
+            "total": float(total),
+            "total_sq": float(total_sq),
+        }
+        for (resolution, bucket), features in windows.items()
+        for feature, bins in features.items()
+        for bin_index, (count, total, total_sq) in bins.items()
+    ]
+    if window_rows:
+        session.exec(insert(DriftWindowBin), params=window_rows)
+    session.add_all(
+        DriftAggregate(
+            feature=feature,
+            bin_index=bin_index,
+            baseline_version=version,
+            count=int(count),
+            total=float(total),
+            total_sq=float(total_sq),
+        )
+        for feature, bins in merged.items()
+        for bin_index, (count, total, total_sq) in bins.items()
+    )
+    session.commit()
+    logger.info("Rebuilt drift aggregates for %s applicants (baseline %s)", rows, version)
+    return rows, watermark
+
+
+def drift_summary(session: Session, baseline: dict[str, Any]) -> dict[str, Any]:
+    """PSI and mean shift from the aggregate table in O(features x bins)."""
+    if not aggregates_current(session, baseline_version(baseline)):
+        raise AggregatesStale("Drift aggregates were built for another baseline")
+
+    aggregates: dict[str, dict[int, list[float]]] = {}
+    with stage("monitoring", "read_aggregates"):
+        for row in session.exec(select(DriftAggregate)):
+            aggregates.setdefault(row.feature, {})[row.bin_index] = [row.count, row.total, row.total_sq]
+
+    first = aggregates.get(FEATURE_COLUMNS[0], {})
+    count = sum(values[0] for values in first.values())
+    with stage("monitoring", "summarize"):
+        return summarize_aggregates(aggregates, baseline, count)
+
+
+def drift_timeseries(
+    session: Session,
+    baseline: dict[str, Any],
+    window: str,
+    step: str,
+    end: Optional[datetime] = None,
+) -> dict[str, Any]:
+    """PSI and mean shift per ``step`` over the last ``window``, merged from time buckets.
+
+    Steps are aligned to multiples of ``step`` since the epoch and the last
+    one includes the current, partial step. Rows are read at the coarsest
+    stored resolution that divides ``step``, so cost is
+    O(buckets x features x bins) whatever the number of applicants.
+    """
+    bucket_seconds = settings.drift_bucket_seconds
+    window_seconds = parse_duration(window)
+    step_seconds = parse_duration(step)
+    if step_seconds % bucket_seconds:
+        raise InvalidWindow(f"step must be a multiple of the {bucket_seconds}s drift bucket")
+    if window_seconds % step_seconds:
+        raise InvalidWindow("window must be a multiple of step")
+    steps = window_seconds // step_seconds
+    if steps > MAX_SERIES_POINTS:
+        raise InvalidWindow(f"window / step must be at most {MAX_SERIES_POINTS}")
+
+    version = baseline_version(baseline)
+    if not aggregates_current(session, version):
+        raise AggregatesStale("Drift aggregates were built for another baseline")
+
+    epoch = epoch_seconds(end or datetime.utcnow())
+    stop = epoch - epoch % step_seconds + step_seconds
+    start = stop - window_seconds
+    resolution = max(value for value in window_resolutions() if step_seconds % value == 0)
+    width = max(len(values["bins"]) for values in baseline["features"].values())
+    positions = {feature: index for index, feature in enumerate(FEATURE_COLUMNS)}
+    shape = (steps, len(FEATURE_COLUMNS), width)
+    counts, totals, totals_sq = np.zeros(shape), np.zeros(shape), np.zeros(shape)
+
+    step_index = ((DriftWindowBin.bucket_start - start) // step_seconds).label("step")
+    columns = [DriftWindowBin.count, DriftWindowBin.total, DriftWindowBin.total_sq]
+    if step_seconds != resolution:
+        columns = [func.sum(column) for column in columns]
+    statement = select(step_index, DriftWindowBin.feature, DriftWindowBin.bin_index, *columns).where(
+        DriftWindowBin.resolution == resolution,
+        DriftWindowBin.baseline_version == version,
+        DriftWindowBin.bucket_start >= start,
+        DriftWindowBin.bucket_start < stop,
+    )
+    if step_seconds != resolution:
+        statement = statement.group_by(step_index, DriftWindowBin.feature, DriftWindowBin.bin_index)
+    with stage("monitoring", "read_windows"):
+        # Core execution skips ORM row processing, which dominates at
+        # tens of thousands of rows.
+        rows = [row for row in session.connection().execute(statement).fetchall() if row[1] in positions]
+    if rows:
+        # Each (step, feature, bin) appears once, so plain assignment works.
+        step_values, features, bin_values, *sums = zip(*rows)
+        index = (
+            np.asarray(step_values, dtype=np.int64),
+            np.fromiter((positions[feature] for feature in features), dtype=np.int64, count=len(rows)),
+            np.asarray(bin_values, dtype=np.int64) + 1,
+        )
+        for target, values in zip((counts, totals, totals_sq), sums):
+            target[index] = np.asarray(values, dtype=float)
+
+    with stage("monitoring", "summarize_windows"):
+        series = drift_series(counts, totals.sum(axis=2), totals_sq.sum(axis=2), baseline)
+        window_counts, window_totals, window_squares = counts.sum(axis=0), totals.sum(axis=0), totals_sq.sum(axis=0)
+        overall = {
+            feature: {
+                bin_index - 1: [
+                    window_counts[position, bin_index],
+                    window_totals[position, bin_index],
+                    window_squares[position, bin_index],
+                ]
+                for bin_index in range(width)
+            }
+            for feature, position in positions.items()
+        }
+        summary = summarize_aggregates(overall, baseline, int(series["count"].sum()))
+
+    def as_list(values: np.ndarray) -> list[Optional[float]]:
+        return np.where(np.isnan(values), None, np.round(values, 6)).tolist()
+
+    def iso(epoch: int) -> str:
+        return datetime.fromtimestamp(epoch, timezone.utc).replace(tzinfo=None).isoformat() + "Z"
+
+    return {
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "window": window,
+        "step": step,
+        "resolution_seconds": resolution,
+        "start": iso(start),
+        "end": iso(stop),
+        "timestamps": [iso(start + index * step_seconds) for index in range(steps)],
+        "counts": [int(value) for value in series["count"]],
+        "summary": summary,
+        "features": [
+            {
+                "feature": feature,
+                "baseline_mean": baseline["features"][feature]["mean"],
+                "psi": as_list(series["psi"][:, position]),
+                "mean_shift": as_list(series["mean_shift"][:, position]),
+                "current_mean": as_list(series["current_mean"][:, position]),
+            }
+            for feature, position in positions.items()
+        ],
+    }
+
+
+def main() -> None:
+    from .database import init_db, session_scope
+
+    parser = argparse.ArgumentParser(description="Maintain drift monitoring aggregates.")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    args = parser.parse_args()
+
+    baseline = current_baseline()
+    if baseline is None:
+        raise SystemExit("Monitoring baseline missing. Run: python services/api/ml/train.py")
+
+    init_db()
+    with session_scope() as session:
+        rows = rebuild_aggregates(session, baseline, chunk_size=args.chunk_size)
+    print(f"Rebuilt drift aggregates from {rows} applicants")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+import pandas as pd
+from sqlalchemy import exists, func, update
+from sqlmodel import Session, select
+
+from ml.features import FEATURE_COLUMNS
+
+from .jobs import DONE, RUNNING
+from .metrics import metrics, stage
+from .models import Applicant, ExplanationJob, ExplanationRun, Score
+from .registry import ArtifactSnapshot, current_snapshot
+from .runs import BackgroundRuns, mark_failed, mark_interrupted, reopen_run, run_from_cli, run_summary
+from .scoring import explain_batch
+
+RUN_ROWS = metrics.counter("explanation_run_rows_total", "Scores explained by batch explanation runs.")
+
+
+def _pending_filter(after_id: int, max_id: int, model_version: str) -> list[Any]:
+    # Scores with an ExplanationJob belong to the explanation worker. Only
+    # scores from the run's model are explained: another model's
+    # contributions would not add up to the stored PD.
+    queued = exists().where(ExplanationJob.score_id == Score.id)
+    return [
+        Score.id > after_id,
+        Score.id <= max_id,
+        Score.model_version == model_version,
+        Score.explanations_json.is_(None),
+        ~queued,
+    ]
+
+
+def pending_scores_statement(after_id: int, max_id: int, limit: int, model_version: str) -> Any:
+    """The next ``limit`` unexplained ``model_version`` scores after ``after_id``, with applicant features."""
+    return (
+        select(Score.id, *(getattr(Applicant, feature) for feature in FEATURE_COLUMNS))
+        .join(Applicant, Applicant.id == Score.applicant_id)
+        .where(*_pending_filter(after_id, max_id, model_version))
+        .order_by(Score.id)
+        .limit(limit)
+    )
+
+
+def start_run(session: Session, chunk_size: int, snapshot: Optional[ArtifactSnapshot] = None) -> ExplanationRun:
+    """Record a new run covering every unexplained score from the current model that exists now."""
+    snapshot = snapshot or current_snapshot()
+    max_id = session.exec(select(func.max(Score.id))).one() or 0
+    total = session.exec(
+        select(func.count()).select_from(Score).where(*_pending_filter(0, max_id, snapshot.model_version))
+    ).one()
+    run = ExplanationRun(
+        model_version=snapshot.model_version,
+        max_score_id=max_id,
+        total=total,
+        chunk_size=max(1, chunk_size),
+    )
+    session.add(run)
+    session.commit()
+    session.refresh(run)
+    return run
+
+
+def resume_run(session: Session, run_id: int, snapshot: Optional[ArtifactSnapshot] = None) -> ExplanationRun:
+    """Reopen an unfinished run; raises ``ValueError`` if its model is no longer loaded."""
+    return reopen_run(session, ExplanationRun, run_id, (snapshot or current_snapshot()).model_version)
+
+
+def run_explanations(
+    session: Session,
+    run: ExplanationRun,
+    snapshot: Optional[ArtifactSnapshot] = None,
+    progress: Optional[Callable[[ExplanationRun], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> ExplanationRun:
+    """Explain the run's remaining scores chunk by chunk.
+
+    Each chunk is loaded with one keyset query, explained with one
+    ``explain_batch`` call and written back with one bulk UPDATE, in the same
+    transaction as the checkpoint. Stopping between chunks leaves the run
+    ``interrupted``; an error, or a model reload that changes the version,
+    leaves it ``failed``. Either can be resumed while the run's model is
+    still loaded.
+    """
+    try:
+        while run.status == RUNNING:
+            if should_stop is not None and should_stop():
+                mark_interrupted(session, run)
+                break
+            current = snapshot or current_snapshot()
+            if current.model_version != run.model_version:
+                raise RuntimeError(f"Model changed during the run ({run.model_version} -> {current.model_version})")
+            started = time.perf_counter()
+            with stage("explanation_run", "db_load"):
+                rows = (
+                    session.connection()
+                    .execute(
+                        pending_scores_statement(
+                            run.last_score_id, run.max_score_id, run.chunk_size, run.model_version
+                        )
+                    )
+                    .fetchall()
+                )
+            if rows:
+                frame = pd.DataFrame([row[1:] for row in rows], columns=FEATURE_COLUMNS)
+                explanations = explain_batch(frame, snapshot=current)
+                with stage("explanation_run", "db_update"):
+                    session.exec(
+                        update(Score),
+                        params=[
+                            {"id": row[0], "explanations_json": json.dumps(explained)}
+                            for row, explained in zip(rows, explanations)
+                        ],
+                    )
+                run.last_score_id = rows[-1][0]
+                run.processed += len(rows)
+            if len(rows) < run.chunk_size:
+                run.status = DONE
+                run.finished_at = datetime.utcnow()
+            run.elapsed_seconds += time.perf_counter() - started
+            run.updated_at = datetime.utcnow()
+            session.add(run)
+            session.commit()
+            RUN_ROWS.inc(len(rows))
+            if progress is not None:
+                progress(run)
+    except Exception as exc:
+        mark_failed(session, run, exc)
+        raise
+    return run
+
+
+def run_to_dict(run: ExplanationRun) -> dict[str, Any]:
+    return {**run_summary(run), "last_score_id": run.last_score_id, "max_score_id": run.max_score_id}
+
+
+explanation_runs = BackgroundRuns(
+    ExplanationRun,
+    lambda session, run, should_stop: run_explanations(session, run, should_stop=should_stop),
+    name="explanation-run",
+)
+
+
+def main() -> None:
+    from .config import settings
+
+    parser = argparse.ArgumentParser(description="Fill in missing score explanations in batches.")
+    parser.add_argument("--chunk-size", type=int, default=settings.explanation_run_chunk_size)
+    parser.add_argument("--resume", type=int, metavar="RUN_ID", help="Continue an interrupted or failed run")
+    args = parser.parse_args()
+
+    run_from_cli(
+        lambda session: resume_run(session, args.resume) if args.resume else start_run(session, args.chunk_size),
+        run_explanations,
+        run_to_dict,
+        "explained {processed}/{total} scores",
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+from typing import Any, Iterator
+
+from sqlalchemy import func
+from sqlmodel import Session, select
+
+from ml.features import FEATURE_COLUMNS
+
+from .database import engine
+from .models import Applicant, Score
+
+EXPORT_FORMATS = ("ndjson", "csv")
+APPLICANT_COLUMNS = ["id", "created_at", *FEATURE_COLUMNS]
+SCORE_COLUMNS = ["score_id", "pd", "risk_bucket", "model_name", "scored_at"]
+
+
+def export_statement(include_score: bool) -> Any:
+    columns = [getattr(Applicant, column) for column in APPLICANT_COLUMNS]
+    if not include_score:
+        return select(*columns).order_by(Applicant.created_at, Applicant.id)
+
+    latest = (
+        select(Score.applicant_id, func.max(Score.id).label("score_id"))
+        .group_by(Score.applicant_id)
+        .subquery()
+    )
+    return (
+        select(
+            *columns,
+            Score.id.label("score_id"),
+            Score.pd,
+            Score.risk_bucket,
+            Score.model_name,
+            Score.created_at.label("scored_at"),
+        )
+        .outerjoin(latest, latest.c.applicant_id == Applicant.id)
+        .outerjoin(Score, Score.id == latest.c.score_id)
+        .order_by(Applicant.created_at, Applicant.id)
+    )
+
+
+def _serialize(value: Any) -> Any:
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def iter_applicant_export(
+    format: str = "ndjson",
+    include_score: bool = False,
+    chunk_size: int = 5_000,
+) -> Iterator[str]:
+    """Stream every applicant as NDJSON lines or CSV text, one chunk at a time.
+
+    The query runs with ``stream_results``/``yield_per`` so rows are fetched
+    from a server-side cursor where the driver supports one, and only one
+    chunk of rows is held in memory at a time.
+    """
+    columns = APPLICANT_COLUMNS + (SCORE_COLUMNS if include_score else [])
+    statement = export_statement(include_score).execution_options(stream_results=True, yield_per=chunk_size)
+
+    with Session(engine) as session:
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerow(columns)
+            yield buffer.getvalue()
+
+        for partition in session.exec(statement).partitions():
+            if format == "csv":
+                buffer = io.StringIO()
+                writer = csv.writer(buffer)
+                writer.writerows([[_serialize(value) for value in row] for row in partition])
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(columns, map(_serialize, row)))) + "\n" for row in partition
+                )
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from sqlalchemy import Integer, cast, func
+from sqlmodel import select
+
+from .models import Score
+from .pagination import after_cursor
+
+# Scores are histogrammed into this many equal-width PD bins in SQL, so
+# reported quantiles are approximate: interpolated within a bin, they are
+# within 1 / PD_BINS of the exact value.
+PD_BINS = 1_000
+SUMMARY_QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9, 0.99)
+
+
+def score_timeline_statement(applicant_id: int, limit: int, cursor: Optional[str] = None) -> Any:
+    """Newest-first page of one applicant's scores, keyset paginated by ``(created_at, id)``."""
+    statement = (
+        select(Score.id, Score.pd, Score.risk_bucket, Score.model_name, Score.created_at)
+        .where(Score.applicant_id == applicant_id)
+        .order_by(Score.created_at.desc(), Score.id.desc())
+        .limit(limit)
+    )
+    if cursor:
+        statement = statement.where(after_cursor(Score.created_at, Score.id, cursor, descending=True))
+    return statement
+
+
+def score_summary_statement(
+    model: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+) -> Any:
+    """Per-bucket PD histogram of the matching scores, aggregated in the database.
+
+    The result has at most ``buckets * (PD_BINS + 1)`` rows whatever the
+    number of scores, and the filters and grouped columns are all in the
+    score indexes, so the scan is index-only.
+    """
+    pd_bin = cast(Score.pd * PD_BINS, Integer).label("pd_bin")
+    statement = select(
+        Score.risk_bucket,
+        pd_bin,
+        func.count().label("count"),
+        func.sum(Score.pd).label("total"),
+        func.min(Score.pd).label("minimum"),
+        func.max(Score.pd).label("maximum"),
+    ).group_by(Score.risk_bucket, pd_bin)
+    if model:
+        statement = statement.where(Score.model_name == model)
+    if since:
+        statement = statement.where(Score.created_at >= since)
+    if until:
+        statement = statement.where(Score.created_at < until)
+    return statement
+
+
+def _histogram_quantile(
+    bins: list[tuple[int, int]],
+    count: int,
+    q: float,
+    minimum: float,
+    maximum: float,
+) -> float:
+    target = q * count
+    seen = 0
+    for pd_bin, bin_count in bins:
+        if seen + bin_count >= target:
+            position = (target - seen) / bin_count
+            value = (min(pd_bin, PD_BINS - 1) + position) / PD_BINS
+            return round(min(max(value, minimum), maximum), 6)
+        seen += bin_count
+    return maximum
+
+
+def summarize_score_histogram(
+    rows: Iterable[Any],
+    quantiles: tuple[float, ...] = SUMMARY_QUANTILES,
+) -> dict[str, Any]:
+    """Fold ``score_summary_statement`` rows into bucket counts and approximate PD quantiles.
+
+    The response says so with ``quantiles_approximate`` and the worst-case
+    error, ``quantile_max_error``; mean, min and max are exact.
+    """
+    buckets: dict[str, int] = {}
+    histogram: dict[int, int] = {}
+    count = 0
+    total = 0.0
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+    for bucket, pd_bin, bin_count, bin_total, bin_min, bin_max in rows:
+        buckets[bucket] = buckets.get(bucket, 0) + bin_count
+        histogram[pd_bin] = histogram.get(pd_bin, 0) + bin_count
+        count += bin_count
+        total += bin_total
+        minimum = bin_min if minimum is None else min(minimum, bin_min)
+        maximum = bin_max if maximum is None else max(maximum, bin_max)
+
+    if not count:
+        return {"count": 0, "buckets": {}, "pd": None}
+
+    bins = sorted(histogram.items())
+    return {
+        "count": count,
+        "buckets": dict(sorted(buckets.items())),
+        "pd": {
+            "mean": round(total / count, 6),
+            "min": minimum,
+            "max": maximum,
+            "quantiles": {
+                f"p{round(q * 100):g}": _histogram_quantile(bins, count, q, minimum, maximum) for q in quantiles
+            },
+            "quantiles_approximate": True,
+            "quantile_max_error": 1 / PD_BINS,
+        },
+    }
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional, Union
+
+import pandas as pd
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlmodel import Session
+
+from ml.features import FEATURE_COLUMNS
+
+from .drift import record_applicants
+from .models import Applicant
+from .schemas import ApplicantCreate, validation_error_details
+
+INGEST_FORMATS = ("csv", "ndjson")
+MAX_CHUNK_SIZE = 50_000
+
+ParsedRow = tuple[int, Union[dict[str, Any], list[dict[str, Any]]]]
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+@dataclass
+class IngestResult:
+    received: int = 0
+    inserted: int = 0
+    failed: int = 0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+    errors_truncated: bool = False
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+class LineParser:
+    """Turns text lines into ``(line_number, row)`` pairs one line at a time.
+
+    Malformed lines yield a list of error dicts instead of a row, so callers
+    can report them without stopping the stream.
+    """
+
+    def __init__(self, format: str) -> None:
+        if format not in INGEST_FORMATS:
+            raise ValueError(f"Unsupported ingest format: {format}")
+        self.format = format
+        self.header: Optional[list[str]] = None
+        self.line_number = 0
+
+    def parse(self, line: Union[str, bytes]) -> Optional[ParsedRow]:
+        self.line_number += 1
+        if isinstance(line, bytes):
+            try:
+                line = line.decode("utf-8")
+            except UnicodeDecodeError as exc:
+                return self.line_number, [
+                    {"loc": [], "msg": f"Invalid UTF-8 at byte {exc.start}", "type": "unicode_decode"}
+                ]
+        line = line.rstrip("\r\n")
+        if not line.strip():
+            return None
+
+        if self.format == "ndjson":
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as exc:
+                return self.line_number, [{"loc": [], "msg": f"Invalid JSON: {exc.msg}", "type": "json_invalid"}]
+            if not isinstance(row, dict):
+                return self.line_number, [{"loc": [], "msg": "Expected a JSON object", "type": "object_type"}]
+            return self.line_number, row
+
+        values = next(csv.reader([line]))
+        if self.header is None:
+            self.header = [value.strip() for value in values]
+            return None
+        if len(values) != len(self.header):
+            return self.line_number, [
+                {"loc": [], "msg": f"Expected {len(self.header)} columns, got {len(values)}", "type": "csv_columns"}
+            ]
+        return self.line_number, dict(zip(self.header, values))
+
+    def parse_lines(self, lines: Iterable[Union[str, bytes]]) -> Iterator[ParsedRow]:
+        for line in lines:
+            parsed = self.parse(line)
+            if parsed is not None:
+                yield parsed
+
+
+class BulkIngester:
+    """Validates parsed rows and inserts them in chunks, one transaction each.
+
+    Rows are inserted with a Core ``insert`` executemany and the drift
+    aggregates are updated in the same transaction. Only the current chunk
+    and at most ``max_errors`` error entries are held in memory.
+    """
+
+    def __init__(self, session: Session, chunk_size: int = 5_000, max_errors: int = 1_000) -> None:
+        self.session = session
+        self.chunk_size = max(1, min(chunk_size, MAX_CHUNK_SIZE))
+        self.max_errors = max_errors
+        self.result = IngestResult()
+
+    def _record_error(self, line: int, errors: list[dict[str, Any]]) -> None:
+        self.result.failed += 1
+        if len(self.result.errors) < self.max_errors:
+            self.result.errors.append({"line": line, "errors": errors})
+        else:
+            self.result.errors_truncated = True
+
+    def process_chunk(self, rows: list[ParsedRow]) -> None:
+        created_at = datetime.utcnow()
+        valid: list[dict[str, Any]] = []
+        for line, row in rows:
+            self.result.received += 1
+            if isinstance(row, list):
+                self._record_error(line, row)
+                continue
+            try:
+                applicant = ApplicantCreate.model_validate(row)
+            except ValidationError as exc:
+                self._record_error(line, validation_error_details(exc))
+                continue
+            valid.append({**applicant.model_dump(), "created_at": created_at})
+
+        if not valid:
+            return
+        try:
+            ids = self.session.exec(
+                insert(Applicant).returning(Applicant.id, sort_by_parameter_order=True),
+                params=valid,
+            ).scalars().all()
+            record_applicants(
+                self.session,
+                pd.DataFrame(valid, columns=FEATURE_COLUMNS, index=pd.Index(ids, name="id"), dtype=float),
+                created_at=created_at,
+            )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+        self.result.inserted += len(valid)
+
+    def ingest(self, rows: Iterable[ParsedRow]) -> IngestResult:
+        chunk: list[ParsedRow] = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                self.process_chunk(chunk)
+                chunk = []
+        if chunk:
+            self.process_chunk(chunk)
+        return self.result
+
+
+async def iter_body_lines(stream: AsyncIterator[bytes], max_bytes: int) -> AsyncIterator[bytes]:
+    """Split a streamed request body into raw lines, enforcing ``max_bytes``.
+
+    Lines stay undecoded so ``LineParser`` can report invalid UTF-8 on the
+    line where it occurs. Only the unfinished tail is carried between chunks
+    and each chunk is split once, so a line spread over many chunks costs
+    linear time.
+    """
+    received = 0
+    pending: list[bytes] = []
+    async for chunk in stream:
+        received += len(chunk)
+        if received > max_bytes:
+            raise BodyTooLarge()
+        head, newline, tail = chunk.rpartition(b"\n")
+        if not newline:
+            pending.append(chunk)
+            continue
+        lines = head.split(b"\n")
+        if pending:
+            lines[0] = b"".join(pending) + lines[0]
+        pending = [tail] if tail else []
+        for line in lines:
+            yield line
+    if pending:
+        yield b"".join(pending)
+
+
+def detect_format(content_type: Optional[str] = None, path: Optional[Path] = None) -> str:
+    if path is not None:
+        return "csv" if path.suffix.lower() == ".csv" else "ndjson"
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in {"text/csv", "application/csv"}:
+        return "csv"
+    return "ndjson"
+
+
+def ingest_file(session: Session, path: Path, format: Optional[str] = None, chunk_size: int = 5_000) -> IngestResult:
+    parser = LineParser(format or detect_format(path=path))
+    with path.open("rb") as handle:
+        return BulkIngester(session, chunk_size=chunk_size).ingest(parser.parse_lines(handle))
+
+
+def main() -> None:
+    from .database import init_db, session_scope
+
+    parser = argparse.ArgumentParser(description="Bulk load applicants from CSV or NDJSON.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--format", choices=INGEST_FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=5_000)
+    args = parser.parse_args()
+
+    init_db()
+    with session_scope() as session:
+        result = ingest_file(session, args.path, format=args.format, chunk_size=args.chunk_size)
+    print(json.dumps(result.to_dict(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, ContextManager, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlmodel import Session, select
+
+from .cache import score_cache, score_cache_key
+from .config import settings
+from .database import session_scope
+from .metrics import metrics, stage
+from .models import Applicant, ExplanationJob, Score
+from .registry import ArtifactSnapshot, current_snapshot
+from .schemas import ApplicantCreate
+from .scoring import explain_payload
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+JOBS_PROCESSED = metrics.counter("explanation_jobs_total", "Explanation jobs finished by outcome.", ("status",))
+
+
+class ModelChanged(RuntimeError):
+    """The score was produced by a model version that is no longer loaded."""
+
+
+def enqueue_explanation(session: Session, score: Score) -> ExplanationJob:
+    """Add a pending job for ``score`` to the caller's transaction."""
+    job = ExplanationJob(score_id=score.id)
+    session.add(job)
+    return job
+
+
+def explanation_status(session: Session, score: Score) -> Optional[str]:
+    job = session.exec(select(ExplanationJob).where(ExplanationJob.score_id == score.id)).first()
+    if job is not None:
+        return job.status
+    return DONE if score.explanations_json else None
+
+
+def _lease_expired(now: datetime) -> object:
+    # Jobs claimed before leases existed have none; they count as expired.
+    return and_(
+        ExplanationJob.status == RUNNING,
+        or_(ExplanationJob.lease_expires_at.is_(None), ExplanationJob.lease_expires_at < now),
+    )
+
+
+def requeue_expired(session: Session) -> int:
+    """Return ``running`` jobs whose owner stopped renewing the lease to the queue."""
+    now = datetime.utcnow()
+    result = session.exec(
+        update(ExplanationJob)
+        .where(_lease_expired(now))
+        .values(status=PENDING, owner=None, lease_expires_at=None, updated_at=now)
+    )
+    session.commit()
+    return result.rowcount
+
+
+def claim_next(session: Session, owner: str, lease_seconds: float) -> Optional[ExplanationJob]:
+    """Atomically move the oldest pending job, or one with an expired lease, to ``running``.
+
+    The conditional UPDATE makes claiming safe when several API processes
+    share the database: only one of them sees a rowcount of 1.
+    """
+    while True:
+        now = datetime.utcnow()
+        claimable = or_(ExplanationJob.status == PENDING, _lease_expired(now))
+        job = session.exec(select(ExplanationJob).where(claimable).order_by(ExplanationJob.id).limit(1)).first()
+        if job is None:
+            return None
+        claimed = session.exec(
+            update(ExplanationJob)
+            .where(ExplanationJob.id == job.id, claimable)
+            .values(
+                status=RUNNING,
+                owner=owner,
+                lease_expires_at=now + timedelta(seconds=lease_seconds),
+                attempts=ExplanationJob.attempts + 1,
+                updated_at=now,
+            )
+        )
+        session.commit()
+        if claimed.rowcount == 1:
+            session.refresh(job)
+            return job
+
+
+def renew_leases(session: Session, owner: str, lease_seconds: float) -> int:
+    """Extend the lease on every job ``owner`` is running."""
+    result = session.exec(
+        update(ExplanationJob)
+        .where(ExplanationJob.status == RUNNING, ExplanationJob.owner == owner)
+        .values(lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+    )
+    session.commit()
+    return result.rowcount
+
+
+def _cached_explanations(payload: ApplicantCreate, snapshot: ArtifactSnapshot) -> Optional[list]:
+    key = score_cache_key(payload.model_dump(), snapshot.features, snapshot.version, explain=True)
+    cached = score_cache.get(key, snapshot.version)
+    return cached["explanations"] if cached else None
+
+
+def release_job(session: Session, job_id: int, owner: str) -> None:
+    session.exec(
+        update(ExplanationJob)
+        .where(ExplanationJob.id == job_id, ExplanationJob.status == RUNNING, ExplanationJob.owner == owner)
+        .values(status=PENDING, owner=None, lease_expires_at=None, updated_at=datetime.utcnow())
+    )
+    session.commit()
+
+
+def run_job(session: Session, job: ExplanationJob, max_attempts: int = 3) -> None:
+    score = session.get(Score, job.score_id)
+    applicant = session.get(Applicant, score.applicant_id) if score else None
+    try:
+        if applicant is None:
+            raise LookupError("Score or applicant no longer exists")
+        snapshot = current_snapshot()
+        # Explaining with another model would attach reasons that do not
+        # belong to the stored PD; retrying cannot bring the old model back.
+        if score.model_version != snapshot.model_version:
+            raise ModelChanged(
+                f"Score {score.id} was made by model {score.model_version} but {snapshot.model_version} is loaded"
+            )
+        payload = ApplicantCreate(**applicant.model_dump(exclude={"id", "created_at"}))
+        explanations = _cached_explanations(payload, snapshot)
+        if explanations is None:
+            with stage("explanation_job", "explain"):
+                explanations = explain_payload(payload, snapshot=snapshot)
+    except Exception as exc:
+        logger.warning("Explanation job %s failed: %s", job.id, exc)
+        final = job.attempts >= max_attempts or applicant is None or isinstance(exc, ModelChanged)
+        job.status = FAILED if final else PENDING
+        job.error = str(exc)[:500]
+    else:
+        score.explanations_json = json.dumps(explanations)
+        job.status = DONE
+        job.error = None
+        session.add(score)
+    owner = session.exec(select(ExplanationJob.owner).where(ExplanationJob.id == job.id)).one()
+    if owner != job.owner:
+        # The lease expired and another worker claimed the job; its result wins.
+        logger.warning("Explanation job %s was reclaimed by %s; dropping this result", job.id, owner)
+        session.rollback()
+        return
+    job.owner = None
+    job.lease_expires_at = None
+    job.updated_at = datetime.utcnow()
+    session.add(job)
+    session.commit()
+    if job.status in (DONE, FAILED):
+        JOBS_PROCESSED.inc(status=job.status)
+
+
+class ExplanationWorker:
+    """Background thread draining the ``ExplanationJob`` table.
+
+    The table is the queue, so jobs survive restarts. Each claimed job is
+    leased to this worker, and a heartbeat thread renews the lease every
+    third of ``lease_seconds``; a job whose lease lapses, because its
+    process died, is claimed again by whichever worker polls next, while
+    jobs held by live peers are left alone. ``notify`` wakes the thread
+    immediately; otherwise it polls every ``poll_interval`` seconds to pick
+    up jobs enqueued by other processes.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], ContextManager[Session]],
+        poll_interval: float = 2.0,
+        max_attempts: int = 3,
+        lease_seconds: float = 60.0,
+    ) -> None:
+        self.session_factory = session_factory
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._heartbeat: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        with self.session_factory() as session:
+            requeued = requeue_expired(session)
+        if requeued:
+            logger.info("Requeued %s explanation jobs with expired leases", requeued)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="explanation-worker", daemon=True)
+        self._heartbeat = threading.Thread(target=self._renew, name="explanation-lease", daemon=True)
+        self._thread.start()
+        self._heartbeat.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout)
+        self._heartbeat.join(timeout)
+        self._thread = None
+        self._heartbeat = None
+
+    def notify(self) -> None:
+        self._wake.set()
+
+    def drain(self) -> int:
+        """Process pending jobs until the queue is empty; returns the count."""
+        processed = 0
+        with self.session_factory() as session:
+            while not self._stop.is_set():
+                job = claim_next(session, self.owner, self.lease_seconds)
+                if job is None:
+                    break
+                try:
+                    run_job(session, job, max_attempts=self.max_attempts)
+                except Exception:
+                    logger.exception("Explanation job %s could not be saved; requeueing", job.id)
+                    session.rollback()
+                    release_job(session, job.id, self.owner)
+                    break
+                processed += 1
+        return processed
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("Explanation worker iteration failed")
+            self._wake.wait(self.poll_interval)
+
+    def _renew(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            try:
+                with self.session_factory() as session:
+                    renew_leases(session, self.owner, self.lease_seconds)
+            except Exception:
+                logger.exception("Renewing explanation job leases failed")
+
+
+explanation_worker = ExplanationWorker(
+    session_scope,
+    poll_interval=settings.explanation_poll_interval,
+    max_attempts=settings.explanation_max_attempts,
+    lease_seconds=settings.explanation_lease_seconds,
+)
@@ -2,35 +2,88 @@ from __future__ import annotations
 
 import json
 import logging
+import time
 from contextlib import asynccontextmanager
+from datetime import datetime
 from pathlib import Path
+from typing import Any, Optional
 
-import pandas as pd
-from fastapi import Depends, FastAPI, HTTPException, Request, status
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlmodel import Session, select
 
+from . import rescore
+from .cache import score_cache, score_cache_key
 from .config import settings
-from .database import get_session, init_db
-from .models import Applicant, Score
-from .schemas import ApplicantCreate, ApplicantRead, ScoreRead, ScoreResponse
-from .scoring import explain_payload, load_artifacts, load_metadata, load_metrics, score_payload
-from ml.fairness import build_fairness_report
-from ml.features import FEATURE_COLUMNS
-from ml.monitoring import load_baseline, summarize_drift
+from .database import ReadSession, get_read_session, get_session, init_db, session_scope
+from .drift import (
+    AggregatesStale,
+    InvalidWindow,
+    applicant_frame,
+    current_baseline,
+    drift_summary,
+    drift_timeseries,
+    rebuild_active,
+    rebuild_in_background,
+    record_applicants,
+)
+from .explanations import explanation_runs, resume_run, run_to_dict, start_run
+from .export import EXPORT_FORMATS, iter_applicant_export
+from .history import score_summary_statement, score_timeline_statement, summarize_score_histogram
+from .ingest import INGEST_FORMATS, BodyTooLarge, BulkIngester, LineParser, detect_format, iter_body_lines
+from .jobs import DONE, PENDING, enqueue_explanation, explanation_status, explanation_worker
+from .metrics import CONTENT_TYPE, REQUEST_SECONDS, metrics, stage
+from .models import Applicant, ExplanationRun, RescoreRun, Score
+from .pagination import InvalidCursor, after_cursor, encode_cursor
+from .schemas import (
+    ApplicantCreate,
+    ApplicantRead,
+    BatchScoreRequest,
+    BatchScoreResponse,
+    ScoreHistoryItem,
+    ScoreRead,
+    ScoreResponse,
+)
+from .registry import ArtifactSnapshot, current_snapshot
+from .reports import fairness_recompute_running, fairness_report_for, recompute_fairness_report
+from .scoring import load_metadata, load_metrics
 from .seed import seed_if_empty
+from .shadow import shadow_comparison, shadow_scorer
+from .startup import startup
+from .workers import Overloaded, batch_score_job, pool, score_job
 
 logger = logging.getLogger(__name__)
 
+startup.record_imports()
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
-    with get_session() as session:
-        seeded = seed_if_empty(session)
+    with startup.phase("init_db"):
+        init_db()
+    with startup.phase("seed"), session_scope() as session:
+        seeded = seed_if_empty(session, sample_size=settings.seed_sample_size)
         if seeded:
             logger.info("Seeded %s applicants", seeded)
+    baseline = current_baseline()
+    if baseline is not None and rebuild_in_background(session_scope, baseline):
+        logger.info("Rebuilding drift aggregates for the current baseline")
+    pool.start()
+    explanation_worker.start()
+    shadow_scorer.start()
+    if settings.startup_warmup:
+        startup.start_warmup(pool)
+    else:
+        startup.skip_warmup()
     yield
+    startup.stop()
+    rescore.rescore_runs.stop()
+    explanation_runs.stop()
+    shadow_scorer.stop()
+    explanation_worker.stop()
+    pool.shutdown()
 
 
 app = FastAPI(title="CreditLens API", version="0.1.0", lifespan=lifespan)
@@ -41,21 +94,55 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["GET", "POST"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 
+EXPLAIN_MODES = ("sync", "async", "none")
+
+BODY_SIZE_LIMITS = {
+    "/score/batch": settings.max_batch_request_size,
+    "/applicants/bulk": settings.max_ingest_request_size,
+}
+
+
 @app.middleware("http")
 async def limit_body_size(request: Request, call_next):
     content_length = request.headers.get("content-length")
-    if content_length and int(content_length) > settings.max_request_size:
+    limit = BODY_SIZE_LIMITS.get(request.url.path, settings.max_request_size)
+    if content_length and int(content_length) > limit:
         return JSONResponse(status_code=413, content={"detail": "Request body too large."})
     return await call_next(request)
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    if not metrics.enabled:
+        return await call_next(request)
+    started = time.perf_counter()
+    response = await call_next(request)
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=route,
+        status=response.status_code,
+    )
+    return response
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded) -> JSONResponse:
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
 
-def ensure_artifacts() -> None:
+def ensure_artifacts() -> ArtifactSnapshot:
     try:
-        load_artifacts()
+        return current_snapshot()
     except FileNotFoundError as exc:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
@@ -68,6 +155,19 @@ def healthz() -> dict[str, str]:
     return {"status": "ok"}
 
 
+@app.get("/readyz")
+def readyz() -> JSONResponse:
+    status_code = status.HTTP_200_OK if startup.ready else status.HTTP_503_SERVICE_UNAVAILABLE
+    return JSONResponse(status_code=status_code, content=startup.to_dict())
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics() -> PlainTextResponse:
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="Metrics are disabled.")
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+
 @app.get("/")
 def root() -> dict[str, str]:
     return {
@@ -111,50 +211,197 @@ def model_card() -> str:
 
 
 @app.get("/monitoring/summary")
-def monitoring_summary(session: Session = Depends(get_session)) -> dict[str, str | float | list | dict]:
-    ensure_artifacts()
-    try:
-        baseline = load_baseline()
-    except FileNotFoundError as exc:
+def monitoring_summary(
+    window: Optional[str] = None,
+    step: str = "1h",
+    session: Session = Depends(get_session),
+) -> dict[str, str | float | list | dict]:
+    baseline = ensure_artifacts().baseline
+    if baseline is None:
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail="Monitoring baseline missing. Run: python services/api/ml/train.py",
+        )
+
+    try:
+        if window is None:
+            return drift_summary(session, baseline)
+        return drift_timeseries(session, baseline, window=window, step=step)
+    except InvalidWindow as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+    except AggregatesStale as exc:
+        if rebuild_active():
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Drift aggregates are being rebuilt. Retry shortly.",
+                headers={"Retry-After": "30"},
+            ) from exc
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"{exc}. Rebuild with POST /admin/drift/rebuild.",
         ) from exc
 
-    applicants = list(session.exec(select(Applicant)))
-    rows = [
-        applicant.model_dump(exclude={"id", "created_at"}) for applicant in applicants
-    ]
-    current_df = pd.DataFrame(rows) if rows else pd.DataFrame(columns=FEATURE_COLUMNS)
-    return summarize_drift(current_df, baseline)
+
+@app.post("/admin/drift/rebuild", status_code=status.HTTP_202_ACCEPTED)
+def rebuild_drift_aggregates() -> dict[str, str]:
+    baseline = ensure_artifacts().baseline
+    if baseline is None:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Monitoring baseline missing. Run: python services/api/ml/train.py",
+        )
+    if not rebuild_in_background(session_scope, baseline, force=True):
+        raise HTTPException(status_code=409, detail="A drift aggregate rebuild is already in progress")
+    return {"status": "started"}
 
 
 @app.get("/fairness/report")
 def fairness_report() -> dict[str, str | float | list | dict]:
-    ensure_artifacts()
-    try:
-        return build_fairness_report()
-    except FileNotFoundError as exc:
+    snapshot = ensure_artifacts()
+    report = fairness_report_for(snapshot)
+    if report is not None:
+        return report
+    if fairness_recompute_running():
         raise HTTPException(
-            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
-            detail="Fairness report unavailable. Run: python services/api/ml/train.py",
-        ) from exc
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Fairness report is being computed for the current model. Retry shortly.",
+            headers={"Retry-After": "30"},
+        )
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"No fairness report for model {snapshot.model_version}. POST /fairness/report/recompute to build one.",
+    )
+
+
+@app.post("/fairness/report/recompute", status_code=status.HTTP_202_ACCEPTED)
+def fairness_report_recompute(background_tasks: BackgroundTasks) -> dict[str, str]:
+    snapshot = ensure_artifacts()
+    if fairness_recompute_running():
+        return {"status": "running", "model_version": snapshot.model_version}
+    background_tasks.add_task(recompute_fairness_report, snapshot)
+    return {"status": "scheduled", "model_version": snapshot.model_version}
+
+
+@app.post("/explanations/runs", status_code=status.HTTP_202_ACCEPTED)
+def start_explanation_run(
+    resume: Optional[int] = None,
+    chunk_size: int = settings.explanation_run_chunk_size,
+    session: Session = Depends(get_session),
+) -> dict[str, Any]:
+    if explanation_runs.active():
+        raise HTTPException(status_code=409, detail="An explanation run is already in progress")
+    snapshot = ensure_artifacts()
+    if resume is not None:
+        try:
+            run = resume_run(session, resume, snapshot)
+        except LookupError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+    else:
+        run = start_run(session, max(1, min(chunk_size, 10_000)), snapshot)
+    if run.status != DONE:
+        explanation_runs.start(session_scope, run.id)
+    return run_to_dict(run)
+
+
+@app.get("/explanations/runs/{run_id}")
+def get_explanation_run(run_id: int, session: Session = Depends(get_session)) -> dict[str, Any]:
+    run = session.get(ExplanationRun, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Explanation run not found")
+    return run_to_dict(run)
+
+
+@app.post("/admin/rescore/runs", status_code=status.HTTP_202_ACCEPTED)
+def start_rescore(
+    resume: Optional[int] = None,
+    chunk_size: int = settings.rescore_chunk_size,
+    processes: int = settings.rescore_processes,
+    session: Session = Depends(get_session),
+) -> dict[str, Any]:
+    if rescore.rescore_runs.active():
+        raise HTTPException(status_code=409, detail="A rescore run is already in progress")
+    snapshot = ensure_artifacts()
+    processes = max(0, processes)
+    if resume is not None:
+        try:
+            run = rescore.resume_run(session, resume, processes=processes, snapshot=snapshot)
+        except LookupError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+        except ValueError as exc:
+            raise HTTPException(status_code=409, detail=str(exc)) from exc
+    else:
+        run = rescore.start_run(session, max(1, min(chunk_size, 100_000)), processes, snapshot)
+    if run.status != DONE:
+        rescore.rescore_runs.start(session_scope, run.id)
+    return rescore.run_to_dict(run)
+
+
+@app.get("/admin/rescore/runs/{run_id}")
+def get_rescore_run(run_id: int, session: Session = Depends(get_session)) -> dict[str, Any]:
+    run = session.get(RescoreRun, run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Rescore run not found")
+    return rescore.run_to_dict(run)
+
+
+@app.get("/shadow/comparison")
+def shadow_model_comparison(
+    model: Optional[str] = None,
+    since: Optional[datetime] = None,
+    session: Session = Depends(get_session),
+) -> dict[str, Any]:
+    with stage("shadow_comparison", "db_aggregate"):
+        comparisons = shadow_comparison(session, since=since, shadow_model=model)
+    return {
+        "enabled": shadow_scorer.enabled,
+        "pending": shadow_scorer.pending,
+        "since": since,
+        "comparisons": comparisons,
+    }
 
 
 @app.get("/applicants", response_model=list[ApplicantRead])
-def list_applicants(
+async def list_applicants(
+    response: Response,
     limit: int = 50,
     offset: int = 0,
-    session: Session = Depends(get_session),
+    cursor: Optional[str] = None,
+    session: ReadSession = Depends(get_read_session),
 ) -> list[Applicant]:
     limit = max(1, min(limit, 500))
-    offset = max(0, offset)
-    return list(session.exec(select(Applicant).offset(offset).limit(limit)))
+    statement = select(Applicant).order_by(Applicant.created_at, Applicant.id).limit(limit)
+    if cursor:
+        try:
+            statement = statement.where(after_cursor(Applicant.created_at, Applicant.id, cursor))
+        except InvalidCursor as exc:
+            raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+    else:
+        statement = statement.offset(max(0, offset))
+
+    applicants = await session.all(statement)
+    if len(applicants) == limit:
+        last = applicants[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return applicants
+
+
+@app.get("/applicants/export")
+def export_applicants(format: str = "ndjson", include_score: bool = False) -> StreamingResponse:
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {', '.join(EXPORT_FORMATS)}")
+    media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        iter_applicant_export(format=format, include_score=include_score),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="applicants.{format}"'},
+    )
 
 
 @app.get("/applicants/{applicant_id}", response_model=ApplicantRead)
-def get_applicant(applicant_id: int, session: Session = Depends(get_session)) -> Applicant:
-    applicant = session.get(Applicant, applicant_id)
+async def get_applicant(applicant_id: int, session: ReadSession = Depends(get_read_session)) -> Applicant:
+    applicant = await session.get(Applicant, applicant_id)
     if not applicant:
         raise HTTPException(status_code=404, detail="Applicant not found")
     return applicant
@@ -167,60 +414,140 @@ def create_applicant(
 ) -> Applicant:
     applicant = Applicant(**payload.model_dump())
     session.add(applicant)
+    # The drift frame is indexed by id, which a deferred rebuild filters on.
+    session.flush()
+    record_applicants(session, applicant_frame([applicant]), created_at=applicant.created_at)
     session.commit()
     session.refresh(applicant)
     return applicant
 
 
-@app.post("/score", response_model=ScoreResponse)
-def score_applicant(payload: ApplicantCreate) -> ScoreResponse:
-    ensure_artifacts()
-    output = score_payload(payload)
-    metrics = model_metrics()
-    explanations = None
+@app.post("/applicants/bulk")
+async def bulk_ingest_applicants(
+    request: Request,
+    format: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+    session: Session = Depends(get_session),
+) -> dict[str, int | bool | list]:
+    format = format or detect_format(content_type=request.headers.get("content-type"))
+    if format not in INGEST_FORMATS:
+        raise HTTPException(status_code=422, detail=f"format must be one of {', '.join(INGEST_FORMATS)}")
+
+    parser = LineParser(format)
+    ingester = BulkIngester(session, chunk_size=chunk_size or settings.ingest_chunk_size)
+    chunk = []
     try:
-        explanations = explain_payload(payload)
-    except FileNotFoundError:
-        explanations = None
+        async for line in iter_body_lines(request.stream(), settings.max_ingest_request_size):
+            parsed = parser.parse(line)
+            if parsed is None:
+                continue
+            chunk.append(parsed)
+            if len(chunk) >= ingester.chunk_size:
+                await run_in_threadpool(ingester.process_chunk, chunk)
+                chunk = []
+    except BodyTooLarge:
+        result = ingester.result.to_dict()
+        return JSONResponse(
+            status_code=413,
+            content={"detail": "Request body too large; earlier chunks were committed.", **result},
+        )
+    if chunk:
+        await run_in_threadpool(ingester.process_chunk, chunk)
+    return ingester.result.to_dict()
+
+
+async def cached_score(
+    endpoint: str,
+    payload: ApplicantCreate,
+    explain: bool = True,
+    applicant_id: Optional[int] = None,
+) -> dict:
+    """Run ``score_job`` through the worker pool unless the result is cached.
+
+    Every champion result, cached or not, is also queued for shadow scoring.
+    """
+    snapshot = ensure_artifacts()
+    data = payload.model_dump()
+    key = score_cache_key(data, snapshot.features, snapshot.version, explain)
+    if score_cache.shared is None:
+        output = score_cache.get(key, snapshot.version)
+    else:
+        # A miss in memory falls through to the shared SQLite layer, which blocks.
+        output = await run_in_threadpool(score_cache.get, key, snapshot.version)
+    if output is None:
+        output = await pool.run(endpoint, score_job, data, explain)
+        # Only cache results computed by the snapshot the key was built from.
+        if output["model_version"] == snapshot.model_version:
+            await run_in_threadpool(score_cache.set, key, snapshot.version, output)
+    shadow_scorer.submit(data, output, applicant_id)
+    return output
+
+
+@app.post("/score", response_model=ScoreResponse)
+async def score_applicant(payload: ApplicantCreate) -> ScoreResponse:
+    output = await cached_score("score", payload)
 
     return ScoreResponse(
         pd=output["pd"],
         risk_bucket=output["risk_bucket"],
         threshold=output["threshold"],
-        model_name=metrics.get("selected_model", "unknown"),
-        explanations=explanations,
+        model_name=output["model_name"],
+        explanations=output["explanations"],
+    )
+
+
+@app.post("/score/batch", response_model=BatchScoreResponse)
+async def score_applicants_batch(payload: BatchScoreRequest, explain: bool = False) -> BatchScoreResponse:
+    ensure_artifacts()
+    if len(payload.applicants) > settings.score_batch_max_rows:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {settings.score_batch_max_rows} applicants.",
+        )
+
+    output = await pool.run(
+        "score_batch",
+        batch_score_job,
+        payload.applicants,
+        settings.score_batch_chunk_size,
+        explain,
     )
+    return BatchScoreResponse(**output)
 
 
 @app.post("/applicants/{applicant_id}/score", response_model=ScoreRead)
-def score_stored_applicant(
+async def score_stored_applicant(
     applicant_id: int,
+    explain: str = "sync",
     session: Session = Depends(get_session),
-) -> Score:
+) -> ScoreRead:
+    if explain not in EXPLAIN_MODES:
+        raise HTTPException(status_code=422, detail=f"explain must be one of {', '.join(EXPLAIN_MODES)}")
     ensure_artifacts()
-    applicant = session.get(Applicant, applicant_id)
+    with stage("applicant_score", "db_load"):
+        applicant = await run_in_threadpool(session.get, Applicant, applicant_id)
     if not applicant:
         raise HTTPException(status_code=404, detail="Applicant not found")
 
     payload = ApplicantCreate(**applicant.model_dump(exclude={"id", "created_at"}))
-    output = score_payload(payload)
-    metrics = model_metrics()
-    explanations = None
-    try:
-        explanations = explain_payload(payload)
-    except FileNotFoundError:
-        explanations = None
+    output = await cached_score("applicant_score", payload, explain=explain == "sync", applicant_id=applicant_id)
+    explanations = output["explanations"]
 
     score = Score(
         applicant_id=applicant_id,
         pd=output["pd"],
         risk_bucket=output["risk_bucket"],
-        model_name=metrics.get("selected_model", "unknown"),
+        model_name=output["model_name"],
+        model_version=output["model_version"],
         explanations_json=json.dumps(explanations) if explanations else None,
     )
-    session.add(score)
-    session.commit()
-    session.refresh(score)
+    with stage("applicant_score", "db_commit"):
+        await run_in_threadpool(_save_score, session, score, explain == "async")
+
+    status_value = "done" if explanations else None
+    if explain == "async":
+        explanation_worker.notify()
+        status_value = PENDING
     return ScoreRead(
         id=score.id,
         applicant_id=score.applicant_id,
@@ -229,4 +556,73 @@ def score_stored_applicant(
         model_name=score.model_name,
         created_at=score.created_at,
         explanations=explanations,
+        explanation_status=status_value,
     )
+
+
+@app.get("/applicants/{applicant_id}/scores", response_model=list[ScoreHistoryItem])
+async def applicant_score_history(
+    applicant_id: int,
+    response: Response,
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    session: ReadSession = Depends(get_read_session),
+) -> list[ScoreHistoryItem]:
+    limit = max(1, min(limit, 500))
+    if await session.get(Applicant, applicant_id) is None:
+        raise HTTPException(status_code=404, detail="Applicant not found")
+    try:
+        statement = score_timeline_statement(applicant_id, limit, cursor)
+    except InvalidCursor as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+    with stage("score_history", "db_load"):
+        rows = await session.all(statement)
+    scores = [ScoreHistoryItem.model_validate(row._mapping) for row in rows]
+    if len(scores) == limit:
+        last = scores[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
+    return scores
+
+
+@app.get("/scores/summary")
+async def score_summary(
+    model: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    session: ReadSession = Depends(get_read_session),
+) -> dict[str, Any]:
+    with stage("score_summary", "db_aggregate"):
+        rows = await session.all(score_summary_statement(model=model, since=since, until=until))
+    return {
+        "model": model,
+        "since": since,
+        "until": until,
+        **summarize_score_histogram(rows),
+    }
+
+
+@app.get("/scores/{score_id}", response_model=ScoreRead)
+def get_score(score_id: int, session: Session = Depends(get_session)) -> ScoreRead:
+    score = session.get(Score, score_id)
+    if not score:
+        raise HTTPException(status_code=404, detail="Score not found")
+    return ScoreRead(
+        id=score.id,
+        applicant_id=score.applicant_id,
+        pd=score.pd,
+        risk_bucket=score.risk_bucket,
+        model_name=score.model_name,
+        created_at=score.created_at,
+        explanations=json.loads(score.explanations_json) if score.explanations_json else None,
+        explanation_status=explanation_status(session, score),
+    )
+
+
+def _save_score(session: Session, score: Score, queue_explanation: bool = False) -> None:
+    session.add(score)
+    if queue_explanation:
+        session.flush()
+        enqueue_explanation(session, score)
+    session.commit()
+    session.refresh(score)
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Any, Callable, Iterator, Optional
+
+from .config import settings
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = tuple[str, ...]
+Observation = tuple[str, LabelValues, float]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, registry: "MetricsRegistry", name: str, help: str, labelnames: tuple[str, ...]) -> None:
+        self.registry = registry
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _labels(self, labels: dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args: Any) -> None:
+        super().__init__(*args)
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._labels(labels)
+        if self.registry.buffer is not None:
+            self.registry.buffer.append((self.name, key, amount))
+            return
+        self._add(key, amount)
+
+    def _add(self, key: LabelValues, amount: float) -> None:
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._labels(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, *args: Any, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        super().__init__(*args)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum.
+        self._values: dict[LabelValues, tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        if not self.registry.enabled:
+            return
+        key = self._labels(labels)
+        if self.registry.buffer is not None:
+            self.registry.buffer.append((self.name, key, value))
+            return
+        self._add(key, value)
+
+    def _add(self, key: LabelValues, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    @contextmanager
+    def _timer(self, labels: dict[str, Any]) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def time(self, **labels: Any) -> Any:
+        """Context manager observing the elapsed wall time of its block."""
+        if not self.registry.enabled:
+            return nullcontext()
+        return self._timer(labels)
+
+    def count(self, **labels: Any) -> int:
+        with self._lock:
+            entry = self._values.get(self._labels(labels))
+            return sum(entry[0]) if entry else 0
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        # Bucket lists are updated in place, so copy them along with the keys.
+        with self._lock:
+            values = [(key, (list(counts), total[0])) for key, (counts, total) in self._values.items()]
+        for key, (counts, total) in sorted(values):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """A gauge read from a callback at scrape time, so updates cost nothing."""
+
+    kind = "gauge"
+
+    def __init__(self, *args: Any, collect: Callable[[], dict[LabelValues, float]]) -> None:
+        super().__init__(*args)
+        self.collect = collect
+
+    def render(self) -> list[str]:
+        lines = self.header()
+        for key, value in sorted(self.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Minimal Prometheus text-format registry for in-process metrics.
+
+    When disabled every update returns after one attribute check and timers
+    are ``nullcontext``. Worker processes switch to buffering: updates are
+    appended to a list that the parent drains and replays after each job.
+    """
+
+    def __init__(self, enabled: bool = True, prefix: str = "creditlens_") -> None:
+        self.enabled = enabled
+        self.prefix = prefix
+        self.buffer: Optional[list[Observation]] = None
+        self._metrics: dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(self, self.prefix + name, help, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(self, self.prefix + name, help, labelnames, buckets=buckets))
+
+    def gauge(
+        self,
+        name: str,
+        help: str,
+        collect: Callable[[], dict[LabelValues, float]],
+        labelnames: tuple[str, ...] = (),
+    ) -> Gauge:
+        return self._register(Gauge(self, self.prefix + name, help, labelnames, collect=collect))
+
+    def start_buffering(self) -> None:
+        self.buffer = []
+
+    def drain(self) -> list[Observation]:
+        if self.buffer is None:
+            return []
+        buffered, self.buffer = self.buffer, []
+        return buffered
+
+    def replay(self, observations: list[Observation]) -> None:
+        for name, key, value in observations:
+            metric = self._metrics.get(name)
+            if isinstance(metric, (Counter, Histogram)):
+                metric._add(key, value)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(enabled=settings.metrics_enabled)
+
+REQUEST_SECONDS = metrics.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route.",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = metrics.histogram(
+    "stage_duration_seconds",
+    "Latency of individual hot-path stages.",
+    ("path", "stage"),
+)
+ARTIFACT_RELOADS = metrics.counter("artifact_reloads_total", "Artifact snapshots loaded.")
+CACHE_REQUESTS = metrics.counter("cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+QUEUE_REJECTIONS = metrics.counter(
+    "worker_rejections_total",
+    "Scoring jobs rejected by admission control.",
+    ("endpoint", "status"),
+)
+
+
+def stage(path: str, name: str) -> Any:
+    """Time one stage of a hot path, e.g. ``with stage("score", "predict"):``."""
+    return STAGE_SECONDS.time(path=path, stage=name)
+
+
+def cache_result(cache: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
@@ -4,6 +4,7 @@ from datetime import datetime
 from typing import Optional
 
 from pydantic import ConfigDict
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -35,17 +36,155 @@ class ApplicantBase(SQLModel):
 
 
 class Applicant(ApplicantBase, table=True):
+    __table_args__ = (Index("ix_applicant_created_at_id", "created_at", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
 
 class Score(SQLModel, table=True):
     model_config = ConfigDict(protected_namespaces=())
+    # The applicant index serves per-applicant timelines; the model and
+    # created_at indexes cover every column the score summary reads, so it
+    # never touches the table rows.
+    __table_args__ = (
+        Index("ix_score_applicant_created_at_id", "applicant_id", "created_at", "id"),
+        Index("ix_score_model_created_at", "model_name", "created_at", "risk_bucket", "pd"),
+        Index("ix_score_created_at", "created_at", "risk_bucket", "pd"),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
     applicant_id: int = Field(foreign_key="applicant.id")
     pd: float
     risk_bucket: str
     model_name: str
+    # Scores saved before versions were recorded have none.
+    model_version: Optional[str] = None
     created_at: datetime = Field(default_factory=datetime.utcnow)
     explanations_json: Optional[str] = None
+
+
+class ShadowScore(SQLModel, table=True):
+    """A challenger's PD for a payload the champion scored, with the champion's result."""
+
+    model_config = ConfigDict(protected_namespaces=())
+    __table_args__ = (Index("ix_shadowscore_model_created_at", "shadow_model", "created_at"),)
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    applicant_id: Optional[int] = Field(default=None, foreign_key="applicant.id")
+    champion_model: str
+    champion_version: str
+    champion_pd: float
+    champion_bucket: str
+    champion_flag: bool
+    shadow_model: str
+    shadow_version: str
+    shadow_pd: float
+    shadow_bucket: str
+    shadow_flag: bool
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+class DriftAggregate(SQLModel, table=True):
+    """Running per-feature, per-baseline-bin counters for drift monitoring.
+
+    ``bin_index`` -1 holds values outside the baseline bin range, which count
+    toward the mean but not toward PSI.
+    """
+
+    feature: str = Field(primary_key=True)
+    bin_index: int = Field(primary_key=True)
+    baseline_version: str
+    count: int = 0
+    total: float = 0.0
+    total_sq: float = 0.0
+
+
+class DriftWindowBin(SQLModel, table=True):
+    """``DriftAggregate`` counters split into fixed time buckets.
+
+    Each row covers ``resolution`` seconds starting at ``bucket_start`` (UTC
+    epoch seconds, a multiple of ``resolution``). The same counts are kept at
+    the ``DRIFT_BUCKET_SECONDS`` resolution and per day, so long windows read
+    daily rows instead of summing hours.
+    """
+
+    resolution: int = Field(primary_key=True)
+    bucket_start: int = Field(primary_key=True)
+    feature: str = Field(primary_key=True)
+    bin_index: int = Field(primary_key=True)
+    baseline_version: str
+    count: int = 0
+    total: float = 0.0
+    total_sq: float = 0.0
+
+
+class ExplanationRun(SQLModel, table=True):
+    """Checkpoint of a batch run filling in missing score explanations.
+
+    Scores are processed in id order up to ``max_score_id`` (the newest score
+    when the run started); ``last_score_id`` is committed with each chunk, so
+    a resumed run continues after the last chunk it saved.
+    """
+
+    model_config = ConfigDict(protected_namespaces=())
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    status: str = Field(default="running", index=True)
+    model_version: str
+    max_score_id: int
+    last_score_id: int = 0
+    total: int = 0
+    processed: int = 0
+    chunk_size: int
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
+class RescoreRun(SQLModel, table=True):
+    """Checkpoint of a job scoring every stored applicant with one model version.
+
+    Applicants are processed in id order up to ``max_applicant_id``;
+    ``last_applicant_id`` is committed with each chunk's scores, so a resumed
+    run continues after the last chunk it saved.
+    """
+
+    model_config = ConfigDict(protected_namespaces=())
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    status: str = Field(default="running", index=True)
+    model_name: str
+    model_version: str
+    max_applicant_id: int
+    last_applicant_id: int = 0
+    total: int = 0
+    processed: int = 0
+    chunk_size: int
+    processes: int = 1
+    elapsed_seconds: float = 0.0
+    error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    finished_at: Optional[datetime] = None
+
+
+class ExplanationJob(SQLModel, table=True):
+    """Durable queue entry for an explanation computed after the score is saved.
+
+    A ``running`` job belongs to the worker named in ``owner`` until
+    ``lease_expires_at``; the owner keeps extending the lease while it is
+    alive, so only jobs of a worker that died become claimable again.
+    """
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    score_id: int = Field(foreign_key="score.id", unique=True)
+    status: str = Field(default="pending", index=True)
+    attempts: int = 0
+    error: Optional[str] = None
+    owner: Optional[str] = None
+    lease_expires_at: Optional[datetime] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
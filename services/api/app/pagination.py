@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import and_, or_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), row_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, ValueError, TypeError) as exc:
+        raise InvalidCursor("Malformed cursor") from exc
+
+
+def after_cursor(created_at_column: Any, id_column: Any, cursor: str, descending: bool = False) -> Any:
+    """WHERE clause for rows strictly after ``cursor`` in ``(created_at, id)`` order.
+
+    With ``descending`` the page continues a newest-first listing instead.
+    """
+    created_at, row_id = decode_cursor(cursor)
+    if descending:
+        return or_(
+            created_at_column < created_at,
+            and_(created_at_column == created_at, id_column < row_id),
+        )
+    return or_(
+        created_at_column > created_at,
+        and_(created_at_column == created_at, id_column > row_id),
+    )
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+from ml.artifacts import MANIFEST_FILE, file_digest, read_manifest
+from ml.compiled import CompiledModel, load_compiled_model
+from ml.explain import build_explainer, read_background
+from ml.paths import ARTIFACTS_DIR
+
+from .config import settings
+from .metrics import ARTIFACT_RELOADS, cache_result, stage
+
+logger = logging.getLogger(__name__)
+
+MODEL_FILE = "model.joblib"
+METRICS_FILE = "metrics.json"
+METADATA_FILE = "metadata.json"
+BACKGROUND_FILE = "background.csv"
+BASELINE_FILE = "monitoring_baseline.json"
+COMPILED_FILE = "compiled_model.npz"
+FAIRNESS_FILE = "fairness_report.json"
+TRACKED_FILES = (
+    MODEL_FILE,
+    METRICS_FILE,
+    METADATA_FILE,
+    BACKGROUND_FILE,
+    BASELINE_FILE,
+    COMPILED_FILE,
+    FAIRNESS_FILE,
+)
+
+
+@dataclass
+class ArtifactSnapshot:
+    """One versioned view of everything in the artifacts directory."""
+
+    version: str
+    model_version: str
+    loaded_at: datetime
+    artifacts: dict[str, Any]
+    metrics: Optional[dict[str, Any]] = None
+    metadata: Optional[dict[str, Any]] = None
+    background: Optional[pd.DataFrame] = None
+    baseline: Optional[dict[str, Any]] = None
+    compiled: Optional[CompiledModel] = None
+    fairness_report: Optional[dict[str, Any]] = None
+    _explainer: Any = field(default=None, repr=False)
+    _explainer_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def model(self) -> Any:
+        return self.artifacts["model"]
+
+    @property
+    def features(self) -> list[str]:
+        return self.artifacts["features"]
+
+    @property
+    def threshold(self) -> float:
+        return float(self.artifacts["threshold"])
+
+    @property
+    def model_name(self) -> str:
+        return (self.metrics or {}).get("selected_model", "unknown")
+
+    def explainer(self) -> Any:
+        if self.background is None:
+            raise FileNotFoundError("Background data missing; run training first.")
+        with self._explainer_lock:
+            cache_result("explainer", self._explainer is not None)
+            if self._explainer is None:
+                self._explainer = build_explainer(self.model, self.background, background_key=self.version)
+        return self._explainer
+
+
+def model_digest(path: Path) -> str:
+    return hashlib.sha256(path.read_bytes()).hexdigest()[:12]
+
+
+def _read_json(path: Optional[Path]) -> Optional[dict[str, Any]]:
+    if path is None or not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+class ArtifactRegistry:
+    """Holds the current artifact snapshot and swaps it when files change.
+
+    Readers grab ``current()`` once per request and keep that reference, so an
+    in-flight request never sees a half-swapped set of artifacts. Change
+    detection hashes file names, sizes and mtimes at most once per
+    ``check_interval`` seconds, and reloads run on a background thread so no
+    request waits on ``joblib.load``. Only the very first load is synchronous.
+
+    When training has published a ``manifest.json``, only that file is
+    watched and only the files it lists are loaded, each checked against its
+    digest; a set that is still being written is rejected and retried on the
+    next check. Directories without a manifest fall back to watching
+    ``TRACKED_FILES`` directly.
+    """
+
+    def __init__(self, directory: Path, check_interval: float = 2.0) -> None:
+        self.directory = directory
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._snapshot: Optional[ArtifactSnapshot] = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._reload_flag_lock = threading.Lock()
+        self._reloading = False
+        self._reload_hooks: list[Callable[[ArtifactSnapshot], None]] = []
+
+    def add_reload_hook(self, hook: Callable[[ArtifactSnapshot], None]) -> None:
+        """Call ``hook`` with each newly loaded snapshot, right after it becomes current."""
+        self._reload_hooks.append(hook)
+
+    def manifest(self) -> str:
+        digest = hashlib.sha256()
+        names = (MANIFEST_FILE,) if (self.directory / MANIFEST_FILE).exists() else TRACKED_FILES
+        for name in names:
+            path = self.directory / name
+            if path.exists():
+                stat = path.stat()
+                digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        return digest.hexdigest()[:16]
+
+    def current(self) -> ArtifactSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.reload()
+
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            self._last_check = now
+            if self.manifest() != snapshot.version:
+                self._start_background_reload()
+        return snapshot
+
+    def reload(self) -> ArtifactSnapshot:
+        with self._lock:
+            version = self.manifest()
+            if self._snapshot is not None and self._snapshot.version == version:
+                return self._snapshot
+            with stage("artifacts", "load"):
+                snapshot = self._load(version)
+            if self._snapshot is not None and self.manifest() != version:
+                raise RuntimeError("Artifacts changed while loading; retrying on next check")
+            self._snapshot = snapshot
+            self._last_check = time.monotonic()
+            self.reloads += 1
+            ARTIFACT_RELOADS.inc()
+            logger.info("Loaded artifacts version %s", version)
+        for hook in self._reload_hooks:
+            try:
+                hook(snapshot)
+            except Exception:
+                logger.exception("Artifact reload hook %r failed", hook)
+        return snapshot
+
+    def _load(self, version: str) -> ArtifactSnapshot:
+        import joblib
+
+        published = read_manifest(self.directory)
+        listed = published["files"] if published is not None else None
+
+        def available(name: str) -> Optional[Path]:
+            path = self.directory / name
+            if listed is not None and name not in listed:
+                return None
+            return path if path.exists() else None
+
+        model_path = available(MODEL_FILE)
+        if model_path is None:
+            raise FileNotFoundError("Model artifacts not found")
+
+        background_path = available(BACKGROUND_FILE)
+        compiled_path = available(COMPILED_FILE)
+        metadata = _read_json(available(METADATA_FILE))
+        snapshot = ArtifactSnapshot(
+            version=version,
+            model_version=(published or metadata or {}).get("model_version") or model_digest(model_path),
+            loaded_at=datetime.utcnow(),
+            artifacts=joblib.load(model_path),
+            metrics=_read_json(available(METRICS_FILE)),
+            metadata=metadata,
+            background=read_background(background_path) if background_path else None,
+            baseline=_read_json(available(BASELINE_FILE)),
+            compiled=load_compiled_model(compiled_path) if compiled_path else None,
+            fairness_report=_read_json(available(FAIRNESS_FILE)),
+        )
+        if listed is not None:
+            # Checked after loading, so a file replaced mid-load is caught too.
+            for name in TRACKED_FILES:
+                path = available(name)
+                if path is not None and file_digest(path) != listed[name]:
+                    raise FileNotFoundError(f"{name} does not match {MANIFEST_FILE}; artifacts are being published")
+        return snapshot
+
+    def _start_background_reload(self) -> None:
+        with self._reload_flag_lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._background_reload, name="artifact-reload", daemon=True).start()
+
+    def _background_reload(self) -> None:
+        try:
+            self.reload()
+        except Exception as exc:
+            logger.warning("Keeping artifacts version %s; reload failed: %s", self.version, exc)
+        finally:
+            self._reloading = False
+
+    @property
+    def version(self) -> Optional[str]:
+        snapshot = self._snapshot
+        return snapshot.version if snapshot else None
+
+
+registry = ArtifactRegistry(ARTIFACTS_DIR, check_interval=settings.artifact_check_interval)
+
+
+def current_snapshot() -> ArtifactSnapshot:
+    return registry.current()
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Optional
+
+from .config import settings
+from .metrics import cache_result, stage
+from .registry import FAIRNESS_FILE, ArtifactSnapshot, registry
+
+logger = logging.getLogger(__name__)
+
+_recompute_lock = threading.Lock()
+_computed: dict[str, dict[str, Any]] = {}
+
+
+def fairness_report_for(snapshot: ArtifactSnapshot) -> Optional[dict[str, Any]]:
+    """The stored fairness report for the snapshot's model version, if any."""
+    report = snapshot.fairness_report
+    if not report or report.get("model_version") != snapshot.model_version:
+        report = _computed.get(snapshot.model_version)
+    cache_result("fairness_report", report is not None)
+    return report
+
+
+def fairness_recompute_running() -> bool:
+    return _recompute_lock.locked()
+
+
+def recompute_fairness_report(snapshot: ArtifactSnapshot) -> None:
+    """Rebuild the report for ``snapshot``; meant to run as a background task.
+
+    Only one recompute runs at a time; extra requests while one is running
+    are dropped. The result is kept in memory and written next to the model
+    so the registry picks it up on its next reload, unless a newer model was
+    loaded or published meanwhile: its report must not be overwritten.
+    """
+    if not _recompute_lock.acquire(blocking=False):
+        return
+    try:
+        # sklearn's metrics and model_selection are only needed here.
+        from ml.artifacts import read_manifest, update_manifest
+        from ml.fairness import build_fairness_report, save_fairness_report
+
+        with stage("fairness", "build"):
+            report = build_fairness_report(
+                snapshot.model,
+                snapshot.threshold,
+                model_version=snapshot.model_version,
+                resamples=settings.fairness_bootstrap_resamples,
+                n_jobs=settings.fairness_bootstrap_jobs or None,
+            )
+        _computed.clear()
+        _computed[snapshot.model_version] = report
+        if registry.current().model_version != snapshot.model_version:
+            logger.info("Model changed during the recompute; not saving the report for %s", snapshot.model_version)
+            return
+        published = read_manifest(registry.directory)
+        if published is not None and published["model_version"] != snapshot.model_version:
+            logger.info("A newer model is being published; not saving the report for %s", snapshot.model_version)
+            return
+        with stage("fairness", "save"):
+            save_fairness_report(report, registry.directory / FAIRNESS_FILE)
+            update_manifest(registry.directory, [FAIRNESS_FILE], model_version=snapshot.model_version)
+        logger.info("Recomputed fairness report for model %s", snapshot.model_version)
+    except Exception:
+        logger.exception("Fairness report recompute failed")
+    finally:
+        _recompute_lock.release()
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, insert
+from sqlmodel import Session, select
+
+from .jobs import DONE
+from .metrics import metrics, stage
+from .models import Applicant, RescoreRun, Score
+from .registry import ArtifactSnapshot, current_snapshot
+from .runs import BackgroundRuns, mark_failed, mark_interrupted, reopen_run, run_from_cli, run_summary
+from .scoring import risk_bucket, score_array, score_frame, use_compiled
+
+RESCORE_ROWS = metrics.counter("rescore_rows_total", "Applicants scored by rescoring runs.")
+
+
+def resolve_processes(processes: int) -> int:
+    """``0`` means one worker per CPU; ``1`` scores in this process. Never more than one per CPU."""
+    cpus = os.cpu_count() or 1
+    return min(processes, cpus) if processes > 0 else cpus
+
+
+def score_chunk(values: np.ndarray) -> tuple[str, np.ndarray]:
+    """Score raw feature rows in a worker; returns the model version used and the PDs."""
+    snapshot = current_snapshot()
+    if use_compiled(snapshot):
+        probabilities = score_array(values, snapshot)
+    else:
+        probabilities = score_frame(pd.DataFrame(values, columns=snapshot.features), snapshot)
+    return snapshot.model_version, probabilities
+
+
+class _InlineExecutor(Executor):
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        future: Future = Future()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except Exception as exc:
+            future.set_exception(exc)
+        return future
+
+
+def applicant_chunk_statement(features: list[str], after_id: int, max_id: int, limit: int) -> Any:
+    return (
+        select(Applicant.id, *(getattr(Applicant, feature) for feature in features))
+        .where(Applicant.id > after_id, Applicant.id <= max_id)
+        .order_by(Applicant.id)
+        .limit(limit)
+    )
+
+
+def start_run(
+    session: Session,
+    chunk_size: int,
+    processes: int = 0,
+    snapshot: Optional[ArtifactSnapshot] = None,
+) -> RescoreRun:
+    """Record a new run covering every applicant that exists now."""
+    snapshot = snapshot or current_snapshot()
+    max_id, total = session.exec(select(func.max(Applicant.id), func.count(Applicant.id))).one()
+    run = RescoreRun(
+        model_name=snapshot.model_name,
+        model_version=snapshot.model_version,
+        max_applicant_id=max_id or 0,
+        total=total,
+        chunk_size=max(1, chunk_size),
+        processes=resolve_processes(processes),
+    )
+    session.add(run)
+    session.commit()
+    session.refresh(run)
+    return run
+
+
+def resume_run(
+    session: Session,
+    run_id: int,
+    processes: Optional[int] = None,
+    snapshot: Optional[ArtifactSnapshot] = None,
+) -> RescoreRun:
+    """Reopen an unfinished run; raises ``ValueError`` if the model has changed since it started.
+
+    A new run rescores everyone with the current model instead.
+    """
+    changes = {"processes": resolve_processes(processes)} if processes is not None else {}
+    return reopen_run(session, RescoreRun, run_id, (snapshot or current_snapshot()).model_version, **changes)
+
+
+def _executor_for(processes: int) -> Executor:
+    if processes <= 1:
+        return _InlineExecutor()
+    return ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context("spawn"))
+
+
+def run_rescore(
+    session: Session,
+    run: RescoreRun,
+    snapshot: Optional[ArtifactSnapshot] = None,
+    progress: Optional[Callable[[RescoreRun], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> RescoreRun:
+    """Score the run's remaining applicants and bulk-insert their scores.
+
+    This process reads keyset-ordered chunks and keeps up to two per worker
+    in flight; workers score each chunk in one vectorized call. Results are
+    saved in read order, each chunk's scores and checkpoint in one
+    transaction, so ``last_applicant_id`` never skips an unsaved chunk.
+    Stopping between chunks leaves the run ``interrupted``; an error, or a
+    model reload that changes the version mid-run, leaves it ``failed``.
+    Either can be resumed while the run's model version is still loaded.
+    """
+    snapshot = snapshot or current_snapshot()
+    features = list(snapshot.features)
+    executor = _executor_for(run.processes)
+    in_flight: deque[tuple[list[int], Future]] = deque()
+    read_after = run.last_applicant_id
+    exhausted = False
+
+    def read_ahead() -> None:
+        nonlocal read_after, exhausted
+        while not exhausted and len(in_flight) < max(2, 2 * run.processes):
+            with stage("rescore", "db_load"):
+                rows = (
+                    session.connection()
+                    .execute(applicant_chunk_statement(features, read_after, run.max_applicant_id, run.chunk_size))
+                    .fetchall()
+                )
+            if not rows:
+                exhausted = True
+                return
+            # Plain tuples: numpy probes Row objects for array attributes one by one.
+            values = np.array([tuple(row) for row in rows], dtype=float)
+            ids = values[:, 0].astype(np.int64).tolist()
+            in_flight.append((ids, executor.submit(score_chunk, values[:, 1:])))
+            read_after = ids[-1]
+            exhausted = len(rows) < run.chunk_size
+
+    last_saved = time.perf_counter()
+    try:
+        read_ahead()
+        while in_flight:
+            if should_stop is not None and should_stop():
+                mark_interrupted(session, run)
+                return run
+            ids, future = in_flight.popleft()
+            with stage("rescore", "score"):
+                version, probabilities = future.result()
+            if version != run.model_version:
+                raise RuntimeError(f"Model changed during the run ({run.model_version} -> {version})")
+            created_at = datetime.utcnow()
+            with stage("rescore", "db_insert"):
+                session.exec(
+                    insert(Score),
+                    params=[
+                        {
+                            "applicant_id": applicant_id,
+                            "pd": probability,
+                            "risk_bucket": risk_bucket(probability),
+                            "model_name": run.model_name,
+                            "model_version": run.model_version,
+                            "created_at": created_at,
+                        }
+                        for applicant_id, probability in zip(ids, probabilities.tolist())
+                    ],
+                )
+            now = time.perf_counter()
+            run.last_applicant_id = ids[-1]
+            run.processed += len(ids)
+            run.elapsed_seconds += now - last_saved
+            last_saved = now
+            run.updated_at = created_at
+            session.add(run)
+            session.commit()
+            RESCORE_ROWS.inc(len(ids))
+            if progress is not None:
+                progress(run)
+            read_ahead()
+
+        run.status = DONE
+        run.finished_at = datetime.utcnow()
+        run.updated_at = run.finished_at
+        session.add(run)
+        session.commit()
+    except Exception as exc:
+        mark_failed(session, run, exc)
+        raise
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return run
+
+
+def run_to_dict(run: RescoreRun) -> dict[str, Any]:
+    return {
+        **run_summary(run),
+        "model_name": run.model_name,
+        "last_applicant_id": run.last_applicant_id,
+        "max_applicant_id": run.max_applicant_id,
+        "processes": run.processes,
+    }
+
+
+rescore_runs = BackgroundRuns(
+    RescoreRun,
+    lambda session, run, should_stop: run_rescore(session, run, should_stop=should_stop),
+    name="rescore-run",
+)
+
+
+def main() -> None:
+    from .config import settings
+
+    parser = argparse.ArgumentParser(description="Score every stored applicant with the current model.")
+    parser.add_argument("--chunk-size", type=int, default=settings.rescore_chunk_size)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=settings.rescore_processes,
+        help="Worker processes; 0 uses one per CPU, 1 scores in this process",
+    )
+    parser.add_argument("--resume", type=int, metavar="RUN_ID", help="Continue an interrupted or failed run")
+    args = parser.parse_args()
+
+    def open_run(session: Session) -> RescoreRun:
+        if args.resume:
+            return resume_run(session, args.resume, processes=args.processes)
+        return start_run(session, args.chunk_size, processes=args.processes)
+
+    run_from_cli(open_run, run_rescore, run_to_dict, "rescored {processed}/{total} applicants")
+
+
+if __name__ == "__main__":
+    main()
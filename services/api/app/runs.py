@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import json
+import logging
+import sys
+import threading
+from datetime import datetime
+from typing import Any, Callable, ContextManager, Optional, Protocol
+
+from sqlmodel import Session
+
+from .jobs import DONE, FAILED, RUNNING
+
+logger = logging.getLogger(__name__)
+
+INTERRUPTED = "interrupted"
+
+
+class CheckpointedRun(Protocol):
+    """Columns shared by the run tables (``ExplanationRun``, ``RescoreRun``)."""
+
+    id: Optional[int]
+    status: str
+    model_version: str
+    total: int
+    processed: int
+    chunk_size: int
+    elapsed_seconds: float
+    error: Optional[str]
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime]
+
+
+def reopen_run(
+    session: Session,
+    model: type,
+    run_id: int,
+    model_version: str,
+    **changes: Any,
+) -> Any:
+    """Set an unfinished run back to ``running``, applying ``changes``.
+
+    Raises ``LookupError`` for an unknown run and ``ValueError`` when
+    ``model_version`` is not the one the run started with: finishing it with
+    another model would split its output across two versions.
+    """
+    label = model.__name__.removesuffix("Run")
+    run = session.get(model, run_id)
+    if run is None:
+        raise LookupError(f"{label} run {run_id} not found")
+    if run.status != DONE:
+        if model_version != run.model_version:
+            raise ValueError(
+                f"{label} run {run_id} uses model {run.model_version} but {model_version} is loaded; "
+                "start a new run"
+            )
+        for name, value in changes.items():
+            setattr(run, name, value)
+        run.status = RUNNING
+        run.error = None
+        run.updated_at = datetime.utcnow()
+        session.add(run)
+        session.commit()
+    return run
+
+
+def mark_interrupted(session: Session, run: CheckpointedRun) -> None:
+    session.rollback()
+    run.status = INTERRUPTED
+    run.updated_at = datetime.utcnow()
+    session.add(run)
+    session.commit()
+
+
+def mark_failed(session: Session, run: CheckpointedRun, exc: BaseException) -> None:
+    session.rollback()
+    run.status = FAILED
+    run.error = f"{type(exc).__name__}: {exc}"[:500]
+    run.updated_at = datetime.utcnow()
+    session.add(run)
+    session.commit()
+
+
+def run_summary(run: CheckpointedRun) -> dict[str, Any]:
+    """Status, progress and throughput fields every run reports."""
+    return {
+        "id": run.id,
+        "status": run.status,
+        "model_version": run.model_version,
+        "processed": run.processed,
+        "total": run.total,
+        "progress": round(run.processed / run.total, 4) if run.total else 1.0,
+        "chunk_size": run.chunk_size,
+        "elapsed_seconds": round(run.elapsed_seconds, 3),
+        "rows_per_second": round(run.processed / run.elapsed_seconds, 1) if run.elapsed_seconds else None,
+        "error": run.error,
+        "created_at": run.created_at,
+        "updated_at": run.updated_at,
+        "finished_at": run.finished_at,
+    }
+
+
+class BackgroundRuns:
+    """Continues runs of one kind on a background thread, one at a time per process.
+
+    ``execute(session, run, should_stop)`` processes the run's remaining
+    chunks and checks ``should_stop`` between them; ``stop`` sets it and
+    waits for the thread to checkpoint and exit.
+    """
+
+    def __init__(
+        self,
+        model: type,
+        execute: Callable[[Session, Any, Callable[[], bool]], Any],
+        name: str,
+    ) -> None:
+        self.model = model
+        self.execute = execute
+        self.name = name
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def active(self) -> bool:
+        return self._lock.locked()
+
+    def start(self, session_factory: Callable[[], ContextManager[Session]], run_id: int) -> bool:
+        if not self._lock.acquire(blocking=False):
+            return False
+        self._stop.clear()
+
+        def target() -> None:
+            try:
+                with session_factory() as session:
+                    self.execute(session, session.get(self.model, run_id), self._stop.is_set)
+            except Exception:
+                logger.exception("%s %s failed", self.name, run_id)
+            finally:
+                self._lock.release()
+
+        threading.Thread(target=target, name=f"{self.name}-{run_id}", daemon=True).start()
+        return True
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Ask a background run to stop after its current chunk and wait for it."""
+        self._stop.set()
+        if self._lock.acquire(timeout=timeout):
+            self._lock.release()
+
+
+def run_from_cli(
+    open_run: Callable[[Session], Any],
+    execute: Callable[..., Any],
+    to_dict: Callable[[Any], dict[str, Any]],
+    progress_label: str,
+) -> None:
+    """Open a run, process it with a progress line on stderr and print its final state.
+
+    ``progress_label`` is formatted with the run's ``processed`` and ``total``.
+    Ctrl-C leaves the run ``interrupted`` and prints how to resume it.
+    """
+    from .database import init_db, session_scope
+
+    def report(run: CheckpointedRun) -> None:
+        rate = run.processed / max(run.elapsed_seconds, 1e-9)
+        label = progress_label.format(processed=run.processed, total=run.total)
+        print(f"\r{label} ({rate:,.0f} rows/s)", end="", file=sys.stderr, flush=True)
+
+    init_db()
+    with session_scope() as session:
+        try:
+            run = open_run(session)
+        except (LookupError, ValueError) as exc:
+            raise SystemExit(str(exc)) from exc
+        try:
+            execute(session, run, progress=report)
+        except KeyboardInterrupt:
+            mark_interrupted(session, run)
+            print(file=sys.stderr)
+            raise SystemExit(f"Interrupted; resume with --resume {run.id}")
+        print(file=sys.stderr)
+        print(json.dumps(to_dict(run), indent=2, default=str))
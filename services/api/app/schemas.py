@@ -1,10 +1,10 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import ConfigDict
-from sqlmodel import SQLModel
+from pydantic import ConfigDict, ValidationError
+from sqlmodel import Field, SQLModel
 
 from .models import ApplicantBase
 
@@ -23,7 +23,9 @@ class ApplicantRead(ApplicantBase):
 class FeatureContribution(SQLModel):
     feature: str
     value: float
-    contribution: float
+    contribution: float = Field(
+        description="SHAP value in log-odds of default; contributions sum to logit(pd) minus the base log-odds.",
+    )
 
 
 class ScoreResponse(SQLModel):
@@ -46,3 +48,43 @@ class ScoreRead(SQLModel):
     model_name: str
     created_at: datetime
     explanations: Optional[list[FeatureContribution]] = None
+    explanation_status: Optional[str] = None
+
+
+class ScoreHistoryItem(SQLModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    id: int
+    pd: float
+    risk_bucket: str
+    model_name: str
+    created_at: datetime
+
+
+class BatchScoreRequest(SQLModel):
+    applicants: list[dict[str, Any]] = Field(min_length=1)
+
+
+class BatchScoreItem(SQLModel):
+    index: int
+    pd: Optional[float] = None
+    risk_bucket: Optional[str] = None
+    explanations: Optional[list[FeatureContribution]] = None
+    errors: Optional[list[dict[str, Any]]] = None
+
+
+class BatchScoreResponse(SQLModel):
+    model_config = ConfigDict(protected_namespaces=())
+
+    threshold: float
+    model_name: str
+    scored: int
+    failed: int
+    results: list[BatchScoreItem]
+
+
+def validation_error_details(exc: ValidationError) -> list[dict[str, Any]]:
+    return [
+        {"loc": list(error["loc"]), "msg": error["msg"], "type": error["type"]}
+        for error in exc.errors(include_url=False)
+    ]
@@ -1,21 +1,16 @@
 from __future__ import annotations
 
-import json
-from functools import lru_cache
-from pathlib import Path
-from typing import Any
+from typing import Any, Optional
 
-import joblib
+import numpy as np
 import pandas as pd
 
-from ml.explain import explain_instance
+from ml.explain import explain_frame, explain_instance
 
+from .config import settings
+from .metrics import stage
 from .models import ApplicantBase
-
-ARTIFACTS_DIR = Path(__file__).resolve().parents[1] / "artifacts"
-MODEL_PATH = ARTIFACTS_DIR / "model.joblib"
-METRICS_PATH = ARTIFACTS_DIR / "metrics.json"
-METADATA_PATH = ARTIFACTS_DIR / "metadata.json"
+from .registry import ArtifactSnapshot, current_snapshot
 
 
 def risk_bucket(probability: float) -> str:
@@ -26,17 +21,8 @@ def risk_bucket(probability: float) -> str:
     return "high"
 
 
-@lru_cache
 def load_artifacts() -> dict[str, Any]:
-    if not MODEL_PATH.exists():
-        raise FileNotFoundError("Model artifacts not found")
-    return joblib.load(MODEL_PATH)
-
-
-def load_json(path: Path) -> dict[str, Any]:
-    if not path.exists():
-        raise FileNotFoundError(f"Missing artifact: {path.name}")
-    return json.loads(path.read_text())
+    return current_snapshot().artifacts
 
 
 def prepare_dataframe(payload: ApplicantBase, feature_order: list[str]) -> pd.DataFrame:
@@ -44,31 +30,120 @@ def prepare_dataframe(payload: ApplicantBase, feature_order: list[str]) -> pd.Da
     return pd.DataFrame([data], columns=feature_order)
 
 
-def score_payload(payload: ApplicantBase) -> dict[str, Any]:
-    artifacts = load_artifacts()
-    model = artifacts["model"]
-    features = artifacts["features"]
-    threshold = float(artifacts["threshold"])
+def prepare_batch_dataframe(payloads: list[ApplicantBase], feature_order: list[str]) -> pd.DataFrame:
+    return pd.DataFrame([payload.model_dump() for payload in payloads], columns=feature_order)
+
+
+def prepare_array(payloads: list[ApplicantBase], feature_order: list[str]) -> np.ndarray:
+    return np.array(
+        [[getattr(payload, feature) for feature in feature_order] for payload in payloads],
+        dtype=float,
+    )
+
+
+def use_compiled(snapshot: ArtifactSnapshot) -> bool:
+    return settings.compiled_scoring and snapshot.compiled is not None
+
+
+def score_array(values: np.ndarray, snapshot: Optional[ArtifactSnapshot] = None) -> np.ndarray:
+    """Score raw feature rows (``snapshot.features`` order) with the compiled model."""
+    snapshot = snapshot or current_snapshot()
+    if snapshot.compiled is None:
+        raise FileNotFoundError("Compiled model missing; run training first.")
+    return snapshot.compiled.predict_proba(values)
+
+
+def score_frame(frame: pd.DataFrame, snapshot: Optional[ArtifactSnapshot] = None) -> np.ndarray:
+    snapshot = snapshot or current_snapshot()
+    return snapshot.model.predict_proba(frame)[:, 1]
+
+
+def score_batch(
+    payloads: list[ApplicantBase],
+    chunk_size: int = 5_000,
+    snapshot: Optional[ArtifactSnapshot] = None,
+) -> list[dict[str, Any]]:
+    snapshot = snapshot or current_snapshot()
+    chunk_size = max(1, chunk_size)
+
+    results: list[dict[str, Any]] = []
+    for start in range(0, len(payloads), chunk_size):
+        chunk = payloads[start : start + chunk_size]
+        if use_compiled(snapshot):
+            with stage("score_batch", "prepare"):
+                values = prepare_array(chunk, snapshot.features)
+            with stage("score_batch", "predict"):
+                probabilities = score_array(values, snapshot)
+        else:
+            with stage("score_batch", "prepare"):
+                frame = prepare_batch_dataframe(chunk, snapshot.features)
+            with stage("score_batch", "predict"):
+                probabilities = score_frame(frame, snapshot)
+        for probability in probabilities.tolist():
+            results.append({"pd": probability, "risk_bucket": risk_bucket(probability)})
+    return results
+
+
+def score_payload(payload: ApplicantBase, snapshot: Optional[ArtifactSnapshot] = None) -> dict[str, Any]:
+    snapshot = snapshot or current_snapshot()
 
-    frame = prepare_dataframe(payload, features)
-    probability = float(model.predict_proba(frame)[:, 1][0])
+    if use_compiled(snapshot):
+        with stage("score", "prepare"):
+            values = prepare_array([payload], snapshot.features)
+        with stage("score", "predict"):
+            probability = float(score_array(values, snapshot)[0])
+    else:
+        with stage("score", "prepare"):
+            frame = prepare_dataframe(payload, snapshot.features)
+        with stage("score", "predict"):
+            probability = float(snapshot.model.predict_proba(frame)[:, 1][0])
 
     return {
         "pd": probability,
         "risk_bucket": risk_bucket(probability),
-        "threshold": threshold,
+        "threshold": snapshot.threshold,
     }
 
 
-def explain_payload(payload: ApplicantBase, max_evals: int = 256) -> list[dict[str, float]]:
-    artifacts = load_artifacts()
-    model = artifacts["model"]
-    return explain_instance(model, payload.model_dump(), max_evals=max_evals)
+def explain_payload(
+    payload: ApplicantBase,
+    max_evals: int = 256,
+    snapshot: Optional[ArtifactSnapshot] = None,
+) -> list[dict[str, float]]:
+    snapshot = snapshot or current_snapshot()
+    with stage("explain", "explainer"):
+        explainer = snapshot.explainer()
+    with stage("explain", "shap"):
+        return explain_instance(
+            snapshot.model,
+            payload.model_dump(),
+            max_evals=max_evals,
+            explainer=explainer,
+        )
+
+
+def explain_batch(
+    frame: pd.DataFrame,
+    max_evals: int = 256,
+    snapshot: Optional[ArtifactSnapshot] = None,
+) -> list[list[dict[str, float]]]:
+    """Explain every row of ``frame`` (``snapshot.features`` columns) in one pass."""
+    snapshot = snapshot or current_snapshot()
+    with stage("explain_batch", "explainer"):
+        explainer = snapshot.explainer()
+    with stage("explain_batch", "shap"):
+        return explain_frame(snapshot.model, frame, max_evals=max_evals, explainer=explainer)
 
 
 def load_metadata() -> dict[str, Any]:
-    return load_json(METADATA_PATH)
+    metadata = current_snapshot().metadata
+    if metadata is None:
+        raise FileNotFoundError("Missing artifact: metadata.json")
+    return metadata
 
 
 def load_metrics() -> dict[str, Any]:
-    return load_json(METRICS_PATH)
+    metrics = current_snapshot().metrics
+    if metrics is None:
+        raise FileNotFoundError("Missing artifact: metrics.json")
+    return metrics
@@ -1,13 +1,21 @@
 from __future__ import annotations
 
+import argparse
 import logging
-from typing import Iterable
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Iterator, Optional
 
+import numpy as np
 import pandas as pd
+from sqlalchemy import bindparam, insert
 from sqlmodel import Session, delete, select
 
-from app.models import Applicant
-from ml.download_data import download_data
+from app.drift import clear_aggregates, current_baseline, record_applicants
+from app.models import Applicant, Score
+from ml.download_data import load_dataset
 from ml.features import FEATURE_COLUMNS
 
 logger = logging.getLogger(__name__)
@@ -24,14 +32,9 @@ INT_COLUMNS = {
     "PAY_5",
     "PAY_6",
 }
+SEED_DTYPES = {column: "int64" if column in INT_COLUMNS else "float64" for column in FEATURE_COLUMNS}
 
-
-def _coerce_value(column: str, value):
-    if hasattr(value, "item"):
-        value = value.item()
-    if column in INT_COLUMNS:
-        return int(value)
-    return float(value)
+ProgressCallback = Callable[[int, Optional[int]], None]
 
 
 def _has_binary_fields(applicant: Applicant) -> bool:
@@ -42,10 +45,135 @@ def _has_binary_fields(applicant: Applicant) -> bool:
     return False
 
 
-def build_applicants(rows: pd.DataFrame) -> Iterable[Applicant]:
-    for _, row in rows.iterrows():
-        payload = {column: _coerce_value(column, row[column]) for column in FEATURE_COLUMNS}
-        yield Applicant(**payload)
+def _count_rows(path: Path) -> int:
+    with path.open("rb") as handle:
+        lines = sum(block.count(b"\n") for block in iter(lambda: handle.read(1 << 20), b""))
+    return max(lines - 1, 0)
+
+
+def _iter_frame_slices(frame: pd.DataFrame, chunk_size: int) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(frame), chunk_size):
+        yield frame.iloc[start : start + chunk_size]
+
+
+def iter_seed_chunks(
+    path: Optional[Path] = None,
+    sample_size: Optional[int] = None,
+    chunk_size: int = 10_000,
+    random_state: int = 42,
+) -> Iterator[pd.DataFrame]:
+    """Yield typed feature frames from ``path`` without loading the whole file.
+
+    Without ``path`` the rows come from the memory-mapped dataset cache, so
+    only the pages a chunk touches are read. With ``sample_size`` a uniform
+    random subset of row positions is drawn up front and each chunk keeps
+    only its selected rows, so memory stays bounded by ``chunk_size``
+    whatever the dataset size.
+    """
+    if path is None:
+        frame = load_dataset(FEATURE_COLUMNS)
+        total = len(frame)
+        reader: Iterator[pd.DataFrame] = _iter_frame_slices(frame, chunk_size)
+    else:
+        total = _count_rows(path) if sample_size is not None else 0
+        reader = pd.read_csv(path, usecols=FEATURE_COLUMNS, chunksize=chunk_size, dtype="float64")
+
+    selected: Optional[np.ndarray] = None
+    if sample_size is not None and sample_size < total:
+        rng = np.random.default_rng(random_state)
+        selected = np.sort(rng.choice(total, size=sample_size, replace=False))
+
+    start = 0
+    for chunk in reader:
+        if selected is not None:
+            lo, hi = np.searchsorted(selected, [start, start + len(chunk)])
+            positions = selected[lo:hi] - start
+            start += len(chunk)
+            if not len(positions):
+                continue
+            chunk = chunk.iloc[positions]
+        else:
+            start += len(chunk)
+        yield chunk.dropna().astype(SEED_DTYPES)[FEATURE_COLUMNS]
+
+
+def _insert_chunk(session: Session, chunk: pd.DataFrame, created_at: datetime) -> int:
+    """Executemany one typed chunk straight through the DB-API cursor.
+
+    Statement compilation and bind processing happen once per chunk rather
+    than once per row, which is where ORM and Core executemany spend most of
+    their time at this scale.
+    """
+    connection = session.connection()
+    table = Applicant.__table__
+    columns = [*FEATURE_COLUMNS, "created_at"]
+    compiled = insert(table).values({column: bindparam(column) for column in columns}).compile(
+        dialect=connection.dialect
+    )
+    process = table.c.created_at.type.bind_processor(connection.dialect)
+    stamp = process(created_at) if process else created_at
+
+    values = [chunk[column].tolist() for column in FEATURE_COLUMNS]
+    values.append([stamp] * len(chunk))
+    if compiled.positional:
+        order = [columns.index(name) for name in compiled.positiontup]
+        params: list = list(zip(*(values[index] for index in order)))
+    else:
+        params = [dict(zip(columns, row)) for row in zip(*values)]
+    connection.exec_driver_sql(str(compiled), params)
+    return len(chunk)
+
+
+def _insert_chunk_returning_ids(session: Session, chunk: pd.DataFrame, created_at: datetime) -> list[int]:
+    """Insert one chunk through ``RETURNING`` and give back the new ids in row order.
+
+    Slower than ``_insert_chunk`` but needed when the rows also feed the
+    drift aggregates: a concurrent rebuild matches the rows it deferred
+    against its scan by applicant id, as ``BulkIngester`` does.
+    """
+    rows = [{**row, "created_at": created_at} for row in chunk.to_dict("records")]
+    return list(
+        session.exec(
+            insert(Applicant).returning(Applicant.id, sort_by_parameter_order=True),
+            params=rows,
+        ).scalars()
+    )
+
+
+def seed_applicants(
+    session: Session,
+    path: Optional[Path] = None,
+    sample_size: Optional[int] = None,
+    chunk_size: int = 10_000,
+    progress: Optional[ProgressCallback] = None,
+) -> int:
+    """Bulk insert applicants, one executemany and commit per chunk.
+
+    ``path`` names a CSV to stream; by default the cached dataset is used.
+    """
+    baseline = current_baseline()
+    inserted = 0
+    for chunk in iter_seed_chunks(path, sample_size=sample_size, chunk_size=chunk_size):
+        created_at = datetime.utcnow()
+        try:
+            if baseline is None:
+                inserted += _insert_chunk(session, chunk, created_at)
+            else:
+                ids = _insert_chunk_returning_ids(session, chunk, created_at)
+                inserted += len(ids)
+                record_applicants(
+                    session,
+                    chunk.set_axis(pd.Index(ids, name="id")),
+                    baseline=baseline,
+                    created_at=created_at,
+                )
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        if progress is not None:
+            progress(inserted, sample_size)
+    return inserted
 
 
 def seed_if_empty(session: Session, sample_size: int = 200) -> int:
@@ -54,18 +182,51 @@ def seed_if_empty(session: Session, sample_size: int = 200) -> int:
         return 0
     if existing:
         session.exec(delete(Applicant))
+        clear_aggregates(session)
         session.commit()
 
     try:
-        data_path = download_data()
+        return seed_applicants(session, sample_size=sample_size or None)
     except Exception as exc:  # pragma: no cover - network issues
+        session.rollback()
         logger.warning("Skipping seed; dataset unavailable: %s", exc)
         return 0
 
-    df = pd.read_csv(data_path)
-    sample = df.sample(n=min(sample_size, len(df)), random_state=42)
 
-    applicants = list(build_applicants(sample))
-    session.add_all(applicants)
-    session.commit()
-    return len(applicants)
+def main() -> None:
+    from .database import init_db, session_scope
+
+    parser = argparse.ArgumentParser(description="Bulk seed applicants from a CSV dataset.")
+    parser.add_argument("path", nargs="?", type=Path, help="CSV file (defaults to the cached dataset)")
+    parser.add_argument("--sample-size", type=int, default=0, help="Random sample size; 0 loads every row")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--reset", action="store_true", help="Delete existing applicants and scores first")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+
+    def report(inserted: int, expected: Optional[int]) -> None:
+        rate = inserted / max(time.perf_counter() - started, 1e-9)
+        suffix = f"/{expected}" if expected else ""
+        print(f"\rseeded {inserted}{suffix} rows ({rate:,.0f} rows/s)", end="", file=sys.stderr, flush=True)
+
+    init_db()
+    with session_scope() as session:
+        if args.reset:
+            session.exec(delete(Score))
+            session.exec(delete(Applicant))
+            clear_aggregates(session)
+            session.commit()
+        inserted = seed_applicants(
+            session,
+            args.path,
+            sample_size=args.sample_size or None,
+            chunk_size=args.chunk_size,
+            progress=report,
+        )
+    print(file=sys.stderr)
+    print(f"Seeded {inserted} applicants in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
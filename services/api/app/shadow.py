@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, ContextManager, Optional
+
+import pandas as pd
+from sqlalchemy import case, func, insert
+from sqlmodel import Session, select
+
+from ml.artifacts import MANIFEST_FILE, file_digest, read_manifest
+from ml.paths import CHALLENGERS_DIR
+
+from .config import settings
+from .database import session_scope
+from .metrics import metrics, stage
+from .models import ShadowScore
+from .registry import model_digest
+from .scoring import risk_bucket
+
+logger = logging.getLogger(__name__)
+
+SHADOW_SCORED = metrics.counter("shadow_scores_total", "Payloads scored by each shadow model.", ("model",))
+SHADOW_DROPPED = metrics.counter("shadow_dropped_total", "Shadow payloads dropped because the queue was full.")
+
+
+@dataclass
+class ShadowModel:
+    name: str
+    version: str
+    model: Any
+    features: list[str]
+    threshold: float
+
+
+def load_shadow_models(directory: Path, selected: str) -> list[ShadowModel]:
+    """Challengers saved by training, filtered by ``selected``.
+
+    ``selected`` is ``*`` for every challenger, a comma-separated list of
+    names, or empty to disable shadow scoring. When training has published a
+    ``manifest.json`` only the files it lists are loaded, and any whose
+    digest no longer matches is rejected as still being written.
+    """
+    wanted = {name.strip() for name in selected.split(",") if name.strip()}
+    if not wanted or not directory.exists():
+        return []
+
+    import joblib
+
+    published = read_manifest(directory)
+    listed = published["files"] if published is not None else None
+    models = []
+    for path in sorted(directory.glob("*.joblib")):
+        if listed is not None and path.name not in listed:
+            continue
+        artifacts = joblib.load(path)
+        # Checked after loading, so a file replaced mid-load is caught too.
+        if listed is not None and file_digest(path) != listed[path.name]:
+            raise FileNotFoundError(f"{path.name} does not match {MANIFEST_FILE}; challengers are being published")
+        name = artifacts.get("name", path.stem)
+        if "*" not in wanted and name not in wanted:
+            continue
+        models.append(
+            ShadowModel(
+                name=name,
+                version=model_digest(path),
+                model=artifacts["model"],
+                features=list(artifacts["features"]),
+                threshold=float(artifacts["threshold"]),
+            )
+        )
+    return models
+
+
+class ShadowScorer:
+    """Scores challengers on live payloads without touching request latency.
+
+    Endpoints hand each champion result to ``submit``, which only enqueues
+    it; when the bounded queue is full the payload is dropped and counted.
+    A background thread takes whatever has queued up (up to ``batch_size``),
+    scores the batch with one ``predict_proba`` per shadow model and writes
+    the results in one insert. Challengers are reloaded when their manifest
+    (or, without one, their files) changes; a failed reload keeps the
+    current models and is retried on the next check.
+    """
+
+    def __init__(
+        self,
+        directory: Path,
+        selected: str,
+        session_factory: Callable[[], ContextManager[Session]],
+        max_queue: int = 10_000,
+        batch_size: int = 256,
+        flush_interval: float = 1.0,
+        check_interval: float = 30.0,
+    ) -> None:
+        self.directory = directory
+        self.selected = selected
+        self.session_factory = session_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.check_interval = check_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._models: list[ShadowModel] = []
+        self._manifest: Optional[str] = None
+        self._last_check = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.selected.strip())
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def submit(
+        self,
+        payload: dict[str, Any],
+        champion: dict[str, Any],
+        applicant_id: Optional[int] = None,
+    ) -> bool:
+        if not self.enabled:
+            return False
+        try:
+            self._queue.put_nowait((datetime.utcnow(), applicant_id, payload, champion))
+        except queue.Full:
+            SHADOW_DROPPED.inc()
+            return False
+        return True
+
+    def models(self) -> list[ShadowModel]:
+        now = time.monotonic()
+        if self._manifest is not None and now - self._last_check < self.check_interval:
+            return self._models
+        self._last_check = now
+        digest = hashlib.sha256()
+        if (self.directory / MANIFEST_FILE).exists():
+            paths = [self.directory / MANIFEST_FILE]
+        else:
+            paths = sorted(self.directory.glob("*.joblib")) if self.directory.exists() else []
+        for path in paths:
+            stat = path.stat()
+            digest.update(f"{path.name}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        manifest = digest.hexdigest()
+        if manifest != self._manifest:
+            try:
+                models = load_shadow_models(self.directory, self.selected)
+            except Exception as exc:
+                logger.warning("Keeping %s shadow models; reload failed: %s", len(self._models), exc)
+                return self._models
+            self._models = models
+            self._manifest = manifest
+            logger.info("Shadow models: %s", [model.name for model in self._models] or "none")
+        return self._models
+
+    def process(self, batch: list[tuple]) -> int:
+        """Score one batch with every shadow model and store the results."""
+        models = self.models()
+        if not batch or not models:
+            return 0
+
+        stamps, applicant_ids, payloads, champions = zip(*batch)
+        frame = pd.DataFrame(list(payloads))
+        rows: list[dict[str, Any]] = []
+        for shadow in models:
+            with stage("shadow", "score"):
+                probabilities = shadow.model.predict_proba(frame[shadow.features])[:, 1]
+            for created_at, applicant_id, champion, probability in zip(
+                stamps, applicant_ids, champions, probabilities.tolist()
+            ):
+                rows.append(
+                    {
+                        "applicant_id": applicant_id,
+                        "champion_model": champion["model_name"],
+                        "champion_version": champion["model_version"],
+                        "champion_pd": champion["pd"],
+                        "champion_bucket": champion["risk_bucket"],
+                        "champion_flag": champion["pd"] >= champion["threshold"],
+                        "shadow_model": shadow.name,
+                        "shadow_version": shadow.version,
+                        "shadow_pd": probability,
+                        "shadow_bucket": risk_bucket(probability),
+                        "shadow_flag": probability >= shadow.threshold,
+                        "created_at": created_at,
+                    }
+                )
+            SHADOW_SCORED.inc(len(batch), model=shadow.name)
+
+        with stage("shadow", "db_insert"), self.session_factory() as session:
+            session.exec(insert(ShadowScore), params=rows)
+            session.commit()
+        return len(rows)
+
+    def _take_batch(self, timeout: Optional[float]) -> list[tuple]:
+        try:
+            batch = [self._queue.get(timeout=timeout) if timeout else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def drain(self) -> int:
+        """Process everything queued so far; returns the rows written."""
+        written = 0
+        while True:
+            batch = self._take_batch(timeout=None)
+            if not batch:
+                return written
+            written += self.process(batch)
+
+    def start(self) -> None:
+        if not self.enabled or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="shadow-scorer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._take_batch(timeout=self.flush_interval)
+            if not batch:
+                continue
+            try:
+                self.process(batch)
+            except Exception:
+                logger.exception("Shadow scoring batch of %s failed", len(batch))
+
+
+def shadow_comparison(
+    session: Session,
+    since: Optional[datetime] = None,
+    shadow_model: Optional[str] = None,
+) -> list[dict[str, Any]]:
+    """Agreement, PD deltas and bucket flips per champion/shadow version pair, aggregated in SQL."""
+    delta = ShadowScore.shadow_pd - ShadowScore.champion_pd
+    keys = (
+        ShadowScore.champion_model,
+        ShadowScore.champion_version,
+        ShadowScore.shadow_model,
+        ShadowScore.shadow_version,
+    )
+    filters = []
+    if since is not None:
+        filters.append(ShadowScore.created_at >= since)
+    if shadow_model:
+        filters.append(ShadowScore.shadow_model == shadow_model)
+
+    summary = (
+        select(
+            *keys,
+            func.count(),
+            func.sum(case((ShadowScore.shadow_flag == ShadowScore.champion_flag, 1), else_=0)),
+            func.sum(case((ShadowScore.shadow_bucket != ShadowScore.champion_bucket, 1), else_=0)),
+            func.avg(delta),
+            func.avg(func.abs(delta)),
+            func.max(func.abs(delta)),
+            func.avg(ShadowScore.champion_pd),
+            func.avg(ShadowScore.shadow_pd),
+            func.min(ShadowScore.created_at),
+            func.max(ShadowScore.created_at),
+        )
+        .where(*filters)
+        .group_by(*keys)
+    )
+    flips = (
+        select(*keys, ShadowScore.champion_bucket, ShadowScore.shadow_bucket, func.count())
+        .where(*filters)
+        .group_by(*keys, ShadowScore.champion_bucket, ShadowScore.shadow_bucket)
+    )
+
+    matrices: dict[tuple, dict[str, dict[str, int]]] = {}
+    for *key, champion_bucket, shadow_bucket, count in session.exec(flips):
+        matrices.setdefault(tuple(key), {}).setdefault(champion_bucket, {})[shadow_bucket] = count
+
+    results = []
+    for row in session.exec(summary):
+        key = tuple(row[:4])
+        count, agree, flipped, mean_delta, mean_abs, max_abs, champion_mean, shadow_mean, first, last = row[4:]
+        results.append(
+            {
+                "champion_model": key[0],
+                "champion_version": key[1],
+                "shadow_model": key[2],
+                "shadow_version": key[3],
+                "count": count,
+                "decision_agreement": round(agree / count, 6),
+                "bucket_flip_rate": round(flipped / count, 6),
+                "pd_delta": {
+                    "mean": round(float(mean_delta), 6),
+                    "mean_abs": round(float(mean_abs), 6),
+                    "max_abs": round(float(max_abs), 6),
+                },
+                "mean_pd": {"champion": round(float(champion_mean), 6), "shadow": round(float(shadow_mean), 6)},
+                "bucket_transitions": matrices.get(key, {}),
+                "first_scored_at": first,
+                "last_scored_at": last,
+            }
+        )
+    return sorted(results, key=lambda item: (-item["count"], item["shadow_model"]))
+
+
+shadow_scorer = ShadowScorer(
+    CHALLENGERS_DIR,
+    settings.shadow_models,
+    session_scope,
+    max_queue=settings.shadow_queue_size,
+    batch_size=settings.shadow_batch_size,
+    flush_interval=settings.shadow_flush_interval,
+    check_interval=settings.artifact_check_interval,
+)
+
+metrics.gauge(
+    "shadow_queue_depth",
+    "Champion results waiting to be shadow scored.",
+    collect=lambda: {(): shadow_scorer.pending},
+)
@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from . import IMPORT_STARTED
+from .metrics import metrics
+from .registry import ArtifactRegistry, registry
+from .schemas import ApplicantCreate
+from .scoring import explain_payload, score_payload
+from .workers import WorkerPool, score_job
+
+logger = logging.getLogger(__name__)
+
+STARTING = "starting"
+READY = "ready"
+FAILED = "failed"
+
+
+class StartupTracker:
+    """Times the startup phases and gates readiness on the warmup.
+
+    Warmup loads the artifacts, then runs one score and one explanation in
+    this process (which also imports shap and builds the explainer) and one
+    job in every worker process. Until it finishes ``ready`` is False, so a
+    readiness probe keeps traffic away from a pod whose first request would
+    otherwise pay for all of that.
+
+    A failed warmup is retried with exponential backoff, from
+    ``retry_delay`` up to ``max_retry_delay`` seconds, and right away when
+    the registry loads new artifacts, so a pod recovers once training has
+    published a usable model.
+    """
+
+    def __init__(
+        self,
+        artifact_registry: ArtifactRegistry,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 60.0,
+    ) -> None:
+        self.registry = artifact_registry
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.status = STARTING
+        self.attempts = 0
+        self.timings: dict[str, float] = {}
+        self.error: Optional[str] = None
+        self.model_version: Optional[str] = None
+        self._thread: Optional[threading.Thread] = None
+        self._retry = threading.Event()
+        self._stop = threading.Event()
+        artifact_registry.add_reload_hook(self._on_reload)
+
+    @property
+    def ready(self) -> bool:
+        return self.status == READY
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.timings[phase] = round(seconds, 4)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record_imports(self) -> None:
+        self.record("imports", time.perf_counter() - IMPORT_STARTED)
+
+    def warm_up(self, pool: Optional[WorkerPool] = None) -> None:
+        started = time.perf_counter()
+        self.status = STARTING
+        self.attempts += 1
+        try:
+            with self.phase("load_artifacts"):
+                snapshot = self.registry.reload()
+            self.model_version = snapshot.model_version
+            payload = warmup_payload(snapshot.background, snapshot.features)
+            with self.phase("warmup_score"):
+                score_payload(payload, snapshot)
+            if snapshot.background is not None:
+                with self.phase("warmup_explainer"):
+                    snapshot.explainer()
+                with self.phase("warmup_explain"):
+                    explain_payload(payload, snapshot=snapshot)
+            if pool is not None:
+                with self.phase("warmup_workers"):
+                    pool.warm_up(score_job, payload.model_dump(), True)
+        except Exception as exc:
+            self.status = FAILED
+            self.error = f"{type(exc).__name__}: {exc}"
+            logger.warning("Warmup failed; not ready: %s", self.error)
+            return
+        finally:
+            self.record("warmup", time.perf_counter() - started)
+        self.error = None
+        self.status = READY
+        logger.info("Warmup finished: %s", self.timings)
+
+    def _on_reload(self, snapshot: Any) -> None:
+        if self.status == FAILED:
+            self._retry.set()
+
+    def _warm_up_until_ready(self, pool: Optional[WorkerPool]) -> None:
+        delay = self.retry_delay
+        self.warm_up(pool)
+        while self.status == FAILED:
+            self._retry.wait(delay)
+            self._retry.clear()
+            if self._stop.is_set():
+                return
+            self.warm_up(pool)
+            delay = min(delay * 2, self.max_retry_delay)
+
+    def start_warmup(self, pool: Optional[WorkerPool] = None) -> None:
+        """Warm up on a background thread so liveness probes answer meanwhile."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._warm_up_until_ready, args=(pool,), name="warmup", daemon=True)
+        self._thread.start()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait until ready, or until ``timeout`` passes while warmup is still failing."""
+        if self._thread is not None:
+            deadline = None if timeout is None else time.monotonic() + timeout
+            while self._thread.is_alive() and not self.ready:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._thread.join(0.05 if remaining is None else min(0.05, remaining))
+        return self.ready
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._retry.set()
+
+    def skip_warmup(self) -> None:
+        self.status = READY
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "status": self.status,
+            "attempts": self.attempts,
+            "model_version": self.model_version,
+            "error": self.error,
+            "timings": dict(self.timings),
+        }
+
+
+def warmup_payload(background: Any, features: list[str]) -> ApplicantCreate:
+    """A realistic applicant to warm up with: the first background row, if any."""
+    if background is not None and len(background):
+        row = background.iloc[0]
+        values = {feature: row[feature] for feature in features}
+    else:
+        values = {feature: 0 for feature in features}
+    fields = ApplicantCreate.model_fields
+    return ApplicantCreate.model_construct(
+        **{
+            feature: int(round(value)) if fields[feature].annotation is int else float(value)
+            for feature, value in values.items()
+        }
+    )
+
+
+startup = StartupTracker(registry)
+
+metrics.gauge(
+    "startup_phase_seconds",
+    "Duration of each startup phase, including imports and warmup.",
+    collect=lambda: {(phase,): seconds for phase, seconds in startup.timings.items()},
+    labelnames=("phase",),
+)
+metrics.gauge(
+    "ready",
+    "1 once startup warmup has finished.",
+    collect=lambda: {(): 1 if startup.ready else 0},
+)
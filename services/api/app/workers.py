@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .metrics import QUEUE_REJECTIONS, metrics, stage
+from .registry import current_snapshot
+from .schemas import ApplicantCreate, validation_error_details
+from .scoring import explain_batch, explain_payload, prepare_batch_dataframe, score_batch, score_payload
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing work the service cannot absorb."""
+
+    def __init__(self, status_code: int, detail: str, retry_after: int) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+def _initialize_worker() -> None:
+    # Metrics recorded in a worker are shipped back with each job result.
+    metrics.start_buffering()
+    try:
+        snapshot = current_snapshot()
+        snapshot.explainer()
+    except FileNotFoundError:
+        logger.warning("Worker started without model artifacts")
+
+
+def score_job(payload: dict[str, Any], explain: bool = True) -> dict[str, Any]:
+    """Score (and optionally explain) one validated applicant payload."""
+    snapshot = current_snapshot()
+    applicant = ApplicantCreate.model_construct(**payload)
+    output = score_payload(applicant, snapshot)
+    explanations = None
+    if explain:
+        try:
+            explanations = explain_payload(applicant, snapshot=snapshot)
+        except FileNotFoundError:
+            explanations = None
+    return {
+        **output,
+        "model_name": snapshot.model_name,
+        "model_version": snapshot.model_version,
+        "explanations": explanations,
+    }
+
+
+def batch_score_job(rows: list[dict[str, Any]], chunk_size: int, explain: bool = False) -> dict[str, Any]:
+    """Validate raw rows and score (and optionally explain) the valid ones, keeping input order."""
+    snapshot = current_snapshot()
+    results: list[dict[str, Any]] = []
+    valid_indices: list[int] = []
+    valid_payloads: list[ApplicantCreate] = []
+    with stage("score_batch", "validate"):
+        for index, row in enumerate(rows):
+            try:
+                valid_payloads.append(ApplicantCreate.model_validate(row))
+            except ValidationError as exc:
+                results.append({"index": index, "errors": validation_error_details(exc)})
+                continue
+            valid_indices.append(index)
+            results.append({"index": index})
+
+    outputs = score_batch(valid_payloads, chunk_size=chunk_size, snapshot=snapshot)
+    for index, output in zip(valid_indices, outputs):
+        results[index].update(output)
+    if explain:
+        try:
+            for start in range(0, len(valid_payloads), max(1, chunk_size)):
+                with stage("score_batch", "prepare"):
+                    frame = prepare_batch_dataframe(valid_payloads[start : start + chunk_size], snapshot.features)
+                explanations = explain_batch(frame, snapshot=snapshot)
+                for index, row in zip(valid_indices[start : start + chunk_size], explanations):
+                    results[index]["explanations"] = row
+        except FileNotFoundError:
+            pass
+
+    return {
+        "threshold": snapshot.threshold,
+        "model_name": snapshot.model_name,
+        "scored": len(valid_payloads),
+        "failed": len(results) - len(valid_payloads),
+        "results": results,
+    }
+
+
+def _run_collecting_metrics(fn: Callable[..., Any], *args: Any) -> tuple[Any, list]:
+    result = fn(*args)
+    return result, metrics.drain()
+
+
+class WorkerPool:
+    """Runs CPU-heavy scoring jobs off the event loop with bounded admission.
+
+    With ``processes`` > 0 jobs run in a spawn-based process pool whose
+    workers preload the model and explainer; otherwise they run in the
+    shared threadpool. At most ``max_queue`` jobs are admitted at once and
+    each endpoint is capped by its own concurrency limit; excess work fails
+    fast with 503 (pool full) or 429 (endpoint limit) and a Retry-After hint.
+    """
+
+    def __init__(
+        self,
+        processes: int = 0,
+        max_queue: int = 64,
+        endpoint_limits: Optional[dict[str, int]] = None,
+        retry_after: int = 1,
+    ) -> None:
+        self.processes = processes
+        self.max_queue = max_queue
+        self.endpoint_limits = endpoint_limits or {}
+        self.retry_after = retry_after
+        self.pending = 0
+        self._in_flight: dict[str, int] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self) -> None:
+        if self.processes > 0 and self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_initialize_worker,
+            )
+            logger.info("Started %s scoring worker processes", self.processes)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def warm_up(self, fn: Callable[..., Any], *args: Any) -> None:
+        """Run one job per worker so every process is spawned and initialized.
+
+        Jobs submitted while no worker is idle each spawn a new process, so
+        this starts the whole pool. Metrics from these jobs are discarded.
+        """
+        if self._executor is None:
+            return
+        futures = [self._executor.submit(_run_collecting_metrics, fn, *args) for _ in range(self.processes)]
+        for future in futures:
+            future.result()
+
+    @property
+    def in_flight(self) -> dict[str, int]:
+        return dict(self._in_flight)
+
+    def _admit(self, endpoint: str) -> None:
+        if self.pending >= self.max_queue:
+            QUEUE_REJECTIONS.inc(endpoint=endpoint, status=503)
+            raise Overloaded(503, "Scoring queue is full. Retry later.", self.retry_after)
+        limit = self.endpoint_limits.get(endpoint)
+        if limit is not None and self._in_flight.get(endpoint, 0) >= limit:
+            QUEUE_REJECTIONS.inc(endpoint=endpoint, status=429)
+            raise Overloaded(429, f"Too many concurrent {endpoint} requests.", self.retry_after)
+        self.pending += 1
+        self._in_flight[endpoint] = self._in_flight.get(endpoint, 0) + 1
+
+    def _release(self, endpoint: str) -> None:
+        self.pending -= 1
+        self._in_flight[endpoint] -= 1
+
+    async def run(self, endpoint: str, fn: Callable[..., Any], *args: Any) -> Any:
+        # Admission bookkeeping happens on the event loop thread, so plain
+        # counters are safe without locks.
+        self._admit(endpoint)
+        try:
+            if self._executor is None:
+                return await run_in_threadpool(fn, *args)
+            result, observations = await asyncio.get_running_loop().run_in_executor(
+                self._executor, _run_collecting_metrics, fn, *args
+            )
+            metrics.replay(observations)
+            return result
+        except BrokenProcessPool as exc:
+            logger.error("Scoring worker pool broke; restarting it")
+            self.shutdown()
+            self.start()
+            raise Overloaded(503, "Scoring workers restarting. Retry later.", self.retry_after) from exc
+        finally:
+            self._release(endpoint)
+
+
+pool = WorkerPool(
+    processes=settings.worker_processes,
+    max_queue=settings.worker_queue_size,
+    endpoint_limits=settings.endpoint_concurrency,
+    retry_after=settings.retry_after_seconds,
+)
+
+metrics.gauge(
+    "worker_queue_depth",
+    "Scoring jobs admitted and not yet finished.",
+    collect=lambda: {(): pool.pending},
+)
+metrics.gauge(
+    "worker_in_flight",
+    "Scoring jobs in flight per endpoint.",
+    collect=lambda: {(endpoint,): count for endpoint, count in pool.in_flight.items()},
+    labelnames=("endpoint",),
+)
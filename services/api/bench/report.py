@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+import statistics
+from pathlib import Path
+from typing import Any, Optional
+
+STAT_KEYS = ("mean_ms", "p50_ms", "p95_ms", "min_ms")
+
+
+def summarize_timings(name: str, timings: list[float], params: dict[str, Any]) -> dict[str, Any]:
+    """Reduce raw per-call timings (seconds) to millisecond statistics."""
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+    return {
+        "name": name,
+        "params": params,
+        "calls": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": statistics.median(ordered) * 1000,
+        "p95_ms": p95 * 1000,
+        "min_ms": ordered[0] * 1000,
+    }
+
+
+def load_results(path: Path) -> Optional[dict[str, Any]]:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def save_results(results: dict[str, Any], path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(results, indent=2))
+    return path
+
+
+def compare_results(
+    current: dict[str, Any],
+    baseline: dict[str, Any],
+    tolerance: float = 0.25,
+    metric: str = "p50_ms",
+) -> list[dict[str, Any]]:
+    """Compare each benchmark's ``metric`` against the baseline run.
+
+    A benchmark regresses when it is more than ``tolerance`` slower than the
+    baseline. Benchmarks whose parameters changed are reported as not
+    comparable rather than compared.
+    """
+    previous = baseline.get("benchmarks", {})
+    rows: list[dict[str, Any]] = []
+    for name, result in current.get("benchmarks", {}).items():
+        before = previous.get(name)
+        row = {"name": name, "current": result[metric], "baseline": None, "change": None, "status": "new"}
+        if before is not None and before.get("params") != result.get("params"):
+            row["status"] = "params changed"
+        elif before is not None:
+            change = result[metric] / before[metric] - 1.0 if before[metric] else 0.0
+            row.update(baseline=before[metric], change=change)
+            if change > tolerance:
+                row["status"] = "regression"
+            elif change < -tolerance:
+                row["status"] = "improvement"
+            else:
+                row["status"] = "ok"
+        rows.append(row)
+    return rows
+
+
+def format_comparison(rows: list[dict[str, Any]], metric: str = "p50_ms") -> str:
+    lines = [f"{'benchmark':<28} {metric:>12} {'baseline':>12} {'change':>9}  status"]
+    for row in rows:
+        baseline = f"{row['baseline']:.3f}" if row["baseline"] is not None else "-"
+        change = f"{row['change']:+.1%}" if row["change"] is not None else "-"
+        lines.append(f"{row['name']:<28} {row['current']:>12.3f} {baseline:>12} {change:>9}  {row['status']}")
+    return "\n".join(lines)
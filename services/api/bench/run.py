@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import argparse
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from .report import compare_results, format_comparison, load_results, save_results, summarize_timings
+
+BENCH_DIR = Path(__file__).resolve().parent
+BENCHMARKS = (
+    "train",
+    "score_payload",
+    "explain_payload",
+    "summarize_drift",
+    "build_fairness_report",
+    "http_score",
+    "http_score_batch",
+    "http_applicants",
+    "http_monitoring_summary",
+    "http_fairness_report",
+)
+
+
+def configure_environment(workdir: Path, train_rows: int) -> None:
+    """Point data, artifacts and the database at ``workdir``.
+
+    Must run before any ``app`` or ``ml`` module is imported, since their
+    paths and settings are read at import time.
+    """
+    os.environ["CREDITLENS_OFFLINE"] = "1"
+    os.environ["CREDITLENS_SYNTHETIC_ROWS"] = str(train_rows)
+    os.environ["CREDITLENS_DATA_DIR"] = str(workdir / "data")
+    os.environ["CREDITLENS_ARTIFACTS_DIR"] = str(workdir / "artifacts")
+    os.environ["DATABASE_URL"] = f"sqlite:///{workdir / 'bench.db'}"
+
+
+def timed(fn: Callable[[], Any], calls: int, warmup: int = 1) -> list[float]:
+    for _ in range(warmup):
+        fn()
+    timings = []
+    for _ in range(calls):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+class Suite:
+    def __init__(self, args: argparse.Namespace) -> None:
+        self.args = args
+        self.results: dict[str, dict[str, Any]] = {}
+
+    def record(self, name: str, timings: list[float], **params: Any) -> None:
+        result = summarize_timings(name, timings, params)
+        self.results[name] = result
+        print(f"{name:<28} p50 {result['p50_ms']:10.3f} ms  p95 {result['p95_ms']:10.3f} ms", file=sys.stderr)
+
+    def payloads(self, rows: int, seed: int) -> list[Any]:
+        from app.schemas import ApplicantCreate
+        from ml.features import FEATURE_COLUMNS
+        from ml.synthetic import generate_applicants
+
+        frame = generate_applicants(rows, seed=seed)[FEATURE_COLUMNS]
+        return [ApplicantCreate.model_validate(row) for row in frame.to_dict("records")]
+
+    def run_train(self) -> None:
+        from ml.download_data import download_data
+        from ml.train import train
+
+        download_data()
+        self.record("train", timed(train, calls=1, warmup=0), rows=self.args.train_rows)
+
+    def ensure_artifacts(self) -> None:
+        from ml.download_data import download_data
+        from ml.paths import ARTIFACTS_DIR
+        from ml.train import train
+
+        download_data()
+        if not (ARTIFACTS_DIR / "model.joblib").exists():
+            print("Training once to create artifacts (untimed)", file=sys.stderr)
+            train()
+
+    def run_score_payload(self) -> None:
+        from app.scoring import score_payload
+
+        payloads = iter(self.payloads(self.args.calls + 1, seed=1))
+        self.record("score_payload", timed(lambda: score_payload(next(payloads)), self.args.calls))
+
+    def run_explain_payload(self) -> None:
+        from app.scoring import explain_payload
+
+        payloads = iter(self.payloads(self.args.explain_calls + 1, seed=2))
+        self.record("explain_payload", timed(lambda: explain_payload(next(payloads)), self.args.explain_calls))
+
+    def run_summarize_drift(self) -> None:
+        from app.registry import current_snapshot
+        from ml.features import FEATURE_COLUMNS
+        from ml.monitoring import summarize_drift
+        from ml.synthetic import generate_applicants
+
+        baseline = current_snapshot().baseline
+        frame = generate_applicants(self.args.drift_rows, seed=3)[FEATURE_COLUMNS]
+        timings = timed(lambda: summarize_drift(frame, baseline), self.args.repeat)
+        self.record("summarize_drift", timings, rows=self.args.drift_rows)
+
+    def run_build_fairness_report(self) -> None:
+        from ml.fairness import build_fairness_report
+
+        timings = timed(build_fairness_report, self.args.repeat)
+        self.record("build_fairness_report", timings, rows=self.args.train_rows)
+
+    def run_http(self, selected: list[str]) -> None:
+        from fastapi.testclient import TestClient
+
+        from app.main import app
+
+        rows = [payload.model_dump() for payload in self.payloads(self.args.http_calls + 1, seed=4)]
+        batch = {"applicants": [payload.model_dump() for payload in self.payloads(self.args.batch_rows, seed=5)]}
+        requests: dict[str, tuple[Callable[[Any], Callable[[], Any]], int, dict[str, Any]]] = {
+            "http_score": (lambda client: self._post_each(client, "/score", rows), self.args.http_calls, {}),
+            "http_score_batch": (
+                lambda client: lambda: client.post("/score/batch", json=batch),
+                self.args.repeat,
+                {"rows": self.args.batch_rows},
+            ),
+            "http_applicants": (
+                lambda client: lambda: client.get("/applicants", params={"limit": 100}),
+                self.args.http_calls,
+                {"limit": 100},
+            ),
+            "http_monitoring_summary": (
+                lambda client: lambda: client.get("/monitoring/summary"),
+                self.args.repeat,
+                {},
+            ),
+            "http_fairness_report": (
+                lambda client: lambda: client.get("/fairness/report"),
+                self.args.http_calls,
+                {},
+            ),
+        }
+        with TestClient(app) as client:
+            for name, (build, calls, params) in requests.items():
+                if name in selected:
+                    self.record(name, timed(self._checked(build(client)), calls), **params)
+
+    @staticmethod
+    def _post_each(client: Any, path: str, rows: list[dict[str, Any]]) -> Callable[[], Any]:
+        remaining = iter(rows)
+        return lambda: client.post(path, json=next(remaining))
+
+    @staticmethod
+    def _checked(request: Callable[[], Any]) -> Callable[[], Any]:
+        def call() -> Any:
+            response = request()
+            response.raise_for_status()
+            return response
+
+        return call
+
+    def run(self, selected: list[str]) -> dict[str, Any]:
+        if "train" in selected:
+            self.run_train()
+        else:
+            self.ensure_artifacts()
+        for name in ("score_payload", "explain_payload", "summarize_drift", "build_fairness_report"):
+            if name in selected:
+                getattr(self, f"run_{name}")()
+        if any(name.startswith("http_") for name in selected):
+            self.run_http(selected)
+        return self.results
+
+
+def environment_info() -> dict[str, Any]:
+    import numpy
+    import pandas
+    import sklearn
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": numpy.__version__,
+        "pandas": pandas.__version__,
+        "scikit_learn": sklearn.__version__,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the offline CreditLens benchmark suite.")
+    parser.add_argument("--workdir", type=Path, help="Reuse data, artifacts and DB from this directory")
+    parser.add_argument("--only", help=f"Comma-separated subset of: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--skip", default="", help="Comma-separated benchmarks to skip")
+    parser.add_argument("--train-rows", type=int, default=30_000)
+    parser.add_argument("--calls", type=int, default=200, help="Single-payload scoring calls")
+    parser.add_argument("--explain-calls", type=int, default=50)
+    parser.add_argument("--drift-rows", type=int, default=30_000)
+    parser.add_argument("--batch-rows", type=int, default=1_000)
+    parser.add_argument("--http-calls", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5, help="Calls for the heavier benchmarks")
+    parser.add_argument("--output", type=Path, help="Results JSON (defaults to <workdir>/results.json)")
+    parser.add_argument("--baseline", type=Path, default=BENCH_DIR / "baseline.json")
+    parser.add_argument("--update-baseline", action="store_true", help="Replace an existing baseline with this run")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before flagging")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    selected = [name for name in (args.only.split(",") if args.only else BENCHMARKS) if name]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+    skipped = set(args.skip.split(","))
+    selected = [name for name in selected if name not in skipped]
+
+    workdir = args.workdir or Path(tempfile.mkdtemp(prefix="creditlens-bench-"))
+    configure_environment(workdir.resolve(), args.train_rows)
+    print(f"Benchmark workdir: {workdir}", file=sys.stderr)
+
+    results = {
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "environment": environment_info(),
+        "benchmarks": Suite(args).run(selected),
+    }
+    output = args.output or workdir / "results.json"
+    save_results(results, output)
+    print(f"Wrote {output}", file=sys.stderr)
+
+    baseline = load_results(args.baseline)
+    regressions = []
+    if baseline is not None:
+        rows = compare_results(results, baseline, tolerance=args.tolerance)
+        regressions = [row for row in rows if row["status"] == "regression"]
+        print(format_comparison(rows))
+
+    if baseline is None or args.update_baseline:
+        # Baselines are machine-specific and not committed; the first run on a machine records one.
+        save_results(results, args.baseline)
+        print(f"{'Updated' if baseline is not None else 'Created'} baseline {args.baseline}", file=sys.stderr)
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+MANIFEST_FILE = "manifest.json"
+
+
+def file_digest(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def write_text_atomic(path: Path, text: str) -> Path:
+    """Write ``text`` to a temporary sibling and rename it over ``path``."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(text)
+    os.replace(temporary, path)
+    return path
+
+
+def dump_atomic(value: Any, path: Path) -> Path:
+    """``joblib.dump`` to a temporary sibling and rename it over ``path``."""
+    import joblib
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary = path.with_name(f".{path.name}.tmp")
+    joblib.dump(value, temporary)
+    os.replace(temporary, path)
+    return path
+
+
+def read_manifest(directory: Path) -> Optional[dict[str, Any]]:
+    path = directory / MANIFEST_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def publish_manifest(directory: Path, model_version: str) -> dict[str, Any]:
+    """Publish the artifact files in ``directory`` as one version.
+
+    Training overwrites the artifact files one at a time, so the manifest is
+    written last, atomically, with a digest per file. Readers load only the
+    files it lists and reject any whose digest no longer matches, so they
+    never mix files from two training runs.
+    """
+    files = {
+        path.name: file_digest(path)
+        for path in sorted(directory.iterdir())
+        if path.is_file() and path.name != MANIFEST_FILE and not path.name.startswith(".")
+    }
+    manifest = {
+        "model_version": model_version,
+        "published_at": datetime.utcnow().isoformat() + "Z",
+        "files": files,
+    }
+    write_text_atomic(directory / MANIFEST_FILE, json.dumps(manifest, indent=2))
+    return manifest
+
+
+def update_manifest(
+    directory: Path,
+    names: Iterable[str],
+    model_version: Optional[str] = None,
+) -> Optional[dict[str, Any]]:
+    """Re-digest ``names`` in the current manifest after rewriting those files.
+
+    With ``model_version``, nothing changes unless the manifest was published
+    for that version, so a file built for an older model is never published
+    alongside a newer one.
+    """
+    manifest = read_manifest(directory)
+    if manifest is None or (model_version is not None and manifest["model_version"] != model_version):
+        return None
+    for name in names:
+        manifest["files"][name] = file_digest(directory / name)
+    write_text_atomic(directory / MANIFEST_FILE, json.dumps(manifest, indent=2))
+    return manifest
@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .explain import unwrap_calibrated
+from .features import FEATURE_COLUMNS
+from .paths import ARTIFACTS_DIR
+
+COMPILED_MODEL_PATH = ARTIFACTS_DIR / "compiled_model.npz"
+
+
+@dataclass
+class CompiledModel:
+    """A fitted calibrated pipeline flattened into numpy arrays.
+
+    Rows are raw feature vectors in ``FEATURE_COLUMNS`` order. Missing values
+    are imputed with the fitted statistics, categorical codes are one-hot
+    encoded through sorted lookup tables (unknown codes encode as all zeros),
+    then a logistic regression or a packed forest produces the uncalibrated
+    score ``f`` and the sigmoid calibrator returns ``expit(-(a * f + b))``.
+    """
+
+    kind: str
+    impute_values: np.ndarray
+    categorical_index: np.ndarray
+    categories: np.ndarray
+    category_offsets: np.ndarray
+    numeric_index: np.ndarray
+    calibration: np.ndarray
+    arrays: dict[str, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def width(self) -> int:
+        return int(self.category_offsets[-1] + len(self.numeric_index))
+
+    def transform(self, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 1:
+            values = values[np.newaxis, :]
+        values = np.where(np.isnan(values), self.impute_values, values)
+
+        transformed = np.zeros((values.shape[0], self.width))
+        rows = np.arange(values.shape[0])
+        for position, column in enumerate(self.categorical_index):
+            start, end = self.category_offsets[position], self.category_offsets[position + 1]
+            categories = self.categories[start:end]
+            lookup = np.searchsorted(categories, values[:, column])
+            clipped = np.minimum(lookup, len(categories) - 1)
+            known = categories[clipped] == values[:, column]
+            transformed[rows[known], start + clipped[known]] = 1.0
+        transformed[:, self.category_offsets[-1] :] = values[:, self.numeric_index]
+        return transformed
+
+    def decision(self, transformed: np.ndarray) -> np.ndarray:
+        if self.kind == "linear":
+            return transformed @ self.arrays["coef"] + self.arrays["intercept"][0]
+
+        left = self.arrays["children_left"]
+        right = self.arrays["children_right"]
+        feature = self.arrays["feature"]
+        threshold = self.arrays["threshold"]
+        # sklearn compares float32 inputs against float64 thresholds.
+        transformed = transformed.astype(np.float32)
+
+        nodes = np.tile(self.arrays["roots"], (transformed.shape[0], 1))
+        rows = np.arange(transformed.shape[0])[:, np.newaxis]
+        for _ in range(int(self.arrays["max_depth"][0])):
+            children = left[nodes]
+            is_leaf = children == -1
+            if is_leaf.all():
+                break
+            go_left = transformed[rows, np.maximum(feature[nodes], 0)] <= threshold[nodes]
+            nodes = np.where(is_leaf, nodes, np.where(go_left, children, right[nodes]))
+        return self.arrays["leaf_value"][nodes].mean(axis=1)
+
+    def predict_proba(self, values: np.ndarray) -> np.ndarray:
+        """Calibrated probability of the positive class for each row."""
+        a, b = self.calibration
+        return 1.0 / (1.0 + np.exp(a * self.decision(self.transform(values)) + b))
+
+
+def _imputer_statistics(transformer: Any) -> np.ndarray:
+    return np.asarray(transformer.named_steps["imputer"].statistics_, dtype=float)
+
+
+def _pack_forest(forest: Any) -> dict[str, np.ndarray]:
+    positive = int(np.flatnonzero(forest.classes_ == 1)[0])
+    lefts, rights, features, thresholds, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        left = tree.children_left.astype(np.int64)
+        right = tree.children_right.astype(np.int64)
+        lefts.append(np.where(left == -1, -1, left + offset))
+        rights.append(np.where(right == -1, -1, right + offset))
+        features.append(tree.feature.astype(np.int64))
+        thresholds.append(tree.threshold.astype(np.float64))
+        counts = tree.value[:, 0, :]
+        totals = counts.sum(axis=1)
+        totals[totals == 0] = 1.0
+        values.append(counts[:, positive] / totals)
+        roots.append(offset)
+        offset += tree.node_count
+
+    return {
+        "children_left": np.concatenate(lefts),
+        "children_right": np.concatenate(rights),
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "leaf_value": np.concatenate(values),
+        "roots": np.asarray(roots, dtype=np.int64),
+        "max_depth": np.asarray([max(e.tree_.max_depth for e in forest.estimators_)], dtype=np.int64),
+    }
+
+
+def compile_model(model: Any) -> CompiledModel:
+    """Flatten a prefit sigmoid-calibrated ``preprocess``/``clf`` pipeline.
+
+    Raises ``ValueError`` for pipelines or classifiers this format cannot
+    represent; callers keep serving through ``predict_proba`` in that case.
+    """
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+
+    pipeline, calibrator = unwrap_calibrated(model)
+    preprocessor = pipeline.named_steps["preprocess"]
+    classifier = pipeline.named_steps["clf"]
+
+    impute_values = np.full(len(FEATURE_COLUMNS), np.nan)
+    categorical_index: list[int] = []
+    categories: list[np.ndarray] = []
+    numeric_index: list[int] = []
+    for _, transformer, columns in preprocessor.transformers_:
+        if transformer == "drop" or len(columns) == 0:
+            continue
+        indices = [FEATURE_COLUMNS.index(column) for column in columns]
+        impute_values[indices] = _imputer_statistics(transformer)
+        encoder = transformer.named_steps.get("onehot")
+        if encoder is None:
+            numeric_index.extend(indices)
+            continue
+        if numeric_index or encoder.drop_idx_ is not None:
+            raise ValueError("Unsupported one-hot layout")
+        categorical_index.extend(indices)
+        categories.extend(np.asarray(values, dtype=float) for values in encoder.categories_)
+
+    offsets = np.concatenate([[0], np.cumsum([len(values) for values in categories])]).astype(np.int64)
+    if int(offsets[-1]) + len(numeric_index) != len(preprocessor.get_feature_names_out()):
+        raise ValueError("Could not reproduce the preprocessor layout")
+
+    if isinstance(classifier, LogisticRegression) and classifier.coef_.shape[0] == 1:
+        kind = "linear"
+        arrays = {
+            "coef": classifier.coef_[0].astype(float),
+            "intercept": classifier.intercept_.astype(float),
+        }
+    elif isinstance(classifier, RandomForestClassifier):
+        kind = "forest"
+        arrays = _pack_forest(classifier)
+    else:
+        raise ValueError(f"Cannot compile {type(classifier).__name__}")
+
+    return CompiledModel(
+        kind=kind,
+        impute_values=impute_values,
+        categorical_index=np.asarray(categorical_index, dtype=np.int64),
+        categories=np.concatenate(categories) if categories else np.empty(0),
+        category_offsets=offsets,
+        numeric_index=np.asarray(numeric_index, dtype=np.int64),
+        calibration=np.asarray([calibrator.a_, calibrator.b_], dtype=float),
+        arrays=arrays,
+    )
+
+
+def save_compiled_model(compiled: CompiledModel, path: Path = COMPILED_MODEL_PATH) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as handle:
+        np.savez(
+            handle,
+            kind=np.asarray(compiled.kind),
+            impute_values=compiled.impute_values,
+            categorical_index=compiled.categorical_index,
+            categories=compiled.categories,
+            category_offsets=compiled.category_offsets,
+            numeric_index=compiled.numeric_index,
+            calibration=compiled.calibration,
+            **{f"arrays_{name}": values for name, values in compiled.arrays.items()},
+        )
+    return path
+
+
+def load_compiled_model(path: Path = COMPILED_MODEL_PATH) -> CompiledModel:
+    if not path.exists():
+        raise FileNotFoundError("Compiled model missing; run training first.")
+    with np.load(path, allow_pickle=False) as data:
+        return CompiledModel(
+            kind=str(data["kind"]),
+            impute_values=data["impute_values"],
+            categorical_index=data["categorical_index"],
+            categories=data["categories"],
+            category_offsets=data["category_offsets"],
+            numeric_index=data["numeric_index"],
+            calibration=data["calibration"],
+            arrays={name[len("arrays_") :]: data[name] for name in data.files if name.startswith("arrays_")},
+        )
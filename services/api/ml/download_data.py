@@ -1,21 +1,65 @@
 from __future__ import annotations
 
+import json
+import os
+import shutil
 import sys
 from pathlib import Path
+from typing import Any, Optional
 
+import numpy as np
 import pandas as pd
-from ucimlrepo import fetch_ucirepo
+from numpy.lib.format import open_memmap
 
-from .features import RAW_TARGET_COLUMN, TARGET_COLUMN
+from .features import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, RAW_TARGET_COLUMN, TARGET_COLUMN
+from .paths import DATA_DIR
 
-RAW_DIR = Path(__file__).resolve().parents[1] / "data" / "raw"
+RAW_DIR = DATA_DIR / "raw"
 RAW_FILE = RAW_DIR / "default_of_credit_card_clients.csv"
+# Offline runs keep their generated rows apart from the downloaded dataset so
+# a later online run can never train on them.
+SYNTHETIC_FILE = RAW_DIR / "synthetic_credit_card_clients.csv"
+MANIFEST_FILE = "manifest.json"
+CACHE_FORMAT = 1
+
+# Narrowest dtype each column's schema allows. Codes fit int8; currency
+# amounts are whole units, which float32 holds exactly below 2**24. A chunk
+# that does not fit widens its column (see ``_fits``), so the cache never
+# loses information on unusual data.
+COLUMN_DTYPES: dict[str, str] = {
+    **{column: "int8" for column in CATEGORICAL_COLUMNS},
+    "AGE": "int8",
+    **{column: "int8" for column in ["PAY_0", "PAY_2", "PAY_3", "PAY_4", "PAY_5", "PAY_6"]},
+    **{column: "float32" for column in FEATURE_COLUMNS if column.startswith(("LIMIT_BAL", "BILL_AMT", "PAY_AMT"))},
+    TARGET_COLUMN: "int8",
+}
+WIDER_DTYPES = {"int8": "int16", "int16": "int32", "int32": "int64", "float32": "float64"}
+
+_loaded: dict[str, Any] = {}
+
+
+def offline_mode() -> bool:
+    return os.environ.get("CREDITLENS_OFFLINE", "").lower() in {"1", "true", "yes"}
+
+
+def dataset_file() -> Path:
+    """The raw CSV for the current mode: synthetic when offline, downloaded otherwise."""
+    return SYNTHETIC_FILE if offline_mode() else RAW_FILE
 
 
 def download_data(force: bool = False) -> Path:
     RAW_DIR.mkdir(parents=True, exist_ok=True)
-    if RAW_FILE.exists() and not force:
-        return RAW_FILE
+    path = dataset_file()
+    if path.exists() and not force:
+        return path
+
+    if offline_mode():
+        from .synthetic import write_synthetic_dataset
+
+        rows = int(os.environ.get("CREDITLENS_SYNTHETIC_ROWS", "30000"))
+        return write_synthetic_dataset(SYNTHETIC_FILE, rows=rows)
+
+    from ucimlrepo import fetch_ucirepo
 
     dataset = fetch_ucirepo(id=350)
     features = dataset.data.features
@@ -27,10 +71,125 @@ def download_data(force: bool = False) -> Path:
     return RAW_FILE
 
 
+def _fits(values: np.ndarray, dtype: str) -> bool:
+    if np.issubdtype(np.dtype(dtype), np.integer):
+        info = np.iinfo(dtype)
+        finite = values[np.isfinite(values)] if values.dtype.kind == "f" else values
+        return (
+            len(finite) == len(values)
+            and bool(np.all(finite == np.round(finite)))
+            and (len(values) == 0 or (finite.min() >= info.min and finite.max() <= info.max))
+        )
+    narrowed = values.astype(dtype)
+    return bool(np.array_equal(narrowed.astype(values.dtype), values, equal_nan=True))
+
+
+def _source_signature(csv_path: Path) -> dict[str, Any]:
+    stat = csv_path.stat()
+    return {"source": csv_path.name, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "format": CACHE_FORMAT}
+
+
+def _count_rows(csv_path: Path) -> int:
+    with csv_path.open("rb") as handle:
+        lines = sum(block.count(b"\n") for block in iter(lambda: handle.read(1 << 20), b""))
+    return max(lines - 1, 0)
+
+
+def cache_dir_for(csv_path: Path) -> Path:
+    return csv_path.with_name(f"{csv_path.stem}.columns")
+
+
+def build_columnar_cache(csv_path: Path, cache_dir: Optional[Path] = None, chunk_size: int = 500_000) -> Path:
+    """Convert ``csv_path`` into one ``.npy`` file per column.
+
+    The CSV is streamed in chunks straight into preallocated memory-mapped
+    arrays, so peak memory is one chunk whatever the file size. A manifest
+    records the source size and mtime; it is written last and marks the
+    cache complete.
+    """
+    cache_dir = cache_dir or cache_dir_for(csv_path)
+    staging = cache_dir.with_name(cache_dir.name + ".tmp")
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir(parents=True)
+
+    rows = _count_rows(csv_path)
+    columns = list(pd.read_csv(csv_path, nrows=0).columns)
+    dtypes = {column: COLUMN_DTYPES.get(column, "float64") for column in columns}
+    arrays = {column: open_memmap(staging / f"{column}.npy", mode="w+", dtype=dtypes[column], shape=(rows,)) for column in columns}
+
+    start = 0
+    for chunk in pd.read_csv(csv_path, chunksize=chunk_size):
+        stop = start + len(chunk)
+        for column in columns:
+            values = chunk[column].to_numpy()
+            while not _fits(values, dtypes[column]):
+                dtypes[column] = WIDER_DTYPES[dtypes[column]] if dtypes[column] in WIDER_DTYPES else "float64"
+                widened = open_memmap(staging / f"{column}.npy.wide", mode="w+", dtype=dtypes[column], shape=(rows,))
+                widened[:start] = arrays[column][:start]
+                del arrays[column]
+                os.replace(staging / f"{column}.npy.wide", staging / f"{column}.npy")
+                arrays[column] = widened
+            arrays[column][start:stop] = values
+        start = stop
+
+    for array in arrays.values():
+        array.flush()
+    arrays.clear()
+    manifest = {**_source_signature(csv_path), "rows": start, "columns": columns, "dtypes": dtypes}
+    (staging / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(staging, cache_dir)
+    return cache_dir
+
+
+def read_manifest(cache_dir: Path) -> Optional[dict[str, Any]]:
+    path = cache_dir / MANIFEST_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+
+def ensure_columnar_cache(csv_path: Optional[Path] = None) -> Path:
+    csv_path = csv_path or download_data()
+    cache_dir = cache_dir_for(csv_path)
+    manifest = read_manifest(cache_dir)
+    signature = _source_signature(csv_path)
+    if manifest is None or any(manifest.get(key) != value for key, value in signature.items()):
+        build_columnar_cache(csv_path, cache_dir)
+    return cache_dir
+
+
+def load_dataset(columns: Optional[list[str]] = None, csv_path: Optional[Path] = None) -> pd.DataFrame:
+    """Load the dataset from its columnar cache, building the cache if stale.
+
+    Columns are memory-mapped read-only and wrapped without copying, so
+    repeated loads cost a few page-cache lookups rather than a CSV parse.
+    Callers that need to modify values must ``copy()`` first.
+    """
+    cache_dir = ensure_columnar_cache(csv_path)
+    manifest = read_manifest(cache_dir)
+    columns = columns or manifest["columns"]
+    missing = [column for column in columns if column not in manifest["columns"]]
+    if missing:
+        raise ValueError(f"Missing columns from dataset: {missing}")
+
+    key = json.dumps([str(cache_dir), manifest["mtime_ns"], manifest["size"]])
+    if _loaded.get("key") != key:
+        _loaded.clear()
+        _loaded["key"] = key
+    arrays = _loaded.setdefault("arrays", {})
+    for column in columns:
+        if column not in arrays:
+            arrays[column] = np.load(cache_dir / f"{column}.npy", mmap_mode="r")
+    return pd.DataFrame({column: arrays[column] for column in columns}, copy=False)
+
+
 def main() -> None:
     force = "--force" in sys.argv
     path = download_data(force=force)
     print(f"Saved dataset to {path}")
+    cache_dir = ensure_columnar_cache(path)
+    print(f"Columnar cache at {cache_dir}")
 
 
 if __name__ == "__main__":
@@ -1,37 +1,281 @@
 from __future__ import annotations
 
+import threading
+import time
 from pathlib import Path
 from typing import Any
 
+import numpy as np
 import pandas as pd
 
 from .features import FEATURE_COLUMNS
+from .paths import ARTIFACTS_DIR
 
-ARTIFACTS_DIR = Path(__file__).resolve().parents[1] / "artifacts"
 BACKGROUND_PATH = ARTIFACTS_DIR / "background.csv"
+WEIGHT_COLUMN = "weight"
+BACKGROUND_METHODS = ("kmeans", "sample")
 
 
-def load_background() -> pd.DataFrame:
-    if not BACKGROUND_PATH.exists():
-        raise FileNotFoundError("Background data missing; run training first.")
-    return pd.read_csv(BACKGROUND_PATH)
+class PermutationExplainer:
+    """Model-agnostic fallback: permutation SHAP on the calibrated log-odds.
 
+    shap's maskers average over background rows without weights, so the
+    weighted background is expanded into ``len(background)`` rows in
+    proportion to the weights first. shap's tabular maskers reuse internal
+    buffers between calls, so calls are serialized with a lock instead of
+    rebuilding the explainer per request.
+    """
 
-def explain_instance(model: Any, payload: dict[str, Any], max_evals: int = 256) -> list[dict[str, float]]:
-    import shap
+    engine = "permutation"
 
-    background = load_background()
-    frame = pd.DataFrame([payload], columns=FEATURE_COLUMNS)
+    def __init__(self, model: Any, background: pd.DataFrame, background_key: Any = None) -> None:
+        import shap
+
+        data = expand_background(background, len(background))[FEATURE_COLUMNS]
+        masker = shap.maskers.Independent(data, max_samples=len(data))
+        self.background_key = background_key
+        self._lock = threading.Lock()
+        self._explainer = shap.Explainer(
+            lambda values: _log_odds(model.predict_proba(pd.DataFrame(values, columns=FEATURE_COLUMNS))[:, 1]),
+            masker,
+            feature_names=FEATURE_COLUMNS,
+            algorithm="permutation",
+        )
+
+    def shap_values(self, frame: pd.DataFrame, max_evals: int = 256) -> np.ndarray:
+        with self._lock:
+            return self._explainer(frame[FEATURE_COLUMNS], max_evals=max_evals, silent=True).values
+
+
+class LinearExplainer:
+    """Exact contributions for a sigmoid-calibrated logistic regression pipeline.
+
+    The calibrated log-odds are ``-(a * (z @ coef + intercept) + b)``, so each
+    transformed column contributes ``-a * coef * (z - E[z])`` and one-hot columns
+    are summed back into their source feature.
+    """
+
+    engine = "linear"
+
+    def __init__(self, model: Any, background: pd.DataFrame, background_key: Any = None) -> None:
+        pipeline, calibrator = unwrap_calibrated(model)
+        self._preprocessor = pipeline.named_steps["preprocess"]
+        self._fold = feature_fold_matrix(self._preprocessor)
+        classifier = pipeline.named_steps["clf"]
+        self._coef = -calibrator.a_ * classifier.coef_[0]
+        self._expected = np.average(
+            _transform(self._preprocessor, background[FEATURE_COLUMNS]),
+            axis=0,
+            weights=background[WEIGHT_COLUMN].to_numpy(),
+        )
+        self.background_key = background_key
+
+    def shap_values(self, frame: pd.DataFrame, max_evals: int = 256) -> np.ndarray:
+        transformed = _transform(self._preprocessor, frame[FEATURE_COLUMNS])
+        return ((transformed - self._expected) * self._coef) @ self._fold
+
+
+class TreeExplainer:
+    """Exact TreeSHAP for a sigmoid-calibrated tree ensemble pipeline.
+
+    Sigmoid calibration is affine in the forest's probability before the final
+    ``expit``, so TreeSHAP values scaled by ``-a`` are exact contributions to
+    the calibrated log-odds. Path-dependent TreeSHAP needs no background rows.
+    """
+
+    engine = "tree"
+
+    def __init__(self, model: Any, background: pd.DataFrame, background_key: Any = None) -> None:
+        import shap
+
+        pipeline, calibrator = unwrap_calibrated(model)
+        self._preprocessor = pipeline.named_steps["preprocess"]
+        self._fold = feature_fold_matrix(self._preprocessor)
+        self._scale = -calibrator.a_
+        self._explainer = shap.TreeExplainer(
+            pipeline.named_steps["clf"],
+            feature_perturbation="tree_path_dependent",
+        )
+        self.background_key = background_key
+
+    def shap_values(self, frame: pd.DataFrame, max_evals: int = 256) -> np.ndarray:
+        transformed = _transform(self._preprocessor, frame[FEATURE_COLUMNS])
+        values = np.asarray(self._explainer.shap_values(transformed, check_additivity=False))
+        if values.ndim == 3:
+            values = values[..., 1]
+        return (values * self._scale) @ self._fold
+
+
+EXPLAINER_ENGINES = {
+    "linear": LinearExplainer,
+    "tree": TreeExplainer,
+    "permutation": PermutationExplainer,
+}
+
+
+def expand_background(background: pd.DataFrame, rows: int) -> pd.DataFrame:
+    """Repeat background rows in proportion to their weights, ``rows`` in total.
+
+    Counts are rounded with largest remainders, so a uniformly weighted
+    background expanded to its own length comes back unchanged.
+    """
+    weights = background[WEIGHT_COLUMN].to_numpy(dtype=float)
+    shares = weights / weights.sum() * rows
+    counts = np.floor(shares).astype(int)
+    remainder = rows - counts.sum()
+    if remainder > 0:
+        counts[np.argsort(-(shares - counts), kind="stable")[:remainder]] += 1
+    return background.loc[background.index.repeat(counts)].reset_index(drop=True)
+
+
+def _log_odds(probability: np.ndarray) -> np.ndarray:
+    probability = np.clip(probability, 1e-12, 1 - 1e-12)
+    return np.log(probability / (1 - probability))
+
+
+def _transform(preprocessor: Any, frame: pd.DataFrame) -> np.ndarray:
+    transformed = preprocessor.transform(frame)
+    if hasattr(transformed, "toarray"):
+        transformed = transformed.toarray()
+    return np.asarray(transformed, dtype=float)
+
+
+def unwrap_calibrated(model: Any) -> tuple[Any, Any]:
+    """Return the fitted pipeline and sigmoid calibrator inside ``model``.
+
+    Raises ``ValueError`` when the model is not a single prefit sigmoid
+    calibration of a ``preprocess``/``clf`` pipeline.
+    """
+    calibrated = getattr(model, "calibrated_classifiers_", None)
+    if not calibrated or len(calibrated) != 1:
+        raise ValueError("Expected a CalibratedClassifierCV with one calibrated classifier")
+    pipeline = calibrated[0].estimator
+    calibrators = calibrated[0].calibrators
+    steps = getattr(pipeline, "named_steps", {})
+    if "preprocess" not in steps or "clf" not in steps:
+        raise ValueError("Expected a preprocess/clf pipeline")
+    if len(calibrators) != 1 or not hasattr(calibrators[0], "a_"):
+        raise ValueError("Expected sigmoid calibration")
+    return pipeline, calibrators[0]
+
+
+def feature_fold_matrix(preprocessor: Any) -> np.ndarray:
+    """Map each transformed column back to its source feature in ``FEATURE_COLUMNS``."""
+    sources: list[str] = []
+    for _, transformer, columns in preprocessor.transformers_:
+        if transformer == "drop" or len(columns) == 0:
+            continue
+        steps = getattr(transformer, "named_steps", {})
+        encoder = steps.get("onehot")
+        if encoder is None:
+            sources.extend(columns)
+            continue
+        for column, categories in zip(columns, encoder.categories_):
+            sources.extend([column] * len(categories))
+
+    width = len(preprocessor.get_feature_names_out())
+    if len(sources) != width:
+        raise ValueError("Could not map transformed columns to source features")
+
+    fold = np.zeros((width, len(FEATURE_COLUMNS)))
+    for position, source in enumerate(sources):
+        fold[position, FEATURE_COLUMNS.index(source)] = 1.0
+    return fold
+
+
+def select_engine(model: Any) -> str:
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
 
-    explainer = shap.Explainer(
-        lambda data: model.predict_proba(pd.DataFrame(data, columns=FEATURE_COLUMNS))[:, 1],
-        background,
-        feature_names=FEATURE_COLUMNS,
-        algorithm="permutation",
-    )
-    shap_values = explainer(frame, max_evals=max_evals)
-    values = shap_values.values[0]
+    try:
+        pipeline, _ = unwrap_calibrated(model)
+        feature_fold_matrix(pipeline.named_steps["preprocess"])
+    except (AttributeError, ValueError):
+        return "permutation"
 
+    classifier = pipeline.named_steps["clf"]
+    if isinstance(classifier, LogisticRegression) and classifier.coef_.shape[0] == 1:
+        return "linear"
+    if isinstance(classifier, RandomForestClassifier):
+        return "tree"
+    return "permutation"
+
+
+def build_explainer(
+    model: Any,
+    background: pd.DataFrame,
+    background_key: Any = None,
+    engine: str = "auto",
+) -> Any:
+    if engine == "auto":
+        engine = select_engine(model)
+    if engine not in EXPLAINER_ENGINES:
+        raise ValueError(f"Unknown explainer engine: {engine}")
+    if WEIGHT_COLUMN not in background.columns:
+        background = background.assign(**{WEIGHT_COLUMN: 1.0 / max(len(background), 1)})
+    return EXPLAINER_ENGINES[engine](model, background, background_key=background_key)
+
+
+def summarize_background(
+    data: pd.DataFrame,
+    size: int = 100,
+    method: str = "kmeans",
+    random_state: int = 42,
+) -> pd.DataFrame:
+    """Reduce training rows to ``size`` representative rows with weights.
+
+    ``kmeans`` clusters standardized features and keeps the real row closest to
+    each centroid (so categorical codes stay valid), weighted by cluster size.
+    ``sample`` draws a uniform random sample with equal weights.
+    """
+    if method not in BACKGROUND_METHODS:
+        raise ValueError(f"Unknown background method: {method}")
+
+    frame = data[FEATURE_COLUMNS].reset_index(drop=True)
+    size = max(1, min(size, len(frame)))
+
+    if method == "sample" or size == len(frame):
+        background = frame.sample(n=size, random_state=random_state).reset_index(drop=True)
+        background[WEIGHT_COLUMN] = 1.0 / size
+        return background
+
+    from sklearn.cluster import KMeans
+    from sklearn.metrics import pairwise_distances_argmin
+
+    values = frame.to_numpy(dtype=float)
+    scale = values.std(axis=0)
+    scale[scale == 0] = 1.0
+    scaled = (values - values.mean(axis=0)) / scale
+
+    kmeans = KMeans(n_clusters=size, n_init=1, random_state=random_state).fit(scaled)
+    medoids = pairwise_distances_argmin(kmeans.cluster_centers_, scaled)
+    counts = np.bincount(kmeans.labels_, minlength=size)
+
+    background = frame.iloc[medoids].reset_index(drop=True)
+    background[WEIGHT_COLUMN] = counts / counts.sum()
+    return background
+
+
+def save_background(background: pd.DataFrame) -> Path:
+    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+    background.to_csv(BACKGROUND_PATH, index=False)
+    return BACKGROUND_PATH
+
+
+def read_background(path: Path) -> pd.DataFrame:
+    background = pd.read_csv(path)
+    if WEIGHT_COLUMN not in background.columns:
+        background[WEIGHT_COLUMN] = 1.0 / max(len(background), 1)
+    return background
+
+
+def load_background() -> pd.DataFrame:
+    if not BACKGROUND_PATH.exists():
+        raise FileNotFoundError("Background data missing; run training first.")
+    return read_background(BACKGROUND_PATH)
+
+
+def format_contributions(frame: pd.DataFrame, values: np.ndarray) -> list[dict[str, float]]:
     contributions = []
     for feature, value, contribution in zip(FEATURE_COLUMNS, frame.iloc[0], values):
         contributions.append(
@@ -44,3 +288,104 @@ def explain_instance(model: Any, payload: dict[str, Any], max_evals: int = 256)
 
     contributions.sort(key=lambda item: abs(item["contribution"]), reverse=True)
     return contributions
+
+
+def explain_instance(
+    model: Any,
+    payload: dict[str, Any],
+    max_evals: int = 256,
+    explainer: Any = None,
+) -> list[dict[str, float]]:
+    frame = pd.DataFrame([payload], columns=FEATURE_COLUMNS)
+    explainer = explainer or build_explainer(model, load_background())
+    values = explainer.shap_values(frame, max_evals=max_evals)[0]
+    return format_contributions(frame, values)
+
+
+def explain_frame(
+    model: Any,
+    frame: pd.DataFrame,
+    max_evals: int = 256,
+    explainer: Any = None,
+) -> list[list[dict[str, float]]]:
+    """Explain every row of ``frame`` with one ``shap_values`` call.
+
+    The linear and tree engines transform the whole frame once and compute
+    all rows in a single matrix product or TreeSHAP pass; the permutation
+    fallback still evaluates each row against the shared background.
+    """
+    if frame.empty:
+        return []
+    frame = frame[FEATURE_COLUMNS]
+    explainer = explainer or build_explainer(model, load_background())
+    values = np.asarray(explainer.shap_values(frame, max_evals=max_evals))
+    features = frame.to_numpy(dtype=float).tolist()
+    order = np.argsort(-np.abs(values), axis=1, kind="stable").tolist()
+    contributions = values.tolist()
+    return [
+        [
+            {
+                "feature": FEATURE_COLUMNS[position],
+                "value": row_values[position],
+                "contribution": row_contributions[position],
+            }
+            for position in row_order
+        ]
+        for row_values, row_contributions, row_order in zip(features, contributions, order)
+    ]
+
+
+def benchmark_background_sizes(
+    model: Any,
+    data: pd.DataFrame,
+    eval_rows: pd.DataFrame,
+    sizes: list[int],
+    method: str = "kmeans",
+    reference_size: int = 500,
+    max_evals: int = 256,
+) -> dict[str, Any]:
+    """Measure explanation latency and fidelity for each background size.
+
+    Fidelity is the mean absolute difference from explanations computed with a
+    ``reference_size`` random background, relative to the reference's mean
+    absolute attribution, plus the overlap of the top five features.
+    """
+    engine = select_engine(model)
+    reference = build_explainer(model, summarize_background(data, reference_size, method="sample"), engine=engine)
+    reference_values = reference.shap_values(eval_rows, max_evals=max_evals)
+    reference_scale = float(np.abs(reference_values).mean()) or 1.0
+    reference_top = np.argsort(-np.abs(reference_values), axis=1)[:, :5]
+
+    results = []
+    for size in sizes:
+        explainer = build_explainer(model, summarize_background(data, size, method=method), engine=engine)
+        explainer.shap_values(eval_rows.iloc[[0]], max_evals=max_evals)
+        timings = []
+        values = []
+        for position in range(len(eval_rows)):
+            row = eval_rows.iloc[[position]]
+            start = time.perf_counter()
+            values.append(explainer.shap_values(row, max_evals=max_evals)[0])
+            timings.append((time.perf_counter() - start) * 1000)
+        values_array = np.vstack(values)
+        top = np.argsort(-np.abs(values_array), axis=1)[:, :5]
+        overlap = [len(set(a) & set(b)) / 5 for a, b in zip(top, reference_top)]
+
+        results.append(
+            {
+                "background_rows": size,
+                "latency_ms_p50": float(np.percentile(timings, 50)),
+                "latency_ms_p99": float(np.percentile(timings, 99)),
+                "relative_error": float(np.abs(values_array - reference_values).mean() / reference_scale),
+                "top5_overlap": float(np.mean(overlap)),
+            }
+        )
+
+    return {
+        "engine": engine,
+        "method": method,
+        "reference_rows": reference_size,
+        "eval_rows": int(len(eval_rows)),
+        "max_evals": max_evals,
+        "sizes": results,
+    }
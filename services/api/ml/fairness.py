@@ -1,20 +1,25 @@
 from __future__ import annotations
 
+import argparse
 import json
+import os
+import warnings
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 import joblib
+import numpy as np
 import pandas as pd
-from sklearn.metrics import confusion_matrix, roc_auc_score
 from sklearn.model_selection import train_test_split
 
-from .download_data import download_data
+from .artifacts import read_manifest, update_manifest, write_text_atomic
+from .download_data import load_dataset
 from .features import FEATURE_COLUMNS, TARGET_COLUMN
+from .paths import ARTIFACTS_DIR
 
-ARTIFACTS_DIR = Path(__file__).resolve().parents[1] / "artifacts"
 MODEL_PATH = ARTIFACTS_DIR / "model.joblib"
+FAIRNESS_REPORT_PATH = ARTIFACTS_DIR / "fairness_report.json"
 
 
 def load_artifacts() -> dict[str, Any]:
@@ -23,49 +28,220 @@ def load_artifacts() -> dict[str, Any]:
     return joblib.load(MODEL_PATH)
 
 
-def age_band(age: float) -> str:
-    if age < 30:
-        return "<30"
-    if age < 40:
-        return "30-39"
-    if age < 50:
-        return "40-49"
-    if age < 60:
-        return "50-59"
-    return "60+"
+# ``np.digitize`` edges for the age bands; labels are in band order.
+AGE_BAND_EDGES = [30, 40, 50, 60]
+AGE_BAND_LABELS = ["<30", "30-39", "40-49", "50-59", "60+"]
+SLICE_FEATURES = ["SEX", "EDUCATION", "AGE_BAND"]
+METRIC_NAMES = ("default_rate", "selection_rate", "tpr", "fpr", "auc")
+# Bootstrap resamples are drawn in fixed-size tasks, each seeded from its own
+# index, so intervals do not depend on how many processes ran them.
+BOOTSTRAP_TASK_SIZE = 100
+BOOTSTRAP_BATCH_SIZE = 25
 
 
-def safe_auc(y_true: pd.Series, y_prob: pd.Series) -> float | None:
-    if y_true.nunique() < 2:
-        return None
-    return float(roc_auc_score(y_true, y_prob))
+def slice_values(X: pd.DataFrame) -> dict[str, np.ndarray]:
+    bands = np.asarray(AGE_BAND_LABELS, dtype=object)[np.digitize(X["AGE"].to_numpy(), AGE_BAND_EDGES)]
+    return {"SEX": X["SEX"].to_numpy(), "EDUCATION": X["EDUCATION"].to_numpy(), "AGE_BAND": bands}
 
 
-def group_metrics(y_true: pd.Series, y_prob: pd.Series, threshold: float) -> dict[str, Any]:
-    y_pred = (y_prob >= threshold).astype(int)
-    tn, fp, fn, tp = confusion_matrix(y_true, y_pred, labels=[0, 1]).ravel()
-    tpr = tp / (tp + fn) if (tp + fn) else 0.0
-    fpr = fp / (fp + tn) if (fp + tn) else 0.0
-    selection_rate = y_pred.mean()
+class FairnessEngine:
+    """Per-group confusion counts, rates and AUC for every slice in one pass.
+
+    Every slice's groups, plus one ``overall`` group, share a single group
+    index. Rows are repeated once per slice and sorted once by (group, PD),
+    so each group and each run of tied PDs inside it is a contiguous segment.
+    Counts are then segment sums (``np.add.reduceat``). AUC is the
+    Mann-Whitney statistic: for each tied run, its positives times the
+    negatives ranked below it in the same group, plus half the ties.
+
+    ``compute`` takes per-row weights, either one vector or a matrix of
+    bootstrap resample counts, and evaluates all of them with the same sort.
+    """
+
+    def __init__(self, y_true: Any, y_prob: Any, threshold: float, slices: dict[str, Any]) -> None:
+        y_true = np.asarray(y_true, dtype=float)
+        y_prob = np.asarray(y_prob, dtype=float)
+        self.n_rows = len(y_true)
+
+        self.groups: list[tuple[str, list[str]]] = [("overall", ["all"])]
+        codes = [np.zeros(self.n_rows, dtype=np.int64)]
+        offset = 1
+        for feature, values in slices.items():
+            uniques, inverse = np.unique(np.asarray(values), return_inverse=True)
+            self.groups.append((feature, [str(value) for value in uniques]))
+            codes.append(inverse.astype(np.int64) + offset)
+            offset += len(uniques)
+        self.n_groups = offset
+
+        code = np.concatenate(codes)
+        prob = np.tile(y_prob, len(codes))
+        order = np.lexsort((prob, code))
+        code = code[order]
+        prob = prob[order]
+        self._rows = np.tile(np.arange(self.n_rows), len(codes))[order]
+        self._positive = np.tile(y_true, len(codes))[order]
+        self._selected = (prob >= threshold).astype(float)
+
+        new_group = np.r_[True, code[1:] != code[:-1]]
+        new_block = new_group | np.r_[True, prob[1:] != prob[:-1]]
+        self._group_starts = np.flatnonzero(new_group)
+        self._block_starts = np.flatnonzero(new_block)
+        self._block_group = code[self._block_starts]
+        self._group_first_block = np.flatnonzero(new_group[self._block_starts])
+
+    def compute(self, weights: np.ndarray | None = None) -> dict[str, np.ndarray]:
+        """Metrics per group, shaped ``(resamples, groups)`` (one row when unweighted)."""
+        if weights is None:
+            weights = np.ones((1, self.n_rows))
+        weights = np.atleast_2d(weights).astype(float)[:, self._rows]
+        positive = weights * self._positive
+        negative = weights - positive
+
+        def by_group(values: np.ndarray) -> np.ndarray:
+            return np.add.reduceat(values, self._group_starts, axis=1)
+
+        count = by_group(weights)
+        positives = by_group(positive)
+        negatives = count - positives
+        true_positives = by_group(positive * self._selected)
+        false_positives = by_group(negative * self._selected)
+
+        block_positive = np.add.reduceat(positive, self._block_starts, axis=1)
+        block_negative = np.add.reduceat(negative, self._block_starts, axis=1)
+        negatives_before = np.cumsum(block_negative, axis=1) - block_negative
+        below = negatives_before - negatives_before[:, self._group_first_block][:, self._block_group]
+        pairs = np.add.reduceat(block_positive * (below + 0.5 * block_negative), self._group_first_block, axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return {
+                "count": count,
+                "default_rate": positives / count,
+                "selection_rate": (true_positives + false_positives) / count,
+                "tpr": true_positives / positives,
+                "fpr": false_positives / negatives,
+                "auc": pairs / (positives * negatives),
+            }
+
+    def bootstrap(self, resamples: int, seed: int) -> np.ndarray:
+        """``(resamples, metrics, groups)`` metric draws from ``resamples`` row resamples."""
+        rng = np.random.default_rng(seed)
+        draws = []
+        for start in range(0, resamples, BOOTSTRAP_BATCH_SIZE):
+            size = min(BOOTSTRAP_BATCH_SIZE, resamples - start)
+            picks = rng.integers(0, self.n_rows, size=(size, self.n_rows))
+            picks += np.arange(size)[:, None] * self.n_rows
+            weights = np.bincount(picks.ravel(), minlength=size * self.n_rows).reshape(size, self.n_rows)
+            metrics = self.compute(weights)
+            draws.append(np.stack([metrics[name] for name in METRIC_NAMES], axis=1))
+        return np.concatenate(draws)
+
+
+def _bootstrap_task(engine: FairnessEngine, resamples: int, seed: np.random.SeedSequence) -> np.ndarray:
+    return engine.bootstrap(resamples, seed)
+
+
+def bootstrap_intervals(
+    engine: FairnessEngine,
+    resamples: int,
+    confidence: float = 0.95,
+    seed: int = 42,
+    n_jobs: int | None = None,
+) -> np.ndarray:
+    """Percentile intervals, shaped ``(2, metrics, groups)``, from resamples run across ``n_jobs`` processes."""
+    sizes = [min(BOOTSTRAP_TASK_SIZE, resamples - start) for start in range(0, resamples, BOOTSTRAP_TASK_SIZE)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    n_jobs = min(n_jobs or os.cpu_count() or 1, len(sizes))
+    if n_jobs > 1:
+        draws = joblib.Parallel(n_jobs=n_jobs)(
+            joblib.delayed(_bootstrap_task)(engine, size, task_seed) for size, task_seed in zip(sizes, seeds)
+        )
+    else:
+        draws = [engine.bootstrap(size, task_seed) for size, task_seed in zip(sizes, seeds)]
+
+    alpha = (1 - confidence) / 2
+    with warnings.catch_warnings():
+        # Groups with one class in every resample have no TPR/FPR/AUC draws.
+        warnings.simplefilter("ignore", RuntimeWarning)
+        return np.nanquantile(np.concatenate(draws), [alpha, 1 - alpha], axis=0)
+
+
+def _rounded(value: float) -> float | None:
+    return None if np.isnan(value) else round(float(value), 6)
+
+
+def _group_entry(
+    point: dict[str, np.ndarray],
+    intervals: np.ndarray | None,
+    index: int,
+) -> dict[str, Any]:
+    entry: dict[str, Any] = {
+        "count": int(point["count"][0, index]),
+        "default_rate": float(point["default_rate"][0, index]),
+        "selection_rate": float(point["selection_rate"][0, index]),
+        # A group with only one class has no TPR (or FPR); report 0 as before.
+        "tpr": float(np.nan_to_num(point["tpr"][0, index])),
+        "fpr": float(np.nan_to_num(point["fpr"][0, index])),
+        "auc": None if np.isnan(point["auc"][0, index]) else float(point["auc"][0, index]),
+    }
+    if intervals is not None:
+        entry["ci"] = {
+            name: [_rounded(intervals[0, position, index]), _rounded(intervals[1, position, index])]
+            for position, name in enumerate(METRIC_NAMES)
+        }
+    return entry
+
+
+def compute_fairness_report(
+    model: Any,
+    threshold: float,
+    X_test: pd.DataFrame,
+    y_test: pd.Series,
+    model_version: str | None = None,
+    resamples: int = 1000,
+    confidence: float = 0.95,
+    n_jobs: int | None = None,
+    seed: int = 42,
+) -> dict[str, Any]:
+    y_prob = model.predict_proba(X_test)[:, 1]
+    engine = FairnessEngine(y_test.to_numpy(), y_prob, threshold, slice_values(X_test))
+    point = engine.compute()
+    intervals = bootstrap_intervals(engine, resamples, confidence, seed, n_jobs) if resamples > 0 else None
+
+    slices = []
+    index = 1
+    for feature, labels in engine.groups[1:]:
+        group_entries = []
+        for label in labels:
+            group_entries.append({**_group_entry(point, intervals, index), "group": label})
+            index += 1
+        slices.append({"feature": feature, "groups": group_entries})
 
     return {
-        "count": int(len(y_true)),
-        "default_rate": float(y_true.mean()),
-        "selection_rate": float(selection_rate),
-        "tpr": float(tpr),
-        "fpr": float(fpr),
-        "auc": safe_auc(y_true, y_prob),
+        "generated_at": datetime.utcnow().isoformat() + "Z",
+        "model_version": model_version,
+        "threshold": threshold,
+        "notes": "Fairness diagnostics only. Results are descriptive and not a compliance guarantee.",
+        "bootstrap": (
+            {"resamples": resamples, "confidence": confidence, "seed": seed} if intervals is not None else None
+        ),
+        "overall": _group_entry(point, intervals, 0),
+        "slices": slices,
     }
 
 
-def build_fairness_report() -> dict[str, Any]:
-    artifacts = load_artifacts()
-    model = artifacts["model"]
-    threshold = float(artifacts["threshold"])
+def build_fairness_report(
+    model: Any = None,
+    threshold: float | None = None,
+    model_version: str | None = None,
+    resamples: int = 1000,
+    n_jobs: int | None = None,
+) -> dict[str, Any]:
+    if model is None:
+        artifacts = load_artifacts()
+        model = artifacts["model"]
+        threshold = float(artifacts["threshold"])
 
-    data_path = download_data()
-    df = pd.read_csv(data_path)
-    df["AGE_BAND"] = df["AGE"].apply(age_band)
+    df = load_dataset(FEATURE_COLUMNS + [TARGET_COLUMN])
 
     X = df[FEATURE_COLUMNS]
     y = df[TARGET_COLUMN].astype(int)
@@ -85,32 +261,41 @@ def build_fairness_report() -> dict[str, Any]:
         stratify=y_temp,
     )
 
-    y_prob = pd.Series(model.predict_proba(X_test)[:, 1], index=X_test.index)
-
-    slices = []
-    for feature in ["SEX", "EDUCATION", "AGE_BAND"]:
-        group_entries = []
-        for group_value, indices in X_test.join(df[feature]).groupby(feature).groups.items():
-            y_group = y_test.loc[indices]
-            y_prob_group = y_prob.loc[indices]
-            metrics = group_metrics(y_group, y_prob_group, threshold)
-            metrics["group"] = str(group_value)
-            group_entries.append(metrics)
-        slices.append({"feature": feature, "groups": group_entries})
+    return compute_fairness_report(
+        model,
+        float(threshold),
+        X_test,
+        y_test,
+        model_version=model_version,
+        resamples=resamples,
+        n_jobs=n_jobs,
+    )
 
-    overall = group_metrics(y_test, y_prob, threshold)
 
-    return {
-        "generated_at": datetime.utcnow().isoformat() + "Z",
-        "threshold": threshold,
-        "notes": "Fairness diagnostics only. Results are descriptive and not a compliance guarantee.",
-        "overall": overall,
-        "slices": slices,
-    }
+def save_fairness_report(report: dict[str, Any], path: Path = FAIRNESS_REPORT_PATH) -> Path:
+    return write_text_atomic(path, json.dumps(report, indent=2))
 
 
 def main() -> None:
-    report = build_fairness_report()
+    parser = argparse.ArgumentParser(description="Build the fairness report for the saved model.")
+    parser.add_argument("--save", action="store_true", help="Write the report next to the model")
+    parser.add_argument("--resamples", type=int, default=1000, help="Bootstrap resamples (0 disables intervals).")
+    parser.add_argument("--n-jobs", type=int, default=2, help="Processes for the bootstrap (0 uses all cores).")
+    args = parser.parse_args()
+
+    report = build_fairness_report(resamples=args.resamples, n_jobs=args.n_jobs or None)
+    if args.save:
+        published = read_manifest(ARTIFACTS_DIR)
+        metadata_path = ARTIFACTS_DIR / "metadata.json"
+        if published is not None:
+            report["model_version"] = published["model_version"]
+        elif metadata_path.exists():
+            report["model_version"] = json.loads(metadata_path.read_text()).get("model_version")
+        save_fairness_report(report)
+        if published is not None and update_manifest(
+            ARTIFACTS_DIR, [FAIRNESS_REPORT_PATH.name], model_version=report["model_version"]
+        ) is None:
+            raise SystemExit("A newer model was published while the report was built; run again")
     print(json.dumps(report, indent=2))
 
 
@@ -2,15 +2,14 @@ from __future__ import annotations
 
 import json
 from datetime import datetime
-from pathlib import Path
 from typing import Any
 
 import numpy as np
 import pandas as pd
 
 from .features import FEATURE_COLUMNS
+from .paths import ARTIFACTS_DIR
 
-ARTIFACTS_DIR = Path(__file__).resolve().parents[1] / "artifacts"
 BASELINE_PATH = ARTIFACTS_DIR / "monitoring_baseline.json"
 
 
@@ -58,23 +57,136 @@ def load_baseline() -> dict[str, Any]:
     return json.loads(BASELINE_PATH.read_text())
 
 
-def summarize_drift(current_df: pd.DataFrame, baseline: dict[str, Any]) -> dict[str, Any]:
+def assign_bins(values: np.ndarray, edges: list[float]) -> np.ndarray:
+    """Bin index per value using right-closed baseline intervals; -1 when outside.
+
+    Matches ``pd.cut`` with an ``IntervalIndex``: the lowest edge itself falls
+    outside the first interval.
+    """
+    edges_array = np.asarray(edges, dtype=float)
+    indices = np.searchsorted(edges_array, values, side="left") - 1
+    outside = (indices < 0) | (indices >= len(edges_array) - 1) | np.isnan(values)
+    return np.where(outside, -1, indices)
+
+
+def feature_aggregates(current_df: pd.DataFrame, baseline: dict[str, Any]) -> dict[str, dict[str, Any]]:
+    """Per-feature counts, sums and sums of squares, plus per-bin breakdowns.
+
+    ``bins`` maps each bin index (``-1`` for values outside the baseline range)
+    to ``[count, total, total_sq]`` so results can be merged by addition.
+    """
+    aggregates: dict[str, dict[str, Any]] = {}
+    for feature in FEATURE_COLUMNS:
+        edges = baseline["features"][feature]["bins"]
+        values = current_df[feature].to_numpy(dtype=float)
+        indices = assign_bins(values, edges) + 1
+        length = len(edges)
+        counts = np.bincount(indices, minlength=length)
+        totals = np.bincount(indices, weights=values, minlength=length)
+        squares = np.bincount(indices, weights=values * values, minlength=length)
+        aggregates[feature] = {
+            bin_index - 1: [int(counts[bin_index]), float(totals[bin_index]), float(squares[bin_index])]
+            for bin_index in range(length)
+        }
+    return aggregates
+
+
+def grouped_feature_aggregates(
+    current_df: pd.DataFrame,
+    groups: np.ndarray,
+    baseline: dict[str, Any],
+) -> dict[Any, dict[str, dict[int, list[float]]]]:
+    """``feature_aggregates`` for each distinct value of ``groups`` in one pass per feature.
+
+    Only bins with at least one value are returned.
+    """
+    keys, inverse = np.unique(groups, return_inverse=True)
+    aggregates: dict[Any, dict[str, dict[int, list[float]]]] = {key: {} for key in keys.tolist()}
+    for feature in FEATURE_COLUMNS:
+        edges = baseline["features"][feature]["bins"]
+        values = current_df[feature].to_numpy(dtype=float)
+        length = len(edges)
+        indices = inverse * length + assign_bins(values, edges) + 1
+        size = len(keys) * length
+        counts = np.bincount(indices, minlength=size).reshape(len(keys), length)
+        totals = np.bincount(indices, weights=values, minlength=size).reshape(len(keys), length)
+        squares = np.bincount(indices, weights=values * values, minlength=size).reshape(len(keys), length)
+        for group, bin_index in zip(*np.nonzero(counts)):
+            aggregates[keys[group].item()].setdefault(feature, {})[int(bin_index) - 1] = [
+                int(counts[group, bin_index]),
+                float(totals[group, bin_index]),
+                float(squares[group, bin_index]),
+            ]
+    return aggregates
+
+
+def drift_series(
+    counts: np.ndarray,
+    totals: np.ndarray,
+    totals_sq: np.ndarray,
+    baseline: dict[str, Any],
+) -> dict[str, np.ndarray]:
+    """PSI and mean shift for every time step at once.
+
+    ``counts`` has shape ``(steps, features, max_bins + 1)`` with column 0
+    holding values outside the baseline range; ``totals`` and ``totals_sq``
+    have shape ``(steps, features)``. Features follow ``FEATURE_COLUMNS``.
+    Steps without data come back as NaN.
+    """
+    epsilon = 1e-6
+    width = counts.shape[2] - 1
+    baseline_pct = np.zeros((len(FEATURE_COLUMNS), width))
+    means = np.zeros(len(FEATURE_COLUMNS))
+    stds = np.ones(len(FEATURE_COLUMNS))
+    for position, feature in enumerate(FEATURE_COLUMNS):
+        base = baseline["features"][feature]
+        baseline_pct[position, : len(base["baseline_pct"])] = base["baseline_pct"]
+        means[position] = base["mean"]
+        stds[position] = float(base.get("std", 1.0)) or 1.0
+
+    n = counts.sum(axis=2)
+    in_range = counts[:, :, 1:]
+    current_pct = in_range / np.maximum(in_range.sum(axis=2, keepdims=True), 1)
+    current_pct = np.clip(current_pct, epsilon, 1)
+    expected = np.clip(baseline_pct, epsilon, 1)[np.newaxis]
+    psi = np.sum((current_pct - expected) * np.log(current_pct / expected), axis=2)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        current_mean = totals / n
+        current_std = np.sqrt(np.maximum(totals_sq / n - current_mean**2, 0.0))
+    empty = n == 0
+    return {
+        "count": n[:, 0],
+        "psi": np.where(empty, np.nan, psi),
+        "mean_shift": np.where(empty, np.nan, (current_mean - means) / stds),
+        "current_mean": np.where(empty, np.nan, current_mean),
+        "current_std": np.where(empty, np.nan, current_std),
+    }
+
+
+def summarize_aggregates(
+    aggregates: dict[str, dict[int, list[float]]],
+    baseline: dict[str, Any],
+    count: int,
+) -> dict[str, Any]:
     summary = []
 
     for feature in FEATURE_COLUMNS:
         base = baseline["features"][feature]
-        series = current_df[feature].astype(float)
-        current_mean = float(series.mean()) if len(series) else 0.0
+        bins = aggregates.get(feature, {})
+        n = sum(values[0] for values in bins.values())
+        total = sum(values[1] for values in bins.values())
+        total_sq = sum(values[2] for values in bins.values())
+        current_mean = float(total / n) if n else 0.0
+        current_std = float(np.sqrt(max(total_sq / n - current_mean**2, 0.0))) if n else 0.0
         std = float(base.get("std", 1.0)) or 1.0
         mean_shift = (current_mean - base["mean"]) / std
 
-        bins = pd.IntervalIndex.from_breaks(base["bins"], closed="right")
-        current_counts = (
-            pd.cut(series, bins=bins, include_lowest=True).value_counts(sort=False)
-            if len(series)
-            else pd.Series([0] * len(bins), index=bins)
+        current_counts = np.array(
+            [bins.get(bin_index, [0, 0.0, 0.0])[0] for bin_index in range(len(base["bins"]) - 1)],
+            dtype=float,
         )
-        current_pct = (current_counts / max(current_counts.sum(), 1)).fillna(0).to_numpy()
+        current_pct = current_counts / max(current_counts.sum(), 1)
         psi_value = _psi(current_pct, np.array(base["baseline_pct"]))
 
         if psi_value > 0.2:
@@ -89,6 +201,7 @@ def summarize_drift(current_df: pd.DataFrame, baseline: dict[str, Any]) -> dict[
                 "feature": feature,
                 "baseline_mean": base["mean"],
                 "current_mean": current_mean,
+                "current_std": current_std,
                 "mean_shift": float(mean_shift),
                 "psi": float(psi_value),
                 "drift_level": drift_level,
@@ -97,6 +210,10 @@ def summarize_drift(current_df: pd.DataFrame, baseline: dict[str, Any]) -> dict[
 
     return {
         "generated_at": datetime.utcnow().isoformat() + "Z",
-        "count": int(len(current_df)),
+        "count": int(count),
         "features": summary,
     }
+
+
+def summarize_drift(current_df: pd.DataFrame, baseline: dict[str, Any]) -> dict[str, Any]:
+    return summarize_aggregates(feature_aggregates(current_df, baseline), baseline, len(current_df))
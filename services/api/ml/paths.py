@@ -0,0 +1,11 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+API_ROOT = Path(__file__).resolve().parents[1]
+
+# Overridable so benchmarks and tests can run against throwaway directories.
+ARTIFACTS_DIR = Path(os.environ.get("CREDITLENS_ARTIFACTS_DIR") or API_ROOT / "artifacts")
+DATA_DIR = Path(os.environ.get("CREDITLENS_DATA_DIR") or API_ROOT / "data")
+CHALLENGERS_DIR = ARTIFACTS_DIR / "challengers"
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from .features import FEATURE_COLUMNS, TARGET_COLUMN
+
+DEFAULT_RATE = 0.221
+
+# Marginals follow the UCI "default of credit card clients" dataset.
+SEX_P = {1: 0.396, 2: 0.604}
+EDUCATION_P = {0: 0.0005, 1: 0.353, 2: 0.4677, 3: 0.1639, 4: 0.0041, 5: 0.0093, 6: 0.0017}
+MARRIAGE_P = {0: 0.0018, 1: 0.4553, 2: 0.5321, 3: 0.0108}
+PAY_STATUS_P = {
+    -2: 0.092,
+    -1: 0.1895,
+    0: 0.4912,
+    1: 0.1229,
+    2: 0.0889,
+    3: 0.0107,
+    4: 0.0025,
+    5: 0.0009,
+    6: 0.0004,
+    7: 0.0003,
+    8: 0.0007,
+}
+PAY_COLUMNS = ["PAY_6", "PAY_5", "PAY_4", "PAY_3", "PAY_2", "PAY_0"]
+STATUS_PERSISTENCE = 0.7
+
+
+def _choice(rng: np.random.Generator, probabilities: dict[int, float], size: int) -> np.ndarray:
+    values = np.fromiter(probabilities, dtype=np.int64)
+    weights = np.fromiter(probabilities.values(), dtype=float)
+    return rng.choice(values, size=size, p=weights / weights.sum())
+
+
+def _intercept_for_rate(logits: np.ndarray, rate: float) -> float:
+    low, high = -20.0, 20.0
+    for _ in range(50):
+        mid = (low + high) / 2
+        if (1.0 / (1.0 + np.exp(-(logits + mid)))).mean() < rate:
+            low = mid
+        else:
+            high = mid
+    return (low + high) / 2
+
+
+def generate_applicants(
+    rows: int,
+    seed: int = 0,
+    default_rate: float = DEFAULT_RATE,
+    rng: np.random.Generator | None = None,
+) -> pd.DataFrame:
+    """Draw ``rows`` synthetic applicants plus a default label.
+
+    Every value satisfies the ``ApplicantBase`` constraints. Repayment status
+    persists from month to month, bill amounts scale with the credit limit,
+    payments are a fraction of the previous bill and the default probability
+    rises with recent delinquency, so models, drift and fairness reports
+    behave much like they do on the real data.
+    """
+    rng = rng or np.random.default_rng(seed)
+    frame = pd.DataFrame(index=pd.RangeIndex(rows))
+
+    limit = np.exp(rng.normal(np.log(120_000), 0.75, rows))
+    frame["LIMIT_BAL"] = np.clip(np.round(limit, -4), 10_000, 1_000_000)
+    frame["SEX"] = _choice(rng, SEX_P, rows)
+    frame["EDUCATION"] = _choice(rng, EDUCATION_P, rows)
+    frame["MARRIAGE"] = _choice(rng, MARRIAGE_P, rows)
+    frame["AGE"] = np.clip(21 + np.round(rng.gamma(2.2, 6.4, rows)), 21, 79).astype(np.int64)
+
+    status = _choice(rng, PAY_STATUS_P, rows)
+    for column in PAY_COLUMNS:
+        keep = rng.random(rows) < STATUS_PERSISTENCE
+        status = np.where(keep, status, _choice(rng, PAY_STATUS_P, rows))
+        frame[column] = status
+
+    utilization = rng.beta(0.7, 1.4, rows)
+    bill = frame["LIMIT_BAL"].to_numpy() * utilization
+    bills: list[np.ndarray] = []
+    for _ in range(6):
+        bill = bill * rng.lognormal(0.0, 0.15, rows)
+        bills.append(bill)
+    for month, values in enumerate(reversed(bills), start=1):
+        idle = frame[PAY_COLUMNS[6 - month]].to_numpy() == -2
+        refund = rng.random(rows) < 0.02
+        values = np.where(idle, 0.0, values)
+        values = np.where(refund, -rng.gamma(1.0, 2_000, rows), values)
+        frame[f"BILL_AMT{month}"] = np.round(values)
+
+    for month in range(1, 7):
+        previous = frame[f"BILL_AMT{min(month + 1, 6)}"].clip(lower=0).to_numpy()
+        paid = previous * rng.beta(0.6, 4.0, rows) * (rng.random(rows) > 0.17)
+        frame[f"PAY_AMT{month}"] = np.round(paid)
+
+    logits = (
+        0.75 * frame["PAY_0"].to_numpy()
+        + 0.2 * frame["PAY_2"].to_numpy()
+        - 0.45 * np.log(frame["LIMIT_BAL"].to_numpy() / 100_000)
+        - 0.1 * (frame["PAY_AMT1"].to_numpy() > 0)
+    )
+    logits = logits + _intercept_for_rate(logits, default_rate)
+    frame[TARGET_COLUMN] = (rng.random(rows) < 1.0 / (1.0 + np.exp(-logits))).astype(np.int64)
+    return frame[FEATURE_COLUMNS + [TARGET_COLUMN]]
+
+
+def iter_synthetic_chunks(rows: int, seed: int = 0, chunk_size: int = 100_000) -> Iterator[pd.DataFrame]:
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk_size):
+        yield generate_applicants(min(chunk_size, rows - start), rng=rng)
+
+
+def write_synthetic_dataset(path: Path, rows: int = 30_000, seed: int = 0, chunk_size: int = 100_000) -> Path:
+    """Write a synthetic dataset to ``path`` in the raw CSV layout, chunk by chunk."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="") as handle:
+        for index, chunk in enumerate(iter_synthetic_chunks(rows, seed=seed, chunk_size=chunk_size)):
+            chunk.to_csv(handle, index=False, header=index == 0)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic credit applicant dataset.")
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--rows", type=int, default=30_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    path = write_synthetic_dataset(args.output, rows=args.rows, seed=args.seed)
+    print(f"Wrote {args.rows} synthetic applicants to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,22 @@
 from __future__ import annotations
 
+import argparse
+import hashlib
 import json
-from dataclasses import asdict, dataclass
+import logging
+import os
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterator, Optional
 
 import joblib
 import numpy as np
 import pandas as pd
+from scipy.stats import loguniform
+from sklearn.base import clone
 from sklearn.calibration import CalibratedClassifierCV, calibration_curve
 from sklearn.compose import ColumnTransformer
 from sklearn.impute import SimpleImputer
@@ -20,22 +28,29 @@ from sklearn.metrics import (
     precision_recall_curve,
     roc_auc_score,
 )
-from sklearn.model_selection import train_test_split
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV, train_test_split
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import OneHotEncoder
 from sklearn.ensemble import RandomForestClassifier
 
-from .download_data import download_data
+from .artifacts import dump_atomic, publish_manifest
+from .compiled import compile_model, save_compiled_model
+from .download_data import load_dataset
+from .explain import benchmark_background_sizes, save_background, summarize_background
+from .fairness import compute_fairness_report, save_fairness_report
 from .features import CATEGORICAL_COLUMNS, FEATURE_COLUMNS, NUMERIC_COLUMNS, TARGET_COLUMN
 from .monitoring import save_baseline
+from .paths import ARTIFACTS_DIR, CHALLENGERS_DIR
 
-ARTIFACTS_DIR = Path(__file__).resolve().parents[1] / "artifacts"
+logger = logging.getLogger(__name__)
 
 
 @dataclass
 class ModelCandidate:
     name: str
     estimator: Pipeline
+    search_space: dict[str, Any] = field(default_factory=dict)
 
 
 @dataclass
@@ -97,11 +112,135 @@ def build_candidates(preprocessor: ColumnTransformer) -> list[ModelCandidate]:
     )
 
     return [
-        ModelCandidate(name="logistic_regression", estimator=logistic),
-        ModelCandidate(name="random_forest", estimator=forest),
+        ModelCandidate(
+            name="logistic_regression",
+            estimator=logistic,
+            search_space={
+                "C": loguniform(1e-3, 1e2),
+                "class_weight": ["balanced", None],
+            },
+        ),
+        ModelCandidate(
+            name="random_forest",
+            estimator=forest,
+            search_space={
+                "n_estimators": [100, 250, 400],
+                "max_depth": [6, 8, 10, 12, 16],
+                "min_samples_leaf": [5, 10, 15, 25, 50],
+                "max_features": ["sqrt", 0.3, 0.5],
+            },
+        ),
     ]
 
 
+@contextmanager
+def timed_stage(timings: dict[str, float], name: str) -> Iterator[None]:
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = round(time.perf_counter() - started, 3)
+
+
+def _search_candidate(
+    candidate: ModelCandidate,
+    preprocessor: ColumnTransformer,
+    Xt_train: np.ndarray,
+    y_train: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    n_candidates: int,
+    n_jobs: int,
+) -> tuple[str, CalibratedClassifierCV, dict[str, float], dict[str, Any]]:
+    """Successive-halving search for one model family on pre-transformed data.
+
+    Runs in a worker process. The winning classifier is refit on the full
+    training matrix, wrapped behind the already-fitted preprocessor and
+    calibrated on the validation split, so the result has the same shape
+    as a sequentially trained candidate.
+    """
+    started = time.perf_counter()
+    classifier = clone(candidate.estimator.named_steps["clf"])
+    if "n_jobs" in classifier.get_params():
+        classifier.set_params(n_jobs=1)
+    search = HalvingRandomSearchCV(
+        classifier,
+        candidate.search_space,
+        n_candidates=n_candidates,
+        factor=3,
+        resource="n_samples",
+        min_resources="exhaust",
+        cv=3,
+        scoring="roc_auc",
+        n_jobs=n_jobs,
+        random_state=42,
+    )
+    search.fit(Xt_train, y_train)
+    search_seconds = time.perf_counter() - started
+
+    pipeline = Pipeline(steps=[("preprocess", preprocessor), ("clf", search.best_estimator_)])
+    calibrated = calibrate_model(pipeline, X_val, y_val)
+    y_val_prob = calibrated.predict_proba(X_val)[:, 1]
+    metrics = {
+        "roc_auc": float(roc_auc_score(y_val, y_val_prob)),
+        "pr_auc": float(average_precision_score(y_val, y_val_prob)),
+    }
+    summary = {
+        "best_params": {key: _json_value(value) for key, value in search.best_params_.items()},
+        "cv_roc_auc": float(search.best_score_),
+        "candidates": int(len(search.cv_results_["params"])),
+        "iterations": int(search.n_iterations_),
+        "search_seconds": round(search_seconds, 3),
+        "total_seconds": round(time.perf_counter() - started, 3),
+    }
+    return candidate.name, calibrated, metrics, summary
+
+
+def _json_value(value: Any) -> Any:
+    return value.item() if hasattr(value, "item") else value
+
+
+def search_candidates(
+    candidates: list[ModelCandidate],
+    X_train: pd.DataFrame,
+    y_train: pd.Series,
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    n_candidates: int = 16,
+    n_jobs: Optional[int] = None,
+    timings: Optional[dict[str, float]] = None,
+) -> tuple[dict[str, dict[str, float]], dict[str, CalibratedClassifierCV], dict[str, Any]]:
+    """Fit the preprocessor once, then search every model family in parallel.
+
+    Families run in separate processes and split ``n_jobs`` cores between
+    them for their cross-validation fits. The transformed training matrix
+    is shared with the workers through joblib's automatic memmapping.
+    """
+    timings = timings if timings is not None else {}
+    n_jobs = n_jobs or os.cpu_count() or 1
+    outer = max(1, min(len(candidates), n_jobs))
+    inner = max(1, n_jobs // outer)
+
+    with timed_stage(timings, "preprocess"):
+        preprocessor = clone(candidates[0].estimator.named_steps["preprocess"])
+        Xt_train = np.asarray(preprocessor.fit_transform(X_train), dtype=np.float64)
+
+    with timed_stage(timings, "search"):
+        results = joblib.Parallel(n_jobs=outer)(
+            joblib.delayed(_search_candidate)(
+                candidate, preprocessor, Xt_train, y_train, X_val, y_val, n_candidates, inner
+            )
+            for candidate in candidates
+        )
+
+    candidate_metrics = {name: metrics for name, _, metrics, _ in results}
+    calibrated_models = {name: model for name, model, _, _ in results}
+    summary = {name: details for name, _, _, details in results}
+    for name, details in summary.items():
+        timings[f"search_{name}"] = details["total_seconds"]
+    return candidate_metrics, calibrated_models, {"n_jobs": n_jobs, "families": summary}
+
+
 def calibrate_model(model: Pipeline, X_val: pd.DataFrame, y_val: pd.Series) -> CalibratedClassifierCV:
     calibrated = CalibratedClassifierCV(model, method="sigmoid", cv="prefit")
     calibrated.fit(X_val, y_val)
@@ -157,56 +296,108 @@ def evaluate_model(y_true: np.ndarray, y_prob: np.ndarray, threshold: float) ->
     }
 
 
-def train() -> dict[str, Any]:
-    data_path = download_data()
-    df = pd.read_csv(data_path)
-
-    missing = [col for col in FEATURE_COLUMNS + [TARGET_COLUMN] if col not in df.columns]
-    if missing:
-        raise ValueError(f"Missing columns from dataset: {missing}")
+def save_challengers(
+    models: dict[str, Any],
+    X_val: pd.DataFrame,
+    y_val: pd.Series,
+    model_version: str,
+    directory: Optional[Path] = None,
+) -> list[str]:
+    """Save the candidates that lost, each with its own F1 threshold, for shadow scoring.
+
+    Files are replaced atomically and published with their own manifest for
+    ``model_version``, so the shadow scorer never loads a half-written
+    challenger or a mix of two training runs.
+    """
+    directory = directory or CHALLENGERS_DIR
+    saved = set()
+    for name, model in models.items():
+        threshold = find_best_threshold(y_val.to_numpy(), model.predict_proba(X_val)[:, 1]).threshold
+        path = dump_atomic(
+            {"model": model, "name": name, "features": FEATURE_COLUMNS, "threshold": threshold},
+            directory / f"{name}.joblib",
+        )
+        saved.add(path.name)
+    for stale in directory.glob("*.joblib") if directory.exists() else []:
+        if stale.name not in saved:
+            stale.unlink()
+    directory.mkdir(parents=True, exist_ok=True)
+    publish_manifest(directory, model_version)
+    return sorted(models)
+
+
+def train(
+    background_size: int = 100,
+    background_method: str = "kmeans",
+    explain_benchmark_rows: int = 10,
+    search: bool = False,
+    search_candidates_per_family: int = 16,
+    n_jobs: Optional[int] = None,
+) -> dict[str, Any]:
+    timings: dict[str, float] = {}
+    started = time.perf_counter()
+
+    with timed_stage(timings, "load_data"):
+        df = load_dataset(FEATURE_COLUMNS + [TARGET_COLUMN])
 
     X = df[FEATURE_COLUMNS]
     y = df[TARGET_COLUMN].astype(int)
 
-    X_train, X_temp, y_train, y_temp = train_test_split(
-        X,
-        y,
-        test_size=0.3,
-        random_state=42,
-        stratify=y,
-    )
-    X_val, X_test, y_val, y_test = train_test_split(
-        X_temp,
-        y_temp,
-        test_size=0.5,
-        random_state=42,
-        stratify=y_temp,
-    )
+    with timed_stage(timings, "split"):
+        X_train, X_temp, y_train, y_temp = train_test_split(
+            X,
+            y,
+            test_size=0.3,
+            random_state=42,
+            stratify=y,
+        )
+        X_val, X_test, y_val, y_test = train_test_split(
+            X_temp,
+            y_temp,
+            test_size=0.5,
+            random_state=42,
+            stratify=y_temp,
+        )
 
     preprocessor = build_preprocessor()
     candidates = build_candidates(preprocessor)
 
     candidate_metrics: dict[str, dict[str, float]] = {}
     calibrated_models: dict[str, CalibratedClassifierCV] = {}
-
-    for candidate in candidates:
-        candidate.estimator.fit(X_train, y_train)
-        calibrated = calibrate_model(candidate.estimator, X_val, y_val)
-        y_val_prob = calibrated.predict_proba(X_val)[:, 1]
-        candidate_metrics[candidate.name] = {
-            "roc_auc": float(roc_auc_score(y_val, y_val_prob)),
-            "pr_auc": float(average_precision_score(y_val, y_val_prob)),
-        }
-        calibrated_models[candidate.name] = calibrated
+    search_summary: Optional[dict[str, Any]] = None
+
+    if search:
+        candidate_metrics, calibrated_models, search_summary = search_candidates(
+            candidates,
+            X_train,
+            y_train,
+            X_val,
+            y_val,
+            n_candidates=search_candidates_per_family,
+            n_jobs=n_jobs,
+            timings=timings,
+        )
+    else:
+        for candidate in candidates:
+            with timed_stage(timings, f"fit_{candidate.name}"):
+                candidate.estimator.fit(X_train, y_train)
+                calibrated = calibrate_model(candidate.estimator, X_val, y_val)
+            y_val_prob = calibrated.predict_proba(X_val)[:, 1]
+            candidate_metrics[candidate.name] = {
+                "roc_auc": float(roc_auc_score(y_val, y_val_prob)),
+                "pr_auc": float(average_precision_score(y_val, y_val_prob)),
+            }
+            calibrated_models[candidate.name] = calibrated
 
     best_name = max(candidate_metrics, key=lambda name: candidate_metrics[name]["roc_auc"])
     best_model = calibrated_models[best_name]
 
-    y_val_prob = best_model.predict_proba(X_val)[:, 1]
-    threshold_result = find_best_threshold(y_val.to_numpy(), y_val_prob)
+    with timed_stage(timings, "evaluate"):
+        y_val_prob = best_model.predict_proba(X_val)[:, 1]
+        threshold_result = find_best_threshold(y_val.to_numpy(), y_val_prob)
 
-    y_test_prob = best_model.predict_proba(X_test)[:, 1]
-    test_metrics = evaluate_model(y_test.to_numpy(), y_test_prob, threshold_result.threshold)
+        y_test_prob = best_model.predict_proba(X_test)[:, 1]
+        test_metrics = evaluate_model(y_test.to_numpy(), y_test_prob, threshold_result.threshold)
 
     artifacts = {
         "model": best_model,
@@ -217,22 +408,54 @@ def train() -> dict[str, Any]:
         "threshold_method": "f1_maximization",
     }
 
-    ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
-    joblib.dump(artifacts, ARTIFACTS_DIR / "model.joblib")
-    background = X_train.sample(n=min(200, len(X_train)), random_state=42)
-    background.to_csv(ARTIFACTS_DIR / "background.csv", index=False)
-    save_baseline(X_train)
+    with timed_stage(timings, "save_model"):
+        ARTIFACTS_DIR.mkdir(parents=True, exist_ok=True)
+        joblib.dump(artifacts, ARTIFACTS_DIR / "model.joblib")
+        model_version = hashlib.sha256((ARTIFACTS_DIR / "model.joblib").read_bytes()).hexdigest()[:12]
+        compiled_path = ARTIFACTS_DIR / "compiled_model.npz"
+        try:
+            save_compiled_model(compile_model(best_model), compiled_path)
+        except ValueError as exc:
+            # A compiled model left by an earlier run would be published alongside this one.
+            compiled_path.unlink(missing_ok=True)
+            logger.warning("Skipping compiled model export: %s", exc)
+        challengers = save_challengers(
+            {name: model for name, model in calibrated_models.items() if name != best_name},
+            X_val,
+            y_val,
+            model_version,
+        )
+    with timed_stage(timings, "background"):
+        background = summarize_background(X_train, size=background_size, method=background_method)
+        save_background(background)
+        save_baseline(X_train)
 
     metrics_payload = {
         "selected_model": best_name,
         "candidate_metrics": candidate_metrics,
+        "challengers": challengers,
         "threshold": asdict(threshold_result),
         "test_metrics": test_metrics,
         "calibration_curve": calibration_summary(y_test.to_numpy(), y_test_prob),
+        "background": {"rows": int(len(background)), "method": background_method},
     }
+    if search_summary is not None:
+        metrics_payload["search"] = search_summary
+
+    if explain_benchmark_rows > 0:
+        sizes = sorted({max(1, background_size // 4), max(1, background_size // 2), background_size})
+        with timed_stage(timings, "explanation_benchmark"):
+            metrics_payload["explanation_benchmark"] = benchmark_background_sizes(
+                best_model,
+                X_train,
+                X_val.sample(n=min(explain_benchmark_rows, len(X_val)), random_state=42),
+                sizes=sizes,
+                method=background_method,
+            )
 
     metadata_payload = {
         "trained_at": datetime.utcnow().isoformat() + "Z",
+        "model_version": model_version,
         "rows": int(df.shape[0]),
         "features": FEATURE_COLUMNS,
         "target": TARGET_COLUMN,
@@ -243,8 +466,23 @@ def train() -> dict[str, Any]:
         },
     }
 
+    with timed_stage(timings, "fairness"):
+        save_fairness_report(
+            compute_fairness_report(
+                best_model,
+                threshold_result.threshold,
+                X_test,
+                y_test,
+                model_version=model_version,
+                n_jobs=n_jobs,
+            )
+        )
+    timings["total"] = round(time.perf_counter() - started, 3)
+    metrics_payload["timings"] = timings
     (ARTIFACTS_DIR / "metrics.json").write_text(json.dumps(metrics_payload, indent=2))
     (ARTIFACTS_DIR / "metadata.json").write_text(json.dumps(metadata_payload, indent=2))
+    # Last: the registry only switches to this run once the manifest lists it.
+    publish_manifest(ARTIFACTS_DIR, model_version)
 
     return {
         "metrics": metrics_payload,
@@ -253,7 +491,32 @@ def train() -> dict[str, Any]:
 
 
 def main() -> None:
-    payload = train()
+    parser = argparse.ArgumentParser(description="Train CreditLens models and save artifacts.")
+    parser.add_argument("--background-size", type=int, default=100)
+    parser.add_argument("--background-method", choices=["kmeans", "sample"], default="kmeans")
+    parser.add_argument(
+        "--explain-benchmark-rows",
+        type=int,
+        default=10,
+        help="Validation rows used to report explanation latency and fidelity (0 disables).",
+    )
+    parser.add_argument(
+        "--search",
+        action="store_true",
+        help="Preprocess once and run a parallel successive-halving search per model family.",
+    )
+    parser.add_argument("--search-candidates", type=int, default=16, help="Configurations sampled per family.")
+    parser.add_argument("--n-jobs", type=int, help="Cores for the search (defaults to all).")
+    args = parser.parse_args()
+
+    payload = train(
+        background_size=args.background_size,
+        background_method=args.background_method,
+        explain_benchmark_rows=args.explain_benchmark_rows,
+        search=args.search,
+        search_candidates_per_family=args.search_candidates,
+        n_jobs=args.n_jobs,
+    )
     print(json.dumps(payload["metrics"], indent=2))
 
 
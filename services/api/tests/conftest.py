@@ -1,4 +1,63 @@
 import sys
+from contextlib import contextmanager
 from pathlib import Path
 
+import pytest
+
 sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """A ``TestClient`` over an in-memory database and a small trained model.
+
+    The lifespan does not run, so no workers or background threads start;
+    the app scores in-process against artifacts in ``tmp_path``.
+    ``api.session_scope()`` opens a session on the same database.
+    """
+    import json
+
+    import joblib
+    import numpy as np
+    import pandas as pd
+    from fastapi.testclient import TestClient
+    from sklearn.linear_model import LogisticRegression
+    from sqlalchemy.pool import StaticPool
+    from sqlmodel import Session, SQLModel, create_engine
+
+    from app import cache, database, export, main, registry
+    from app.registry import BASELINE_FILE, MODEL_FILE, ArtifactRegistry
+    from ml.features import FEATURE_COLUMNS
+    from ml.monitoring import build_baseline
+
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.integers(0, 10, size=(200, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    model = LogisticRegression(max_iter=500).fit(frame, (frame["PAY_0"] > 4).astype(int))
+    joblib.dump({"model": model, "features": FEATURE_COLUMNS, "threshold": 0.5}, tmp_path / MODEL_FILE)
+    (tmp_path / BASELINE_FILE).write_text(json.dumps(build_baseline(frame)))
+    monkeypatch.setattr(registry, "registry", ArtifactRegistry(tmp_path))
+    monkeypatch.setattr(main, "score_cache", cache.ScoreCache())
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+
+    @contextmanager
+    def session_scope():
+        with Session(engine) as session:
+            yield session
+
+    def get_session():
+        with Session(engine) as session:
+            yield session
+
+    async def get_read_session():
+        with Session(engine) as session:
+            yield database.ReadSession(session, is_async=False)
+
+    monkeypatch.setattr(export, "engine", engine)
+    monkeypatch.setattr(main, "session_scope", session_scope)
+    monkeypatch.setitem(main.app.dependency_overrides, database.get_session, get_session)
+    monkeypatch.setitem(main.app.dependency_overrides, database.get_read_session, get_read_session)
+    client = TestClient(main.app)
+    client.session_scope = session_scope
+    return client
@@ -0,0 +1,23 @@
+from bench.report import compare_results, summarize_timings
+
+
+def test_compare_flags_regressions_beyond_tolerance() -> None:
+    baseline = {
+        "benchmarks": {
+            "fast": summarize_timings("fast", [0.010] * 3, {}),
+            "slow": summarize_timings("slow", [0.010] * 3, {}),
+            "resized": summarize_timings("resized", [0.010] * 3, {"rows": 10}),
+        }
+    }
+    current = {
+        "benchmarks": {
+            "fast": summarize_timings("fast", [0.011] * 3, {}),
+            "slow": summarize_timings("slow", [0.020] * 3, {}),
+            "resized": summarize_timings("resized", [0.020] * 3, {"rows": 20}),
+            "added": summarize_timings("added", [0.001], {}),
+        }
+    }
+
+    statuses = {row["name"]: row["status"] for row in compare_results(current, baseline, tolerance=0.25)}
+
+    assert statuses == {"fast": "ok", "slow": "regression", "resized": "params changed", "added": "new"}
@@ -0,0 +1,91 @@
+import asyncio
+import time
+from pathlib import Path
+
+from app import main
+from app.cache import ScoreCache, SharedScoreCache, score_cache_key
+from ml.features import FEATURE_COLUMNS
+
+from test_schema_validation import base_payload
+
+
+def test_key_is_canonical_and_versioned() -> None:
+    payload = base_payload()
+    as_floats = {key: float(value) for key, value in payload.items()}
+
+    key = score_cache_key(payload, FEATURE_COLUMNS, "v1", explain=True)
+
+    assert key == score_cache_key(as_floats, FEATURE_COLUMNS, "v1", explain=True)
+    assert key != score_cache_key(payload, FEATURE_COLUMNS, "v2", explain=True)
+    assert key != score_cache_key(payload, FEATURE_COLUMNS, "v1", explain=False)
+
+
+def test_lru_evicts_expires_and_drops_on_version_change() -> None:
+    cache = ScoreCache(max_entries=2, ttl=60)
+    for key in ("a", "b"):
+        cache.set(key, "v1", {"pd": key})
+    cache.get("a", "v1")
+    cache.set("c", "v1", {"pd": "c"})
+
+    assert cache.get("b", "v1") is None
+    assert cache.get("a", "v1") == {"pd": "a"}
+
+    assert cache.get("a", "v2") is None
+    assert len(cache) == 0
+
+    short = ScoreCache(ttl=0.01)
+    short.set("a", "v1", {"pd": 1})
+    time.sleep(0.02)
+    assert short.get("a", "v1") is None
+
+
+def test_shared_layer_survives_a_new_process_cache(tmp_path: Path) -> None:
+    path = tmp_path / "cache.sqlite"
+    ScoreCache(shared=SharedScoreCache(path)).set("a", "v1", {"pd": 0.3})
+
+    restarted = ScoreCache(shared=SharedScoreCache(path))
+    assert restarted.get("a", "v1") == {"pd": 0.3}
+
+    # Lookups never prune the shared layer; the reload hook does.
+    assert restarted.get("b", "v2") is None
+    assert ScoreCache(shared=SharedScoreCache(path)).get("a", "v1") == {"pd": 0.3}
+    restarted.retain_version("v2")
+    assert ScoreCache(shared=SharedScoreCache(path)).get("a", "v1") is None
+
+
+def test_cache_only_moves_forward_to_the_registry_version() -> None:
+    current = {"version": "v1"}
+    cache = ScoreCache(current_version=lambda: current["version"])
+    cache.set("a", "v1", {"pd": 0.1})
+
+    # A request that loaded a newer snapshot before the registry flipped bypasses the cache.
+    cache.set("b", "v2", {"pd": 0.2})
+    assert cache.get("b", "v2") is None
+    assert cache.get("a", "v1") == {"pd": 0.1}
+
+    current["version"] = "v2"
+    cache.set("b", "v2", {"pd": 0.2})
+    assert (cache.version, len(cache)) == ("v2", 1)
+    # An in-flight request still on the old snapshot neither hits nor flushes.
+    assert cache.get("a", "v1") is None
+    cache.set("a", "v1", {"pd": 0.1})
+    assert cache.get("b", "v2") == {"pd": 0.2} and len(cache) == 1
+
+
+def test_shared_lookups_run_off_the_event_loop(api, tmp_path: Path, monkeypatch) -> None:
+    on_loop = []
+
+    class RecordingCache(ScoreCache):
+        def get(self, key, version):
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(True)
+            except RuntimeError:
+                on_loop.append(False)
+            return super().get(key, version)
+
+    monkeypatch.setattr(main, "score_cache", RecordingCache(shared=SharedScoreCache(tmp_path / "cache.db")))
+    for _ in range(2):
+        assert api.post("/score", json=base_payload()).status_code == 200
+
+    assert on_loop == [False, False]
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+
+from ml.compiled import compile_model, load_compiled_model, save_compiled_model
+from ml.features import FEATURE_COLUMNS
+from ml.train import build_preprocessor, calibrate_model
+
+
+def make_data(rows: int = 600) -> tuple[pd.DataFrame, pd.Series]:
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame(rng.normal(size=(rows, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    frame["SEX"] = rng.choice([1, 2], rows)
+    frame["EDUCATION"] = rng.choice([1, 2, 3, 4], rows)
+    frame["MARRIAGE"] = rng.choice([1, 2, 3], rows)
+    target = (frame["PAY_0"] + 0.5 * (frame["EDUCATION"] == 3) + rng.normal(size=rows) > 0.5).astype(int)
+    return frame, target
+
+
+@pytest.mark.parametrize(
+    "classifier",
+    [
+        LogisticRegression(max_iter=500),
+        RandomForestClassifier(n_estimators=20, max_depth=6, min_samples_leaf=5, random_state=0),
+    ],
+)
+def test_compiled_model_matches_predict_proba(classifier, tmp_path) -> None:
+    data, target = make_data()
+    pipeline = Pipeline([("preprocess", build_preprocessor()), ("clf", classifier)])
+    pipeline.fit(data.iloc[:400], target.iloc[:400])
+    model = calibrate_model(pipeline, data.iloc[400:], target.iloc[400:])
+
+    path = save_compiled_model(compile_model(model), tmp_path / "compiled_model.npz")
+    compiled = load_compiled_model(path)
+
+    rows = data.iloc[400:].copy()
+    rows.iloc[0, FEATURE_COLUMNS.index("EDUCATION")] = 6
+    rows.iloc[1, FEATURE_COLUMNS.index("AGE")] = np.nan
+    rows.iloc[2, FEATURE_COLUMNS.index("SEX")] = np.nan
+
+    expected = model.predict_proba(rows)[:, 1]
+    actual = compiled.predict_proba(rows.to_numpy(dtype=float))
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-9)
+    np.testing.assert_allclose(compiled.predict_proba(rows.to_numpy(dtype=float)[0]), expected[:1], atol=1e-9)
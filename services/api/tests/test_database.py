@@ -0,0 +1,61 @@
+import asyncio
+from pathlib import Path
+
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.database import ReadSession, add_missing_columns, async_url_for, build_async_engine, build_engine
+from app.models import Applicant
+
+from test_schema_validation import base_payload
+
+
+def test_sqlite_connections_get_wal_and_busy_timeout(tmp_path: Path) -> None:
+    engine = build_engine(f"sqlite:///{tmp_path / 'app.db'}")
+
+    with engine.connect() as connection:
+        assert connection.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert connection.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert connection.execute(text("PRAGMA synchronous")).scalar() == 1
+    assert engine.pool.size() == 10
+
+
+def test_async_url_swaps_in_async_driver() -> None:
+    assert async_url_for("sqlite:///./creditlens.db") == "sqlite+aiosqlite:///./creditlens.db"
+    assert async_url_for("postgresql://u:p@db/app") == "postgresql+asyncpg://u:p@db/app"
+
+
+def test_read_session_matches_on_sync_and_async_engines(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'app.db'}"
+    engine = build_engine(url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Applicant(**base_payload()))
+        session.commit()
+
+    async def read_all() -> tuple[list, list]:
+        with Session(engine) as sync_session:
+            sync_rows = await ReadSession(sync_session, is_async=False).all(select(Applicant))
+        async_engine = build_async_engine(async_url_for(url))
+        async with AsyncSession(async_engine) as async_session:
+            reader = ReadSession(async_session, is_async=True)
+            async_rows = await reader.all(select(Applicant))
+            assert (await reader.get(Applicant, async_rows[0].id)).AGE == base_payload()["AGE"]
+        await async_engine.dispose()
+        return sync_rows, async_rows
+
+    sync_rows, async_rows = asyncio.run(read_all())
+    assert [row.id for row in sync_rows] == [row.id for row in async_rows] == [1]
+
+
+def test_missing_nullable_columns_are_added_to_existing_tables(tmp_path: Path) -> None:
+    engine = build_engine(f"sqlite:///{tmp_path / 'app.db'}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE score DROP COLUMN model_version"))
+
+    assert add_missing_columns(engine) == ["score.model_version"]
+    assert add_missing_columns(engine) == []
+    with engine.connect() as connection:
+        assert connection.execute(text("SELECT count(model_version) FROM score")).scalar() == 0
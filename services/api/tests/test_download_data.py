@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ml import download_data as download_module
+from ml.download_data import build_columnar_cache, ensure_columnar_cache, load_dataset, read_manifest
+from ml.features import TARGET_COLUMN
+from ml.synthetic import write_synthetic_dataset
+
+
+def test_cache_round_trips_with_narrow_dtypes(tmp_path: Path) -> None:
+    csv_path = write_synthetic_dataset(tmp_path / "data.csv", rows=500, seed=3)
+    source = pd.read_csv(csv_path)
+
+    frame = load_dataset(csv_path=csv_path)
+
+    assert list(frame.columns) == list(source.columns)
+    assert frame["PAY_0"].dtype == "int8"
+    assert frame[TARGET_COLUMN].dtype == "int8"
+    assert frame["BILL_AMT1"].dtype == "float32"
+    for column in source.columns:
+        np.testing.assert_array_equal(frame[column].to_numpy(dtype=float), source[column].to_numpy(dtype=float))
+    # Columns wrap the read-only memory maps rather than copies.
+    assert not frame["AGE"].to_numpy().flags.writeable
+
+
+def test_out_of_range_chunk_widens_column(tmp_path: Path) -> None:
+    csv_path = write_synthetic_dataset(tmp_path / "data.csv", rows=40, seed=1)
+    source = pd.read_csv(csv_path)
+    source.loc[35, "AGE"] = 300
+    source.loc[36, "BILL_AMT1"] = 123_456_789.5
+    source.to_csv(csv_path, index=False)
+
+    cache_dir = build_columnar_cache(csv_path, tmp_path / "cache", chunk_size=10)
+    manifest = read_manifest(cache_dir)
+
+    assert manifest["dtypes"]["AGE"] == "int16"
+    assert manifest["dtypes"]["BILL_AMT1"] == "float64"
+    ages = np.load(cache_dir / "AGE.npy")
+    np.testing.assert_array_equal(ages, source["AGE"].to_numpy())
+
+
+def test_cache_rebuilds_when_source_changes(tmp_path: Path) -> None:
+    csv_path = write_synthetic_dataset(tmp_path / "data.csv", rows=30, seed=1)
+    assert len(load_dataset(csv_path=csv_path)) == 30
+
+    write_synthetic_dataset(csv_path, rows=45, seed=2)
+    stat = csv_path.stat()
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert read_manifest(ensure_columnar_cache(csv_path))["rows"] == 45
+    assert len(load_dataset(["AGE"], csv_path=csv_path)) == 45
+
+
+def test_offline_rows_never_land_in_the_downloaded_file(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setattr(download_module, "RAW_DIR", tmp_path)
+    monkeypatch.setattr(download_module, "RAW_FILE", tmp_path / "downloaded.csv")
+    monkeypatch.setattr(download_module, "SYNTHETIC_FILE", tmp_path / "synthetic.csv")
+    monkeypatch.setenv("CREDITLENS_OFFLINE", "1")
+    monkeypatch.setenv("CREDITLENS_SYNTHETIC_ROWS", "20")
+
+    assert download_module.download_data() == tmp_path / "synthetic.csv"
+    assert not (tmp_path / "downloaded.csv").exists()
+
+    monkeypatch.setenv("CREDITLENS_OFFLINE", "0")
+    assert download_module.dataset_file() == tmp_path / "downloaded.csv"
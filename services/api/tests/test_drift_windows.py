@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlmodel import Session
+
+from app import drift, main, registry
+from app.drift import (
+    InvalidWindow,
+    applicant_frame,
+    drift_summary,
+    drift_timeseries,
+    rebuild_aggregates,
+    record_applicants,
+)
+from app.models import Applicant
+from ml.features import FEATURE_COLUMNS
+from ml.monitoring import build_baseline, summarize_drift
+
+from test_ingest import memory_session
+from test_pagination import create_applicants
+
+
+def make_frame(rows: int, seed: int, scale: float = 1.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    values = rng.integers(0, 10, size=(rows, len(FEATURE_COLUMNS))) * scale
+    return pd.DataFrame(values, columns=FEATURE_COLUMNS, dtype=float)
+
+
+def add_applicants(session, frame: pd.DataFrame, created_at: datetime) -> None:
+    session.add_all(Applicant(**row, created_at=created_at) for row in frame.to_dict("records"))
+
+
+def test_windowed_series_merges_hourly_buckets() -> None:
+    baseline = build_baseline(make_frame(500, seed=0))
+    end = datetime(2024, 3, 10, 12, 30)
+    hours = [make_frame(60, seed=1), make_frame(30, seed=2, scale=3.0), make_frame(45, seed=3)]
+    with memory_session() as session:
+        rebuild_aggregates(session, baseline)
+        for offset, frame in enumerate(hours):
+            stamp = end - timedelta(hours=len(hours) - 1 - offset)
+            add_applicants(session, frame, stamp)
+            assert record_applicants(session, frame, baseline=baseline, created_at=stamp)
+            session.commit()
+
+        series = drift_timeseries(session, baseline, window="4h", step="1h", end=end)
+        incremental = drift_timeseries(session, baseline, window="2d", step="1d", end=end)
+        rebuild_aggregates(session, baseline)
+        rebuilt = drift_timeseries(session, baseline, window="2d", step="1d", end=end)
+
+        with pytest.raises(InvalidWindow):
+            drift_timeseries(session, baseline, window="3h", step="2h", end=end)
+        with pytest.raises(InvalidWindow):
+            drift_timeseries(session, baseline, window="1h", step="30m", end=end)
+
+    assert series["counts"] == [0, 60, 30, 45]
+    assert series["timestamps"][-1] == "2024-03-10T12:00:00Z"
+    limit_bal = FEATURE_COLUMNS.index("LIMIT_BAL")
+    for step, frame in zip((1, 2, 3), hours):
+        expected = summarize_drift(frame, baseline)["features"][limit_bal]
+        assert series["features"][limit_bal]["psi"][step] == pytest.approx(expected["psi"], abs=1e-6)
+        assert series["features"][limit_bal]["mean_shift"][step] == pytest.approx(expected["mean_shift"], abs=1e-6)
+    assert series["features"][limit_bal]["psi"][0] is None
+    assert series["summary"]["count"] == 135
+    assert incremental["counts"] == rebuilt["counts"] == [0, 135]
+    assert incremental["features"] == rebuilt["features"]
+
+
+def test_rebuild_applies_applicants_recorded_while_it_runs(monkeypatch) -> None:
+    baseline = build_baseline(make_frame(500, seed=0))
+    end = datetime(2024, 3, 10, 12, 30)
+    real_rebuild = drift._rebuild_tables
+
+    def create(engine, seed: int) -> None:
+        with Session(engine) as other:
+            applicants = [Applicant(**row, created_at=end) for row in make_frame(10, seed=seed).to_dict("records")]
+            other.add_all(applicants)
+            other.flush()
+            assert record_applicants(other, applicant_frame(applicants), baseline=baseline, created_at=end)
+            other.commit()
+
+    def racing_rebuild(session, baseline, chunk_size):
+        # One insert lands before the scan sees it, one after the tables are rewritten.
+        create(session.get_bind(), seed=5)
+        result = real_rebuild(session, baseline, chunk_size)
+        create(session.get_bind(), seed=6)
+        return result
+
+    with memory_session() as session:
+        add_applicants(session, make_frame(40, seed=1), end)
+        session.commit()
+        monkeypatch.setattr(drift, "_rebuild_tables", racing_rebuild)
+        assert rebuild_aggregates(session, baseline) == 50
+        assert not drift.rebuild_active()
+        series = drift_timeseries(session, baseline, window="1h", step="1h", end=end)
+        monkeypatch.setattr(drift, "_rebuild_tables", real_rebuild)
+        rebuild_aggregates(session, baseline)
+        rebuilt = drift_timeseries(session, baseline, window="1h", step="1h", end=end)
+
+        stale = build_baseline(make_frame(500, seed=9, scale=2.0))
+        with pytest.raises(drift.AggregatesStale):
+            drift_summary(session, stale)
+
+    assert series["counts"] == rebuilt["counts"] == [60]
+    assert series["features"] == rebuilt["features"]
+
+
+def test_monitoring_endpoint_needs_current_aggregates(api, monkeypatch) -> None:
+    response = api.get("/monitoring/summary", params={"window": "24h"})
+    assert response.status_code == 409
+    assert "POST /admin/drift/rebuild" in response.json()["detail"]
+
+    monkeypatch.setattr(main, "rebuild_active", lambda: True)
+    response = api.get("/monitoring/summary")
+    assert response.status_code == 503 and response.headers["retry-after"] == "30"
+
+    with api.session_scope() as session:
+        rebuild_aggregates(session, registry.current_snapshot().baseline)
+    create_applicants(api, 3)
+    response = api.get("/monitoring/summary", params={"window": "24h", "step": "1h"})
+    assert response.status_code == 200 and sum(response.json()["counts"]) == 3
+    assert api.get("/monitoring/summary").status_code == 200
+    assert api.get("/monitoring/summary", params={"window": "soon"}).status_code == 422
+
+
+def test_applicant_created_during_a_rebuild_is_counted(api, monkeypatch) -> None:
+    baseline = registry.current_snapshot().baseline
+    real_rebuild = drift._rebuild_tables
+    created = []
+
+    def racing_rebuild(session, baseline, chunk_size):
+        result = real_rebuild(session, baseline, chunk_size)
+        # Lands after the scan, so only its deferred frame can count it.
+        created.extend(create_applicants(api, 1))
+        return result
+
+    create_applicants(api, 2)
+    monkeypatch.setattr(drift, "_rebuild_tables", racing_rebuild)
+    with api.session_scope() as session:
+        assert rebuild_aggregates(session, baseline) == 2
+        assert created and drift_summary(session, baseline)["count"] == 3
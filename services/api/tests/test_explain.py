@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from ml.explain import WEIGHT_COLUMN, summarize_background
+from ml.features import FEATURE_COLUMNS
+
+
+def make_frame(rows: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.normal(size=(rows, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    frame["SEX"] = rng.choice([1, 2], rows)
+    return frame
+
+
+def test_kmeans_background_keeps_real_rows_with_weights() -> None:
+    data = make_frame()
+    background = summarize_background(data, size=20, method="kmeans")
+
+    assert len(background) == 20
+    assert np.isclose(background[WEIGHT_COLUMN].sum(), 1.0)
+    assert set(background["SEX"]) <= {1, 2}
+    merged = background[FEATURE_COLUMNS].merge(data, on=FEATURE_COLUMNS, how="left", indicator=True)
+    assert (merged["_merge"] == "both").all()
+
+
+def test_sample_background_is_uniformly_weighted() -> None:
+    background = summarize_background(make_frame(), size=10, method="sample")
+
+    assert len(background) == 10
+    assert np.allclose(background[WEIGHT_COLUMN], 0.1)
+
+
+def test_exact_engines_fold_one_hot_columns_and_are_additive() -> None:
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    from ml.explain import _log_odds, build_explainer, select_engine
+    from ml.train import build_preprocessor, calibrate_model
+
+    data = make_frame(400)
+    data["EDUCATION"] = np.random.default_rng(1).choice([1, 2, 3], len(data))
+    data["MARRIAGE"] = np.random.default_rng(2).choice([1, 2], len(data))
+    target = (data["PAY_0"] + (data["SEX"] == 2) > 0.5).astype(int)
+    background = summarize_background(data, size=25)
+    rows = data.iloc[:5]
+
+    for classifier, engine in [
+        (LogisticRegression(max_iter=500), "linear"),
+        (RandomForestClassifier(n_estimators=10, max_depth=4, random_state=0), "tree"),
+    ]:
+        pipeline = Pipeline([("preprocess", build_preprocessor()), ("clf", classifier)])
+        pipeline.fit(data.iloc[:300], target.iloc[:300])
+        model = calibrate_model(pipeline, data.iloc[300:], target.iloc[300:])
+
+        assert select_engine(model) == engine
+        values = build_explainer(model, background).shap_values(rows)
+        assert values.shape == (len(rows), len(FEATURE_COLUMNS))
+
+        implied_base = _log_odds(model.predict_proba(rows)[:, 1]) - values.sum(axis=1)
+        assert np.ptp(implied_base) < 1e-6
+
+
+def test_explain_frame_matches_single_row_explanations() -> None:
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    from ml.explain import build_explainer, explain_frame, explain_instance
+    from ml.train import build_preprocessor, calibrate_model
+
+    data = make_frame(300)
+    target = (data["PAY_0"] > 0).astype(int)
+    pipeline = Pipeline([("preprocess", build_preprocessor()), ("clf", LogisticRegression(max_iter=500))])
+    pipeline.fit(data.iloc[:200], target.iloc[:200])
+    model = calibrate_model(pipeline, data.iloc[200:], target.iloc[200:])
+    explainer = build_explainer(model, summarize_background(data, size=20))
+
+    rows = data.iloc[:6].reset_index(drop=True)
+    batch = explain_frame(model, rows, explainer=explainer)
+
+    assert len(batch) == len(rows)
+    for position, explained in enumerate(batch):
+        single = explain_instance(model, rows.iloc[position].to_dict(), explainer=explainer)
+        single = {item["feature"]: item for item in single}
+        magnitudes = [abs(item["contribution"]) for item in explained]
+        assert magnitudes == sorted(magnitudes, reverse=True)
+        for item in explained:
+            assert np.isclose(item["contribution"], single[item["feature"]]["contribution"])
+            assert item["value"] == single[item["feature"]]["value"]
+    assert explain_frame(model, rows.iloc[:0], explainer=explainer) == []
+
+
+def test_permutation_explainer_uses_background_weights() -> None:
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+
+    from ml.explain import build_explainer, expand_background
+    from ml.train import build_preprocessor, calibrate_model
+
+    data = make_frame(300)
+    target = (data["PAY_0"] > 0).astype(int)
+    pipeline = Pipeline([("preprocess", build_preprocessor()), ("clf", LogisticRegression(max_iter=500))])
+    pipeline.fit(data.iloc[:200], target.iloc[:200])
+    model = calibrate_model(pipeline, data.iloc[200:], target.iloc[200:])
+    background = data.iloc[:4].assign(**{WEIGHT_COLUMN: [0.5, 0.25, 0.25, 0.0]})
+
+    expanded = expand_background(background, 4)
+    assert expanded[FEATURE_COLUMNS].equals(data.iloc[[0, 0, 1, 2]][FEATURE_COLUMNS].reset_index(drop=True))
+
+    # Log-odds are additive per feature, so permutation SHAP matches the exact weighted linear values.
+    rows = data.iloc[10:13]
+    exact = build_explainer(model, background, engine="linear").shap_values(rows)
+    permutation = build_explainer(model, background, engine="permutation").shap_values(rows)
+    assert np.allclose(permutation, exact, atol=1e-6)
@@ -0,0 +1,135 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from sqlmodel import select
+
+from app import explanations, main
+from app.explanations import resume_run, run_explanations, start_run
+from app.jobs import enqueue_explanation
+from app.models import Applicant, ExplanationRun, Score
+from ml.features import FEATURE_COLUMNS
+
+from test_ingest import memory_session
+from test_pagination import create_applicants
+from test_schema_validation import base_payload
+
+SNAPSHOT = SimpleNamespace(model_version="v1")
+
+
+def fake_explain_batch(frame, snapshot=None):
+    assert list(frame.columns) == FEATURE_COLUMNS
+    return [[{"feature": "AGE", "value": float(age), "contribution": 0.1}] for age in frame["AGE"]]
+
+
+def add_scored_applicants(session, count: int, model_version: str = "v1") -> list[Score]:
+    scores = []
+    for index in range(count):
+        applicant = Applicant(**{**base_payload(), "AGE": 20 + index})
+        session.add(applicant)
+        session.flush()
+        score = Score(
+            applicant_id=applicant.id, pd=0.2, risk_bucket="medium", model_name="rf", model_version=model_version
+        )
+        session.add(score)
+        scores.append(score)
+    session.commit()
+    return scores
+
+
+def test_run_resumes_from_checkpoint_and_skips_owned_scores(monkeypatch) -> None:
+    monkeypatch.setattr(explanations, "explain_batch", fake_explain_batch)
+    with memory_session() as session:
+        scores = add_scored_applicants(session, 9)
+        scores[1].explanations_json = "[]"
+        session.add(scores[1])
+        enqueue_explanation(session, scores[2])
+        session.commit()
+
+        run = start_run(session, chunk_size=3, snapshot=SNAPSHOT)
+        assert (run.total, run.max_score_id) == (7, 9)
+        # Scores saved after the run started are not part of it.
+        add_scored_applicants(session, 1)
+
+        chunks = []
+        run_explanations(session, run, SNAPSHOT, should_stop=lambda: len(chunks) == 1, progress=chunks.append)
+        assert run.status == "interrupted"
+        assert (run.processed, run.last_score_id) == (3, 5)
+
+        run = resume_run(session, run.id, SNAPSHOT)
+        run_explanations(session, run, SNAPSHOT)
+        assert run.status == "done" and run.finished_at is not None
+        assert run.processed == run.total == 7
+
+        explained = dict(session.exec(select(Score.id, Score.explanations_json)).all())
+    assert explained[2] == "[]" and explained[3] is None and explained[10] is None
+    assert json.loads(explained[9])[0]["value"] == 28
+    assert all(explained[score_id] for score_id in (1, 4, 5, 6, 7, 8, 9))
+
+
+def test_failed_run_is_recorded_and_resumable(monkeypatch) -> None:
+    def explode(frame, snapshot=None):
+        raise RuntimeError("no background")
+
+    monkeypatch.setattr(explanations, "explain_batch", explode)
+    with memory_session() as session:
+        add_scored_applicants(session, 2)
+        run = start_run(session, chunk_size=5, snapshot=SNAPSHOT)
+        with pytest.raises(RuntimeError):
+            run_explanations(session, run, SNAPSHOT)
+        stored = session.get(ExplanationRun, run.id)
+        assert stored.status == "failed" and "no background" in stored.error
+        assert stored.processed == 0
+
+        monkeypatch.setattr(explanations, "explain_batch", fake_explain_batch)
+        run = run_explanations(session, resume_run(session, run.id, SNAPSHOT), SNAPSHOT)
+        assert run.status == "done" and run.processed == 2 and run.error is None
+
+
+def test_run_explains_only_its_model_version_and_fails_on_a_change(monkeypatch) -> None:
+    monkeypatch.setattr(explanations, "explain_batch", fake_explain_batch)
+    with memory_session() as session:
+        add_scored_applicants(session, 2, model_version="v0")
+        add_scored_applicants(session, 4)
+        run = start_run(session, chunk_size=2, snapshot=SNAPSHOT)
+        assert run.total == 4
+
+        snapshots = iter([SNAPSHOT, SimpleNamespace(model_version="v2")])
+        monkeypatch.setattr(explanations, "current_snapshot", lambda: next(snapshots))
+        with pytest.raises(RuntimeError, match="Model changed"):
+            run_explanations(session, run)
+        assert (run.status, run.processed, run.last_score_id) == ("failed", 2, 4)
+        with pytest.raises(ValueError, match="start a new run"):
+            resume_run(session, run.id, SimpleNamespace(model_version="v2"))
+
+        run = run_explanations(session, resume_run(session, run.id, SNAPSHOT), SNAPSHOT)
+        assert run.status == "done" and run.processed == 4
+        explained = dict(session.exec(select(Score.id, Score.explanations_json)).all())
+    assert explained[1] is None and explained[2] is None
+    assert all(explained[score_id] for score_id in (3, 4, 5, 6))
+
+
+def test_run_endpoints_clamp_chunks_and_refuse_conflicts(api, monkeypatch) -> None:
+    started = []
+    monkeypatch.setattr(main.explanation_runs, "start", lambda factory, run_id: started.append(run_id))
+    (applicant_id,) = create_applicants(api, 1)
+    api.post(f"/applicants/{applicant_id}/score", params={"explain": "none"})
+
+    response = api.post("/explanations/runs", params={"chunk_size": 0})
+    assert response.status_code == 202
+    run = response.json()
+    assert run["chunk_size"] == 1 and started == [run["id"]]
+    assert api.get(f"/explanations/runs/{run['id']}").json()["total"] == 1
+    assert api.post("/explanations/runs", params={"chunk_size": 10**9}).json()["chunk_size"] == 10_000
+
+    with api.session_scope() as session:
+        stale = ExplanationRun(model_version="old", max_score_id=1, chunk_size=10, status="interrupted")
+        session.add(stale)
+        session.commit()
+        stale_id = stale.id
+    assert api.post("/explanations/runs", params={"resume": stale_id}).status_code == 409
+    assert api.post("/explanations/runs", params={"resume": 999}).status_code == 404
+    assert api.get("/explanations/runs/999").status_code == 404
+
+    monkeypatch.setattr(main.explanation_runs, "active", lambda: True)
+    assert api.post("/explanations/runs").status_code == 409
@@ -0,0 +1,79 @@
+import numpy as np
+import pandas as pd
+from sklearn.metrics import confusion_matrix, roc_auc_score
+
+from ml.fairness import METRIC_NAMES, FairnessEngine, bootstrap_intervals, compute_fairness_report, slice_values
+
+
+def make_split(rows: int = 600) -> tuple[pd.DataFrame, pd.Series, np.ndarray]:
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(
+        {
+            "SEX": rng.choice([1, 2], rows),
+            "EDUCATION": rng.choice([1, 2, 3, 4], rows, p=[0.4, 0.4, 0.19, 0.01]),
+            "AGE": rng.integers(21, 75, rows),
+        }
+    )
+    y = pd.Series((rng.random(rows) < 0.25).astype(int))
+    # Rounded scores so groups contain tied PDs.
+    prob = np.clip(0.2 + 0.3 * y + rng.normal(0, 0.2, rows), 0, 1).round(2)
+    return X, y, prob
+
+
+def reference(y: np.ndarray, prob: np.ndarray, threshold: float) -> dict:
+    tn, fp, fn, tp = confusion_matrix(y, prob >= threshold, labels=[0, 1]).ravel()
+    return {
+        "count": len(y),
+        "default_rate": y.mean(),
+        "selection_rate": (prob >= threshold).mean(),
+        "tpr": tp / (tp + fn) if tp + fn else 0.0,
+        "fpr": fp / (fp + tn) if fp + tn else 0.0,
+        "auc": roc_auc_score(y, prob) if len(set(y)) == 2 else None,
+    }
+
+
+def test_single_pass_metrics_match_per_group_sklearn() -> None:
+    X, y, prob = make_split()
+    slices = slice_values(X)
+
+    class Model:
+        def predict_proba(self, frame):
+            return np.column_stack([1 - prob, prob])
+
+    report = compute_fairness_report(Model(), 0.35, X, y, resamples=0)
+
+    assert report["bootstrap"] is None
+    groups = [("overall", None, report["overall"])] + [
+        (entry["feature"], group["group"], group) for entry in report["slices"] for group in entry["groups"]
+    ]
+    assert [label for feature, label, _ in groups if feature == "AGE_BAND"] == ["30-39", "40-49", "50-59", "60+", "<30"]
+    for feature, label, metrics in groups:
+        mask = np.ones(len(y), bool) if label is None else slices[feature].astype(str) == label
+        expected = reference(y.to_numpy()[mask], prob[mask], 0.35)
+        for name, value in expected.items():
+            assert (metrics[name] is None) if value is None else np.isclose(metrics[name], value), (feature, label, name)
+
+
+def test_weighted_compute_equals_materialized_resample() -> None:
+    X, y, prob = make_split(200)
+    engine = FairnessEngine(y.to_numpy(), prob, 0.35, slice_values(X))
+    picks = np.random.default_rng(1).integers(0, 200, 200)
+    weighted = engine.compute(np.bincount(picks, minlength=200))
+    resampled = FairnessEngine(y.to_numpy()[picks], prob[picks], 0.35, slice_values(X.iloc[picks])).compute()
+
+    for name in ("count", *METRIC_NAMES):
+        assert np.allclose(weighted[name], resampled[name], equal_nan=True), name
+
+
+def test_bootstrap_intervals_cover_point_and_ignore_process_count() -> None:
+    X, y, prob = make_split()
+    engine = FairnessEngine(y.to_numpy(), prob, 0.35, slice_values(X))
+    point = engine.compute()
+
+    serial = bootstrap_intervals(engine, 250, seed=7, n_jobs=1)
+    parallel = bootstrap_intervals(engine, 250, seed=7, n_jobs=2)
+
+    assert serial.shape == (2, len(METRIC_NAMES), engine.n_groups)
+    assert np.allclose(serial, parallel, equal_nan=True)
+    overall = np.array([point[name][0, 0] for name in METRIC_NAMES])
+    assert np.all((serial[0, :, 0] <= overall) & (overall <= serial[1, :, 0]))
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.history import PD_BINS, score_summary_statement, score_timeline_statement, summarize_score_histogram
+from app.models import Applicant, Score
+from app.pagination import encode_cursor
+from app.scoring import risk_bucket
+
+from test_ingest import memory_session
+from test_pagination import create_applicants
+from test_schema_validation import base_payload
+
+
+def add_scores(session, applicant_id: int, pds: list[float], model_name: str, start: datetime) -> None:
+    for index, value in enumerate(pds):
+        session.add(
+            Score(
+                applicant_id=applicant_id,
+                pd=value,
+                risk_bucket=risk_bucket(value),
+                model_name=model_name,
+                # Pairs share a timestamp so ties are broken by id.
+                created_at=start + timedelta(minutes=index // 2),
+            )
+        )
+    session.commit()
+
+
+def test_timeline_pages_newest_first_without_gaps() -> None:
+    start = datetime(2024, 1, 1)
+    with memory_session() as session:
+        session.add(Applicant(**base_payload()))
+        session.add(Applicant(**base_payload()))
+        session.commit()
+        add_scores(session, 1, [0.1] * 7, "rf", start)
+        add_scores(session, 2, [0.9] * 3, "rf", start)
+
+        seen: list[int] = []
+        cursor = None
+        while True:
+            page = list(session.exec(score_timeline_statement(1, limit=3, cursor=cursor)))
+            seen.extend(row.id for row in page)
+            if len(page) < 3:
+                break
+            cursor = encode_cursor(page[-1].created_at, page[-1].id)
+
+    assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+
+def test_summary_quantiles_track_exact_values_and_filters() -> None:
+    rng = np.random.default_rng(0)
+    recent = rng.beta(2, 6, size=400).round(6).tolist()
+    start = datetime(2024, 1, 1)
+    with memory_session() as session:
+        session.add(Applicant(**base_payload()))
+        session.commit()
+        add_scores(session, 1, [0.99] * 50, "rf", start - timedelta(days=30))
+        add_scores(session, 1, recent, "rf", start)
+        add_scores(session, 1, [0.5] * 20, "logreg", start)
+
+        summary = summarize_score_histogram(session.exec(score_summary_statement(model="rf", since=start)))
+        everything = summarize_score_histogram(session.exec(score_summary_statement()))
+        empty = summarize_score_histogram(session.exec(score_summary_statement(model="missing")))
+
+    assert summary["count"] == 400
+    assert summary["buckets"] == {bucket: sum(risk_bucket(v) == bucket for v in recent) for bucket in summary["buckets"]}
+    assert abs(summary["pd"]["mean"] - np.mean(recent)) < 1e-6
+    assert summary["pd"]["quantiles_approximate"] and summary["pd"]["quantile_max_error"] == 1 / PD_BINS
+    for q in (0.1, 0.5, 0.9):
+        assert abs(summary["pd"]["quantiles"][f"p{round(q * 100)}"] - np.quantile(recent, q)) <= 1 / PD_BINS
+    assert everything["count"] == 470
+    assert empty == {"count": 0, "buckets": {}, "pd": None}
+
+
+def test_timeline_and_summary_endpoints(api) -> None:
+    (applicant_id,) = create_applicants(api, 1)
+    score_ids = [
+        api.post(f"/applicants/{applicant_id}/score", params={"explain": "none"}).json()["id"] for _ in range(3)
+    ]
+
+    response = api.get(f"/applicants/{applicant_id}/scores", params={"limit": 2})
+    assert response.status_code == 200
+    first = [item["id"] for item in response.json()]
+    rest = api.get(f"/applicants/{applicant_id}/scores", params={"cursor": response.headers["x-next-cursor"]})
+    assert first + [item["id"] for item in rest.json()] == score_ids[::-1]
+    assert api.get("/applicants/999/scores").status_code == 404
+    assert api.get(f"/applicants/{applicant_id}/scores", params={"cursor": "garbage"}).status_code == 400
+
+    summary = api.get("/scores/summary").json()
+    assert summary["count"] == 3 and sum(summary["buckets"].values()) == 3
+    assert api.get("/scores/summary", params={"model": "missing"}).json()["count"] == 0
+    assert api.get("/scores/summary", params={"since": "yesterday"}).status_code == 422
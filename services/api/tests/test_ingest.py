@@ -0,0 +1,87 @@
+import asyncio
+import json
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, func, select
+
+from app.ingest import MAX_CHUNK_SIZE, BulkIngester, LineParser, iter_body_lines
+from app.models import Applicant
+from ml.features import FEATURE_COLUMNS
+
+from test_schema_validation import base_payload
+
+
+def memory_session() -> Session:
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    SQLModel.metadata.create_all(engine)
+    return Session(engine)
+
+
+def test_csv_ingest_reports_row_errors_and_commits_valid_rows() -> None:
+    payload = base_payload()
+    header = ",".join(FEATURE_COLUMNS)
+    good = ",".join(str(payload[column]) for column in FEATURE_COLUMNS)
+    bad_age = good.replace(",35,", ",12,", 1)
+    lines = [header, good, bad_age, "", good, "1,2,3"]
+
+    with memory_session() as session:
+        parser = LineParser("csv")
+        result = BulkIngester(session, chunk_size=2).ingest(parser.parse_lines(lines))
+        stored = session.exec(select(func.count()).select_from(Applicant)).one()
+
+    assert (result.received, result.inserted, result.failed) == (4, 2, 2)
+    assert [error["line"] for error in result.errors] == [3, 6]
+    assert result.errors[0]["errors"][0]["loc"] == ["AGE"]
+    assert stored == 2
+
+
+def test_ndjson_ingest_caps_error_list() -> None:
+    lines = ["{not json"] * 5 + ['{"AGE": 30}']
+
+    with memory_session() as session:
+        ingester = BulkIngester(session, max_errors=3)
+        result = ingester.ingest(LineParser("ndjson").parse_lines(lines))
+
+    assert result.failed == 6
+    assert len(result.errors) == 3
+    assert result.errors_truncated
+
+
+def test_body_lines_join_lines_split_across_chunks() -> None:
+    body_bytes = b"first\nsecond line spread over many chunks\n\nlast"
+
+    async def body(size: int):
+        for start in range(0, len(body_bytes), size):
+            yield body_bytes[start : start + size]
+
+    async def read_lines(size: int) -> list[bytes]:
+        return [line async for line in iter_body_lines(body(size), max_bytes=1_000)]
+
+    for size in (1, 3, 7, len(body_bytes)):
+        assert asyncio.run(read_lines(size)) == body_bytes.split(b"\n")
+
+
+def test_invalid_utf8_is_a_line_error_and_chunk_size_is_clamped() -> None:
+    payload = base_payload()
+    good = json.dumps(payload).encode()
+
+    async def body():
+        yield good + b"\n" + good.replace(b"{", b"{\xff", 1) + b"\n"
+        yield good
+
+    async def read_lines() -> list[bytes]:
+        return [line async for line in iter_body_lines(body(), max_bytes=1_000_000)]
+
+    with memory_session() as session:
+        assert BulkIngester(session, chunk_size=0).chunk_size == 1
+        assert BulkIngester(session, chunk_size=10**9).chunk_size == MAX_CHUNK_SIZE
+        result = BulkIngester(session).ingest(LineParser("ndjson").parse_lines(asyncio.run(read_lines())))
+
+    assert (result.received, result.inserted, result.failed) == (3, 2, 1)
+    assert result.errors == [
+        {"line": 2, "errors": [{"loc": [], "msg": "Invalid UTF-8 at byte 1", "type": "unicode_decode"}]}
+    ]
@@ -0,0 +1,133 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from sqlmodel import Session, select
+
+from app import jobs
+from app.jobs import (
+    ExplanationWorker,
+    claim_next,
+    enqueue_explanation,
+    explanation_status,
+    renew_leases,
+    requeue_expired,
+)
+from app.models import Applicant, ExplanationJob, Score
+
+from test_ingest import memory_session
+from test_pagination import create_applicants
+
+SNAPSHOT = SimpleNamespace(model_version="v1")
+from test_schema_validation import base_payload
+
+
+def test_only_jobs_with_expired_leases_are_reclaimed(monkeypatch) -> None:
+    monkeypatch.setattr(jobs, "current_snapshot", lambda: SNAPSHOT)
+    monkeypatch.setattr(jobs, "_cached_explanations", lambda payload, snapshot: None)
+    monkeypatch.setattr(
+        jobs, "explain_payload", lambda payload, snapshot: [{"feature": "AGE", "contribution": 0.1}]
+    )
+
+    session = memory_session()
+    applicant = Applicant(**base_payload())
+    session.add(applicant)
+    session.commit()
+    scores = [
+        Score(applicant_id=applicant.id, pd=0.2, risk_bucket="low", model_name="m", model_version="v1")
+        for _ in range(2)
+    ]
+    session.add_all(scores)
+    session.flush()
+    for score in scores:
+        enqueue_explanation(session, score)
+    session.commit()
+
+    # A live peer holds the first job and keeps renewing its lease.
+    peer = claim_next(session, "peer", lease_seconds=60)
+    assert peer.score_id == scores[0].id
+    assert renew_leases(session, "peer", lease_seconds=60) == 1
+    assert requeue_expired(session) == 0
+
+    engine = session.get_bind()
+    assert ExplanationWorker(lambda: Session(engine)).drain() == 1
+    session.refresh(peer)
+    assert (peer.status, peer.owner) == ("running", "peer")
+
+    # The peer dies: its lease lapses and the job is claimed again.
+    peer.lease_expires_at = datetime.utcnow() - timedelta(seconds=1)
+    session.add(peer)
+    session.commit()
+    assert ExplanationWorker(lambda: Session(engine)).drain() == 1
+
+    session.expire_all()
+    statuses = session.exec(select(ExplanationJob.status)).all()
+    assert statuses == ["done", "done"]
+    assert session.exec(select(ExplanationJob.owner)).all() == [None, None]
+    assert explanation_status(session, scores[0]) == "done"
+    assert "AGE" in scores[0].explanations_json
+
+
+def test_failed_explanations_retry_until_max_attempts(monkeypatch) -> None:
+    def explode(payload, snapshot):
+        raise RuntimeError("no background")
+
+    monkeypatch.setattr(jobs, "current_snapshot", lambda: SNAPSHOT)
+    monkeypatch.setattr(jobs, "_cached_explanations", lambda payload, snapshot: None)
+    monkeypatch.setattr(jobs, "explain_payload", explode)
+
+    session = memory_session()
+    applicant = Applicant(**base_payload())
+    session.add(applicant)
+    session.commit()
+    score = Score(applicant_id=applicant.id, pd=0.2, risk_bucket="low", model_name="m", model_version="v1")
+    session.add(score)
+    session.flush()
+    job = enqueue_explanation(session, score)
+    session.commit()
+
+    engine = session.get_bind()
+    ExplanationWorker(lambda: Session(engine), max_attempts=2).drain()
+
+    session.refresh(job)
+    assert (job.status, job.attempts, job.error) == ("failed", 2, "no background")
+
+
+def test_jobs_for_scores_from_another_model_fail_without_retrying(monkeypatch) -> None:
+    explained = []
+    monkeypatch.setattr(jobs, "current_snapshot", lambda: SimpleNamespace(model_version="v2"))
+    monkeypatch.setattr(jobs, "_cached_explanations", lambda payload, snapshot: None)
+    monkeypatch.setattr(jobs, "explain_payload", lambda payload, snapshot: explained.append(payload))
+
+    session = memory_session()
+    applicant = Applicant(**base_payload())
+    session.add(applicant)
+    session.commit()
+    score = Score(applicant_id=applicant.id, pd=0.2, risk_bucket="low", model_name="m", model_version="v1")
+    session.add(score)
+    session.flush()
+    job = enqueue_explanation(session, score)
+    session.commit()
+
+    ExplanationWorker(lambda: Session(session.get_bind()), max_attempts=3).drain()
+
+    session.refresh(job)
+    session.refresh(score)
+    assert (job.status, job.attempts) == ("failed", 1)
+    assert job.error == "Score 1 was made by model v1 but v2 is loaded"
+    assert explained == [] and score.explanations_json is None
+
+
+def test_async_explain_saves_the_score_and_queues_a_job(api) -> None:
+    (applicant_id,) = create_applicants(api, 1)
+
+    response = api.post(f"/applicants/{applicant_id}/score", params={"explain": "async"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["explanation_status"] == "pending" and body["explanations"] is None
+    assert api.get(f"/scores/{body['id']}").json()["explanation_status"] == "pending"
+    with api.session_scope() as session:
+        assert [job.score_id for job in session.exec(select(ExplanationJob))] == [body["id"]]
+
+    assert api.post(f"/applicants/{applicant_id}/score", params={"explain": "later"}).status_code == 422
+    assert api.post("/applicants/999/score").status_code == 404
+    assert api.get("/scores/999").status_code == 404
@@ -0,0 +1,82 @@
+from app import main
+from app.metrics import CONTENT_TYPE, MetricsRegistry
+
+
+def test_histogram_renders_cumulative_buckets() -> None:
+    registry = MetricsRegistry(prefix="t_")
+    latency = registry.histogram("latency_seconds", "Latency.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        latency.observe(value, stage="predict")
+
+    text = registry.render()
+
+    assert "# TYPE t_latency_seconds histogram" in text
+    assert 't_latency_seconds_bucket{stage="predict",le="0.1"} 1' in text
+    assert 't_latency_seconds_bucket{stage="predict",le="1"} 3' in text
+    assert 't_latency_seconds_bucket{stage="predict",le="+Inf"} 4' in text
+    assert 't_latency_seconds_count{stage="predict"} 4' in text
+
+
+def test_disabled_registry_records_nothing() -> None:
+    registry = MetricsRegistry(enabled=False)
+    hits = registry.counter("hits_total", "Hits.")
+    latency = registry.histogram("latency_seconds", "Latency.")
+
+    hits.inc()
+    with latency.time():
+        pass
+
+    assert hits.value() == 0
+    assert latency.count() == 0
+
+
+def test_buffered_observations_replay_into_parent() -> None:
+    worker = MetricsRegistry()
+    parent = MetricsRegistry()
+    worker_hits = worker.counter("hits_total", "Hits.", ("cache",))
+    parent_hits = parent.counter("hits_total", "Hits.", ("cache",))
+    worker.start_buffering()
+
+    worker_hits.inc(cache="explainer")
+    parent.replay(worker.drain())
+
+    assert worker_hits.value(cache="explainer") == 0
+    assert parent_hits.value(cache="explainer") == 1
+    assert worker.drain() == []
+
+
+def test_render_is_consistent_while_other_threads_record() -> None:
+    import threading
+
+    registry = MetricsRegistry(prefix="t_")
+    hits = registry.counter("hits_total", "Hits.", ("route",))
+    latency = registry.histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1,))
+
+    def record(worker: int) -> None:
+        for index in range(500):
+            hits.inc(route=f"/{worker}/{index}")
+            latency.observe(0.05, route=f"/{worker}/{index}")
+
+    threads = [threading.Thread(target=record, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    while any(thread.is_alive() for thread in threads):
+        registry.render()
+    for thread in threads:
+        thread.join()
+
+    text = registry.render()
+    assert text.count("t_hits_total{") == 2_000
+    assert text.count("t_latency_seconds_count{") == 2_000
+
+
+def test_metrics_endpoint_renders_request_latency(api, monkeypatch) -> None:
+    api.get("/healthz")
+    response = api.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    assert 'route="/healthz"' in response.text
+
+    monkeypatch.setattr(main.metrics, "enabled", False)
+    assert api.get("/metrics").status_code == 404
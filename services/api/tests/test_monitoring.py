@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from ml.features import FEATURE_COLUMNS
+from ml.monitoring import (
+    assign_bins,
+    build_baseline,
+    drift_series,
+    feature_aggregates,
+    summarize_aggregates,
+    summarize_drift,
+)
+
+
+def make_frame(rows: int, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(rng.integers(0, 10, size=(rows, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+
+
+def test_assign_bins_matches_pd_cut() -> None:
+    edges = [0.0, 2.0, 5.0, 9.0]
+    values = np.array([0.0, 1.0, 2.0, 4.5, 9.0, 9.5, -1.0])
+    expected = pd.cut(values, bins=pd.IntervalIndex.from_breaks(edges, closed="right")).codes
+
+    assert assign_bins(values, edges).tolist() == expected.tolist()
+
+
+def test_merged_aggregates_match_full_scan() -> None:
+    baseline = build_baseline(make_frame(500, seed=0))
+    current = make_frame(300, seed=1)
+
+    merged: dict[str, dict[int, list[float]]] = {}
+    for part in (current.iloc[:120], current.iloc[120:]):
+        for feature, bins in feature_aggregates(part, baseline).items():
+            for bin_index, values in bins.items():
+                target = merged.setdefault(feature, {}).setdefault(bin_index, [0, 0.0, 0.0])
+                for position, value in enumerate(values):
+                    target[position] += value
+
+    incremental = summarize_aggregates(merged, baseline, len(current))["features"]
+    full = summarize_drift(current, baseline)["features"]
+    for left, right in zip(incremental, full):
+        assert np.isclose(left["psi"], right["psi"])
+        assert np.isclose(left["current_mean"], right["current_mean"])
+        assert np.isclose(left["current_std"], current[left["feature"]].std(ddof=0))
+
+
+def test_drift_series_matches_per_step_summaries() -> None:
+    baseline = build_baseline(make_frame(500, seed=0))
+    steps = [make_frame(80, seed=2), make_frame(0, seed=3), make_frame(40, seed=4) * 2]
+    width = max(len(values["bins"]) for values in baseline["features"].values())
+    counts = np.zeros((len(steps), len(FEATURE_COLUMNS), width))
+    totals = np.zeros((len(steps), len(FEATURE_COLUMNS)))
+    totals_sq = np.zeros((len(steps), len(FEATURE_COLUMNS)))
+    for step, frame in enumerate(steps):
+        for position, feature in enumerate(FEATURE_COLUMNS):
+            for bin_index, (count, total, total_sq) in feature_aggregates(frame, baseline)[feature].items():
+                counts[step, position, bin_index + 1] = count
+                totals[step, position] += total
+                totals_sq[step, position] += total_sq
+
+    series = drift_series(counts, totals, totals_sq, baseline)
+
+    assert series["count"].tolist() == [80, 0, 40]
+    assert np.isnan(series["psi"][1]).all()
+    for step in (0, 2):
+        expected = summarize_drift(steps[step], baseline)["features"]
+        assert np.allclose(series["psi"][step], [item["psi"] for item in expected])
+        assert np.allclose(series["mean_shift"][step], [item["mean_shift"] for item in expected])
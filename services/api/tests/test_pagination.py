@@ -0,0 +1,103 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlmodel import select
+
+from app.export import export_statement
+from app.models import Applicant, Score
+from app.pagination import InvalidCursor, after_cursor, decode_cursor, encode_cursor
+
+from test_ingest import memory_session
+from test_schema_validation import base_payload
+
+
+def test_cursor_round_trip_and_rejects_garbage() -> None:
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+    with pytest.raises(InvalidCursor):
+        decode_cursor("not-a-cursor")
+
+
+def test_keyset_pages_cover_rows_once_with_tied_timestamps() -> None:
+    start = datetime(2024, 1, 1)
+    with memory_session() as session:
+        for index in range(7):
+            # Pairs of rows share a timestamp so ties are broken by id.
+            session.add(Applicant(**base_payload(), created_at=start + timedelta(seconds=index // 2)))
+        session.commit()
+
+        seen: list[int] = []
+        cursor = None
+        while True:
+            statement = select(Applicant).order_by(Applicant.created_at, Applicant.id).limit(3)
+            if cursor:
+                statement = statement.where(after_cursor(Applicant.created_at, Applicant.id, cursor))
+            page = list(session.exec(statement))
+            seen.extend(applicant.id for applicant in page)
+            if len(page) < 3:
+                break
+            cursor = encode_cursor(page[-1].created_at, page[-1].id)
+
+    assert seen == list(range(1, 8))
+
+
+def test_export_joins_latest_score_only() -> None:
+    with memory_session() as session:
+        applicants = [Applicant(**base_payload()) for _ in range(2)]
+        session.add_all(applicants)
+        session.commit()
+        session.add(Score(applicant_id=applicants[0].id, pd=0.2, risk_bucket="low", model_name="m"))
+        session.add(Score(applicant_id=applicants[0].id, pd=0.6, risk_bucket="high", model_name="m"))
+        session.commit()
+
+        rows = session.exec(export_statement(include_score=True)).all()
+
+    assert len(rows) == 2
+    assert rows[0].pd == 0.6
+    assert rows[1].pd is None
+
+
+def create_applicants(api, count: int) -> list[int]:
+    ids = []
+    for _ in range(count):
+        response = api.post("/applicants", json=base_payload())
+        assert response.status_code == 201
+        ids.append(response.json()["id"])
+    return ids
+
+
+def test_applicant_pages_follow_the_cursor_header(api) -> None:
+    ids = create_applicants(api, 5)
+
+    seen, cursor = [], None
+    while True:
+        response = api.get("/applicants", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen.extend(applicant["id"] for applicant in response.json())
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert seen == ids
+
+    assert len(api.get("/applicants", params={"limit": 0}).json()) == 1
+    assert len(api.get("/applicants", params={"limit": 10_000}).json()) == 5
+    assert api.get("/applicants", params={"cursor": "garbage"}).status_code == 400
+
+
+def test_export_streams_every_applicant(api) -> None:
+    ids = create_applicants(api, 3)
+    assert api.post(f"/applicants/{ids[0]}/score", params={"explain": "none"}).status_code == 200
+
+    response = api.get("/applicants/export", params={"format": "csv"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="applicants.csv"'
+    assert len(response.text.strip().splitlines()) == 4
+
+    response = api.get("/applicants/export", params={"include_score": True})
+    rows = [json.loads(line) for line in response.text.strip().splitlines()]
+    assert [row["id"] for row in rows] == ids
+    assert rows[0]["pd"] is not None and rows[1]["pd"] is None
+
+    assert api.get("/applicants/export", params={"format": "xml"}).status_code == 422
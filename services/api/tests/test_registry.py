@@ -0,0 +1,79 @@
+import json
+import os
+
+import joblib
+
+from app.registry import ArtifactRegistry
+from ml.artifacts import publish_manifest
+
+
+def write_artifacts(directory, threshold: float, selected_model: str) -> None:
+    joblib.dump({"model": None, "features": [], "threshold": threshold}, directory / "model.joblib")
+    (directory / "metrics.json").write_text(json.dumps({"selected_model": selected_model}))
+
+
+def bump_mtime(directory) -> None:
+    for path in directory.iterdir():
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_registry_swaps_snapshot_when_artifacts_change(tmp_path) -> None:
+    write_artifacts(tmp_path, threshold=0.3, selected_model="logistic_regression")
+    registry = ArtifactRegistry(tmp_path, check_interval=0.0)
+    reloaded = []
+    registry.add_reload_hook(reloaded.append)
+
+    first = registry.current()
+    assert first.threshold == 0.3
+    assert first.model_name == "logistic_regression"
+    assert first.baseline is None
+
+    write_artifacts(tmp_path, threshold=0.4, selected_model="random_forest")
+    bump_mtime(tmp_path)
+    second = registry.reload()
+
+    assert second.version != first.version
+    assert second.threshold == 0.4
+    assert registry.current() is second
+    assert first.threshold == 0.3
+    assert registry.reloads == 2
+    assert reloaded == [first, second]
+
+
+def test_registry_requires_model(tmp_path) -> None:
+    registry = ArtifactRegistry(tmp_path)
+    try:
+        registry.current()
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError("expected FileNotFoundError")
+
+
+def test_registry_loads_only_published_artifacts(tmp_path) -> None:
+    write_artifacts(tmp_path, threshold=0.3, selected_model="logistic_regression")
+    publish_manifest(tmp_path, "v1")
+    registry = ArtifactRegistry(tmp_path, check_interval=0.0)
+
+    first = registry.current()
+    assert first.model_version == "v1"
+    assert first.threshold == 0.3
+
+    # A training run part way through: new model, old manifest.
+    write_artifacts(tmp_path, threshold=0.4, selected_model="random_forest")
+    (tmp_path / "compiled_model.npz").write_bytes(b"unpublished")
+    assert registry.reload() is first
+    try:
+        ArtifactRegistry(tmp_path).current()
+    except FileNotFoundError:
+        pass
+    else:
+        raise AssertionError("expected FileNotFoundError")
+
+    (tmp_path / "compiled_model.npz").unlink()
+    publish_manifest(tmp_path, "v2")
+    second = registry.reload()
+    assert second.model_version == "v2"
+    assert second.threshold == 0.4
+    assert second.compiled is None
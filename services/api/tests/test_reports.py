@@ -0,0 +1,62 @@
+import json
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app import main, reports
+from ml import fairness
+from ml.artifacts import publish_manifest, read_manifest
+
+
+def snapshot(version: str, report=None) -> SimpleNamespace:
+    return SimpleNamespace(model_version=version, model=None, threshold=0.5, fairness_report=report)
+
+
+def test_recompute_saves_only_for_the_published_model(tmp_path, monkeypatch) -> None:
+    def build(*args, model_version, **kwargs):
+        return {"model_version": model_version}
+
+    monkeypatch.setattr(fairness, "build_fairness_report", build)
+    loaded = {"snapshot": snapshot("v1")}
+    monkeypatch.setattr(reports, "registry", SimpleNamespace(directory=tmp_path, current=lambda: loaded["snapshot"]))
+    (tmp_path / "model.joblib").write_bytes(b"v1")
+    publish_manifest(tmp_path, "v1")
+
+    reports.recompute_fairness_report(snapshot("v1"))
+    assert json.loads((tmp_path / "fairness_report.json").read_text()) == {"model_version": "v1"}
+    assert "fairness_report.json" in read_manifest(tmp_path)["files"]
+
+    # v2 is published while a v1 recompute runs: its files must stay untouched.
+    (tmp_path / "fairness_report.json").write_text(json.dumps({"model_version": "v2"}))
+    publish_manifest(tmp_path, "v2")
+    reports.recompute_fairness_report(snapshot("v1"))
+    assert json.loads((tmp_path / "fairness_report.json").read_text()) == {"model_version": "v2"}
+
+    loaded["snapshot"] = snapshot("v3")
+    reports.recompute_fairness_report(snapshot("v2"))
+    assert json.loads((tmp_path / "fairness_report.json").read_text()) == {"model_version": "v2"}
+    assert read_manifest(tmp_path)["model_version"] == "v2"
+
+
+def test_get_report_never_recomputes(monkeypatch) -> None:
+    recomputed = []
+    monkeypatch.setattr(main, "recompute_fairness_report", recomputed.append)
+    monkeypatch.setattr(reports, "_computed", {})
+    client = TestClient(main.app)
+
+    monkeypatch.setattr(main, "current_snapshot", lambda: snapshot("v2", {"model_version": "v1"}))
+    response = client.get("/fairness/report")
+    assert response.status_code == 404
+    assert "POST /fairness/report/recompute" in response.json()["detail"]
+
+    monkeypatch.setattr(main, "fairness_recompute_running", lambda: True)
+    response = client.get("/fairness/report")
+    assert response.status_code == 409 and response.headers["retry-after"] == "30"
+    assert recomputed == []
+
+    monkeypatch.setattr(main, "fairness_recompute_running", lambda: False)
+    assert client.post("/fairness/report/recompute").json() == {"status": "scheduled", "model_version": "v2"}
+    assert [item.model_version for item in recomputed] == ["v2"]
+
+    monkeypatch.setattr(main, "current_snapshot", lambda: snapshot("v2", {"model_version": "v2"}))
+    assert client.get("/fairness/report").json() == {"model_version": "v2"}
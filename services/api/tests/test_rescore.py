@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlmodel import select
+
+from app import rescore
+from app.models import Applicant, RescoreRun, Score
+from app.rescore import resume_run, run_rescore, start_run
+from ml.features import FEATURE_COLUMNS
+
+from test_ingest import memory_session
+from test_pagination import create_applicants
+from test_schema_validation import base_payload
+
+SNAPSHOT = SimpleNamespace(model_name="rf", model_version="v1", features=FEATURE_COLUMNS)
+AGE = FEATURE_COLUMNS.index("AGE")
+
+
+def fake_score_chunk(values):
+    return "v1", values[:, AGE] / 100
+
+
+def add_applicants(session, count: int) -> None:
+    session.add_all(Applicant(**{**base_payload(), "AGE": 20 + index}) for index in range(count))
+    session.commit()
+
+
+def test_rescore_resumes_without_duplicating_scores(monkeypatch) -> None:
+    monkeypatch.setattr(rescore, "score_chunk", fake_score_chunk)
+    with memory_session() as session:
+        add_applicants(session, 10)
+        run = start_run(session, chunk_size=4, processes=1, snapshot=SNAPSHOT)
+        assert (run.total, run.max_applicant_id, run.processes) == (10, 10, 1)
+        add_applicants(session, 1)
+
+        saved = []
+        run_rescore(session, run, SNAPSHOT, progress=saved.append, should_stop=lambda: len(saved) == 1)
+        assert run.status == "interrupted"
+        assert (run.processed, run.last_applicant_id) == (4, 4)
+
+        run = run_rescore(session, resume_run(session, run.id, snapshot=SNAPSHOT), SNAPSHOT)
+        assert run.status == "done" and run.processed == run.total == 10
+        assert run.elapsed_seconds > 0
+
+        scores = session.exec(select(Score.applicant_id, Score.pd, Score.risk_bucket, Score.model_name)).all()
+    assert sorted(score[0] for score in scores) == list(range(1, 11))
+    assert all(pd == pytest.approx((19 + applicant_id) / 100) for applicant_id, pd, _, _ in scores)
+    assert {(bucket, model) for _, pd, bucket, model in scores if pd >= 0.2} == {("medium", "rf")}
+
+
+def test_model_change_fails_the_run_and_keeps_the_checkpoint(monkeypatch) -> None:
+    chunks = iter(["v1", "v2"])
+    monkeypatch.setattr(rescore, "score_chunk", lambda values: (next(chunks, "v1"), values[:, AGE] / 100))
+    with memory_session() as session:
+        add_applicants(session, 6)
+        run = start_run(session, chunk_size=3, processes=1, snapshot=SNAPSHOT)
+        with pytest.raises(RuntimeError, match="Model changed"):
+            run_rescore(session, run, SNAPSHOT)
+
+        stored = session.get(RescoreRun, run.id)
+        assert stored.status == "failed" and stored.last_applicant_id == 3
+        assert len(session.exec(select(Score.id)).all()) == 3
+        with pytest.raises(ValueError, match="start a new run"):
+            resume_run(session, run.id, snapshot=SimpleNamespace(model_version="v2"))
+        assert session.get(RescoreRun, run.id).status == "failed"
+
+        run = run_rescore(session, resume_run(session, run.id, snapshot=SNAPSHOT), SNAPSHOT)
+        assert run.status == "done" and run.processed == 6
+        assert len(session.exec(select(Score.id)).all()) == 6
+
+
+def test_processes_are_capped_at_the_cpu_count(monkeypatch) -> None:
+    monkeypatch.setattr(rescore.os, "cpu_count", lambda: 4)
+    assert [rescore.resolve_processes(value) for value in (0, 1, 3, 64)] == [4, 1, 3, 4]
+
+
+def test_run_endpoints_clamp_settings_and_refuse_conflicts(api, monkeypatch) -> None:
+    started = []
+    monkeypatch.setattr(rescore.rescore_runs, "start", lambda factory, run_id: started.append(run_id))
+    create_applicants(api, 2)
+
+    response = api.post("/admin/rescore/runs", params={"chunk_size": 10**9, "processes": -3})
+    assert response.status_code == 202
+    run = response.json()
+    assert (run["chunk_size"], run["processes"], run["total"]) == (100_000, rescore.resolve_processes(0), 2)
+    assert started == [run["id"]]
+    assert api.get(f"/admin/rescore/runs/{run['id']}").json()["status"] == "running"
+
+    with api.session_scope() as session:
+        stale = RescoreRun(
+            model_name="rf", model_version="old", max_applicant_id=2, total=2, chunk_size=2, status="interrupted"
+        )
+        session.add(stale)
+        session.commit()
+        stale_id = stale.id
+    assert api.post("/admin/rescore/runs", params={"resume": stale_id}).status_code == 409
+    assert api.post("/admin/rescore/runs", params={"resume": 999}).status_code == 404
+    assert api.get("/admin/rescore/runs/999").status_code == 404
+
+    monkeypatch.setattr(rescore.rescore_runs, "active", lambda: True)
+    assert api.post("/admin/rescore/runs").status_code == 409
@@ -0,0 +1,42 @@
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from app.models import RescoreRun
+from app.runs import BackgroundRuns, mark_interrupted, reopen_run, run_summary
+
+from test_ingest import memory_session
+
+
+def test_background_runs_one_at_a_time_and_stop_between_chunks() -> None:
+    session = memory_session()
+    run = RescoreRun(model_name="rf", model_version="v1", max_applicant_id=10, total=10, chunk_size=2)
+    session.add(run)
+    session.commit()
+    started = threading.Event()
+
+    def execute(session, run, should_stop):
+        started.set()
+        while not should_stop():
+            started.wait(0.01)
+        mark_interrupted(session, run)
+
+    @contextmanager
+    def session_factory():
+        yield session
+
+    runs = BackgroundRuns(RescoreRun, execute, name="test-run")
+    assert runs.start(session_factory, run.id)
+    started.wait(5)
+    assert runs.active() and not runs.start(session_factory, run.id)
+    runs.stop()
+    assert not runs.active()
+    assert run_summary(run)["status"] == "interrupted"
+
+    with pytest.raises(ValueError, match="Rescore run 1 uses model v1 but v2 is loaded"):
+        reopen_run(session, RescoreRun, run.id, "v2")
+    with pytest.raises(LookupError, match="Rescore run 99 not found"):
+        reopen_run(session, RescoreRun, 99, "v1")
+    assert reopen_run(session, RescoreRun, run.id, "v1", processes=3).status == "running"
+    assert run.processes == 3
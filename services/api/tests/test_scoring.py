@@ -1,7 +1,10 @@
+from app import main
 from app.schemas import ApplicantCreate
 from app.scoring import prepare_dataframe, risk_bucket
 from ml.features import FEATURE_COLUMNS
 
+from test_schema_validation import base_payload
+
 
 def test_risk_bucket_boundaries() -> None:
     assert risk_bucket(0.05) == "low"
@@ -37,3 +40,65 @@ def test_prepare_dataframe_preserves_feature_order() -> None:
     )
     frame = prepare_dataframe(payload, FEATURE_COLUMNS)
     assert list(frame.columns) == FEATURE_COLUMNS
+
+
+def test_score_batch_matches_single_row_scoring() -> None:
+    import numpy as np
+    import pandas as pd
+    from sklearn.linear_model import LogisticRegression
+
+    from datetime import datetime
+
+    from app import scoring
+    from app.registry import ArtifactSnapshot
+
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame(rng.normal(size=(200, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    y = (X["AGE"] > 0).astype(int)
+    model = LogisticRegression().fit(X, y)
+    snapshot = ArtifactSnapshot(
+        version="test",
+        model_version="test",
+        loaded_at=datetime.utcnow(),
+        artifacts={"model": model, "features": FEATURE_COLUMNS, "threshold": 0.5},
+    )
+
+    payloads = [
+        ApplicantCreate(**{column: 0 for column in FEATURE_COLUMNS} | {"AGE": age, "LIMIT_BAL": limit})
+        for age, limit in [(25, 1000), (40, 50000), (70, 200000)]
+    ]
+    batch = scoring.score_batch(payloads, chunk_size=2, snapshot=snapshot)
+    single = [scoring.score_payload(payload, snapshot) for payload in payloads]
+
+    assert [row["pd"] for row in batch] == [row["pd"] for row in single]
+    assert [row["risk_bucket"] for row in batch] == [row["risk_bucket"] for row in single]
+    assert [row["pd"] for row in scoring.score_batch(payloads, chunk_size=0, snapshot=snapshot)] == [
+        row["pd"] for row in batch
+    ]
+
+
+def test_score_batch_chunk_size_must_be_positive(monkeypatch) -> None:
+    import pytest
+    from pydantic import ValidationError
+
+    from app.config import Settings
+
+    monkeypatch.setenv("SCORE_BATCH_CHUNK_SIZE", "0")
+    with pytest.raises(ValidationError):
+        Settings()
+
+
+def test_batch_endpoint_scores_valid_rows_and_reports_row_errors(api, monkeypatch) -> None:
+    rows = [base_payload(), {**base_payload(), "AGE": 12}, base_payload()]
+    response = api.post("/score/batch", json={"applicants": rows})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["scored"], body["failed"]) == (2, 1)
+    assert [item["index"] for item in body["results"]] == [0, 1, 2]
+    assert body["results"][0]["pd"] == body["results"][2]["pd"]
+    assert body["results"][1]["pd"] is None and body["results"][1]["errors"][0]["loc"] == ["AGE"]
+
+    assert api.post("/score/batch", json={"applicants": []}).status_code == 422
+    monkeypatch.setattr(main.settings, "score_batch_max_rows", 2)
+    assert api.post("/score/batch", json={"applicants": rows}).status_code == 413
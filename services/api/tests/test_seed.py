@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pandas as pd
+from sqlalchemy import update
+from sqlmodel import Session, func, select
+
+from app import drift, seed
+from app.drift import rebuild_aggregates
+from app.models import Applicant, DriftAggregate, DriftWindowBin
+from app.seed import iter_seed_chunks, seed_applicants
+from ml.monitoring import build_baseline
+from ml.features import FEATURE_COLUMNS
+
+from test_ingest import memory_session
+from test_schema_validation import base_payload
+
+
+def write_dataset(path: Path, rows: int) -> Path:
+    frame = pd.DataFrame([base_payload()] * rows, columns=FEATURE_COLUMNS)
+    frame["LIMIT_BAL"] = [float(1_000 * index) for index in range(rows)]
+    frame["default_payment_next_month"] = 0
+    frame.to_csv(path, index=False)
+    return path
+
+
+def test_sampled_chunks_are_bounded_and_unique(tmp_path: Path) -> None:
+    path = write_dataset(tmp_path / "data.csv", 250)
+
+    chunks = list(iter_seed_chunks(path, sample_size=40, chunk_size=30))
+    sampled = pd.concat(chunks)
+
+    assert all(len(chunk) <= 30 for chunk in chunks)
+    assert len(sampled) == 40
+    assert sampled["LIMIT_BAL"].is_unique
+    assert sampled["AGE"].dtype == "int64"
+
+
+def test_seed_applicants_inserts_every_row_in_chunks(tmp_path: Path) -> None:
+    path = write_dataset(tmp_path / "data.csv", 25)
+    progress: list[int] = []
+
+    with memory_session() as session:
+        inserted = seed_applicants(session, path, chunk_size=10, progress=lambda done, _: progress.append(done))
+        stored = list(session.exec(select(Applicant).order_by(Applicant.id)))
+
+    assert inserted == 25
+    assert progress == [10, 20, 25]
+    assert [applicant.LIMIT_BAL for applicant in stored] == [1_000.0 * index for index in range(25)]
+    assert isinstance(stored[0].AGE, int)
+    assert stored[0].created_at is not None
+
+
+def test_reseeding_corrupt_rows_clears_both_drift_tables(tmp_path: Path, monkeypatch) -> None:
+    path = write_dataset(tmp_path / "data.csv", 20)
+    baseline = build_baseline(pd.read_csv(path))
+
+    with memory_session() as session:
+        seed_applicants(session, path, chunk_size=10)
+        rebuild_aggregates(session, baseline)
+        assert session.exec(select(func.count()).select_from(DriftWindowBin)).one()
+        # Rows written as blobs by an old driver are what triggers a reseed.
+        session.exec(update(Applicant).values(AGE=b"\x23"))
+        session.commit()
+        monkeypatch.setattr(seed, "seed_applicants", lambda session, sample_size: 0)
+
+        assert seed.seed_if_empty(session) == 0
+        for model in (Applicant, DriftAggregate, DriftWindowBin):
+            assert session.exec(select(func.count()).select_from(model)).one() == 0
+
+
+def test_seeding_during_a_rebuild_counts_rows_by_applicant_id(tmp_path: Path, monkeypatch) -> None:
+    path = write_dataset(tmp_path / "data.csv", 12)
+    baseline = build_baseline(pd.read_csv(path))
+    monkeypatch.setattr(seed, "current_baseline", lambda: baseline)
+    real_rebuild = drift._rebuild_tables
+
+    def racing_rebuild(session, baseline, chunk_size):
+        # Committed before the scan, so the scan counts these rows and their
+        # deferred frames must be skipped by applicant id.
+        with Session(session.get_bind()) as other:
+            seed_applicants(other, path, chunk_size=5)
+        return real_rebuild(session, baseline, chunk_size)
+
+    with memory_session() as session:
+        seed_applicants(session, path, chunk_size=5)
+        monkeypatch.setattr(drift, "_rebuild_tables", racing_rebuild)
+        assert rebuild_aggregates(session, baseline) == 24
+        assert drift.drift_summary(session, baseline)["count"] == 24
@@ -0,0 +1,133 @@
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from app.models import ShadowScore
+from app.scoring import risk_bucket
+from app.shadow import ShadowScorer, load_shadow_models, shadow_comparison
+from ml.artifacts import MANIFEST_FILE, publish_manifest
+from ml.features import FEATURE_COLUMNS
+
+from test_ingest import memory_session
+from test_schema_validation import base_payload
+
+
+def payloads(count: int) -> list[dict]:
+    rng = np.random.default_rng(0)
+    rows = []
+    for _ in range(count):
+        payload = base_payload()
+        payload["PAY_0"] = int(rng.integers(-1, 4))
+        payload["LIMIT_BAL"] = int(rng.integers(10_000, 500_000))
+        rows.append(payload)
+    return rows
+
+
+def save_challenger(directory, name: str, threshold: float) -> LogisticRegression:
+    frame = pd.DataFrame(payloads(200))[FEATURE_COLUMNS]
+    model = LogisticRegression(max_iter=500).fit(frame, (frame["PAY_0"] >= 2).astype(int))
+    directory.mkdir(parents=True, exist_ok=True)
+    joblib.dump(
+        {"model": model, "name": name, "features": FEATURE_COLUMNS, "threshold": threshold},
+        directory / f"{name}.joblib",
+    )
+    return model
+
+
+def test_load_shadow_models_filters_by_name(tmp_path) -> None:
+    save_challenger(tmp_path, "logreg", 0.5)
+    save_challenger(tmp_path, "hgb", 0.4)
+
+    assert [model.name for model in load_shadow_models(tmp_path, "*")] == ["hgb", "logreg"]
+    assert [model.name for model in load_shadow_models(tmp_path, "logreg, missing")] == ["logreg"]
+    assert load_shadow_models(tmp_path, "") == []
+
+
+def test_shadow_models_load_only_published_challengers(tmp_path) -> None:
+    save_challenger(tmp_path, "logreg", 0.5)
+    publish_manifest(tmp_path, "v1")
+    save_challenger(tmp_path, "hgb", 0.4)
+    scorer = ShadowScorer(tmp_path, "*", memory_session, check_interval=0.0)
+
+    assert [model.name for model in scorer.models()] == ["logreg"]
+
+    # A challenger rewritten after publishing is rejected until the manifest catches up.
+    save_challenger(tmp_path, "logreg", 0.3)
+    (tmp_path / MANIFEST_FILE).touch()
+    assert [model.threshold for model in scorer.models()] == [0.5]
+
+    publish_manifest(tmp_path, "v2")
+    assert [(model.name, model.threshold) for model in scorer.models()] == [("hgb", 0.4), ("logreg", 0.3)]
+
+
+def test_shadow_scores_batches_and_compares_with_champion(tmp_path) -> None:
+    model = save_challenger(tmp_path, "logreg", 0.5)
+    rows = payloads(40)
+
+    with memory_session() as session:
+
+        @contextmanager
+        def factory():
+            yield session
+
+        scorer = ShadowScorer(tmp_path, "*", factory, max_queue=30, batch_size=16)
+        champion = {"model_name": "rf", "model_version": "v1", "pd": 0.3, "risk_bucket": "medium", "threshold": 0.5}
+        accepted = [scorer.submit(row, champion) for row in rows]
+        assert sum(accepted) == 30 and not any(accepted[30:])
+        assert scorer.drain() == 30
+        assert scorer.pending == 0
+
+        stored = session.exec(ShadowScore.__table__.select().order_by(ShadowScore.id)).all()
+        expected = model.predict_proba(pd.DataFrame(rows[:30])[FEATURE_COLUMNS])[:, 1]
+        assert np.allclose([row.shadow_pd for row in stored], expected)
+        assert [row.shadow_flag for row in stored] == (expected >= 0.5).tolist()
+
+        [comparison] = shadow_comparison(session)
+        assert comparison["count"] == 30
+        assert comparison["shadow_model"] == "logreg" and comparison["champion_version"] == "v1"
+        assert comparison["decision_agreement"] == round(float(np.mean(expected < 0.5)), 6)
+        flips = np.mean([risk_bucket(value) != "medium" for value in expected])
+        assert comparison["bucket_flip_rate"] == round(float(flips), 6)
+        assert abs(comparison["pd_delta"]["mean"] - (expected - 0.3).mean()) < 1e-6
+        assert abs(comparison["pd_delta"]["max_abs"] - np.abs(expected - 0.3).max()) < 1e-6
+        assert sum(comparison["bucket_transitions"]["medium"].values()) == 30
+        assert shadow_comparison(session, since=datetime.utcnow() + timedelta(minutes=1)) == []
+        assert shadow_comparison(session, shadow_model="missing") == []
+
+
+def test_disabled_scorer_ignores_submissions(tmp_path) -> None:
+    scorer = ShadowScorer(tmp_path, "", memory_session)
+    assert not scorer.submit(base_payload(), {})
+    assert scorer.pending == 0
+
+
+def test_comparison_endpoint_filters_by_model_and_time(api) -> None:
+    with api.session_scope() as session:
+        for shadow_model, shadow_pd in [("rf", 0.7), ("gbm", 0.1)]:
+            session.add(
+                ShadowScore(
+                    champion_model="lr",
+                    champion_version="v1",
+                    champion_pd=0.2,
+                    champion_bucket="low",
+                    champion_flag=False,
+                    shadow_model=shadow_model,
+                    shadow_version="v1",
+                    shadow_pd=shadow_pd,
+                    shadow_bucket=risk_bucket(shadow_pd),
+                    shadow_flag=shadow_pd >= 0.5,
+                    created_at=datetime(2024, 1, 1),
+                )
+            )
+        session.commit()
+
+    response = api.get("/shadow/comparison", params={"model": "rf"})
+    assert response.status_code == 200
+    assert [item["shadow_model"] for item in response.json()["comparisons"]] == ["rf"]
+    assert len(api.get("/shadow/comparison").json()["comparisons"]) == 2
+    assert api.get("/shadow/comparison", params={"since": "2024-01-02T00:00:00"}).json()["comparisons"] == []
+    assert api.get("/shadow/comparison", params={"since": "yesterday"}).status_code == 422
@@ -0,0 +1,71 @@
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+
+from app import main, registry
+from app.registry import ArtifactRegistry
+from app.startup import FAILED, READY, StartupTracker, warmup_payload
+from ml.features import FEATURE_COLUMNS
+
+
+def write_model(directory) -> None:
+    rng = np.random.default_rng(0)
+    frame = pd.DataFrame(rng.integers(0, 5, size=(40, len(FEATURE_COLUMNS))), columns=FEATURE_COLUMNS)
+    model = LogisticRegression().fit(frame, np.arange(40) % 2)
+    joblib.dump({"model": model, "features": FEATURE_COLUMNS, "threshold": 0.5}, directory / "model.joblib")
+
+
+def test_warmup_scores_once_and_reports_timings(tmp_path) -> None:
+    write_model(tmp_path)
+
+    tracker = StartupTracker(ArtifactRegistry(tmp_path))
+    assert not tracker.ready
+    tracker.start_warmup()
+
+    assert tracker.wait(timeout=30)
+    state = tracker.to_dict()
+    assert state["status"] == READY
+    assert {"load_artifacts", "warmup_score", "warmup"} <= set(state["timings"])
+    assert "warmup_explain" not in state["timings"]
+
+
+def test_warmup_without_artifacts_is_not_ready(tmp_path) -> None:
+    tracker = StartupTracker(ArtifactRegistry(tmp_path))
+    tracker.warm_up()
+
+    assert tracker.status == FAILED
+    assert "FileNotFoundError" in tracker.error
+
+
+def test_failed_warmup_is_retried_until_artifacts_appear(tmp_path) -> None:
+    tracker = StartupTracker(ArtifactRegistry(tmp_path), retry_delay=0.05, max_retry_delay=0.1)
+    tracker.start_warmup()
+    assert not tracker.wait(timeout=0.2)
+    assert tracker.attempts >= 2 and tracker.error is not None
+
+    write_model(tmp_path)
+    assert tracker.wait(timeout=30)
+    assert tracker.error is None
+    tracker.stop()
+
+
+def test_warmup_payload_uses_typed_background_row() -> None:
+    background = pd.DataFrame([[35.7] * len(FEATURE_COLUMNS)], columns=FEATURE_COLUMNS)
+    payload = warmup_payload(background, FEATURE_COLUMNS)
+
+    assert payload.AGE == 36
+    assert payload.LIMIT_BAL == 35.7
+
+
+def test_readyz_reports_warmup(api, monkeypatch) -> None:
+    tracker = StartupTracker(registry.registry)
+    monkeypatch.setattr(main, "startup", tracker)
+
+    response = api.get("/readyz")
+    assert response.status_code == 503 and response.json()["status"] == tracker.status
+
+    tracker.warm_up()
+    response = api.get("/readyz")
+    assert response.status_code == 200
+    assert response.json()["status"] == READY and response.json()["attempts"] == 1
@@ -0,0 +1,20 @@
+from app.schemas import ApplicantCreate
+from ml.features import FEATURE_COLUMNS, TARGET_COLUMN
+from ml.synthetic import generate_applicants, iter_synthetic_chunks
+
+
+def test_synthetic_rows_pass_applicant_validation() -> None:
+    frame = generate_applicants(2_000, seed=7)
+
+    for row in frame[FEATURE_COLUMNS].to_dict("records"):
+        ApplicantCreate.model_validate(row)
+    assert 0.15 < frame[TARGET_COLUMN].mean() < 0.3
+    assert frame["PAY_0"].corr(frame[TARGET_COLUMN]) > 0.1
+
+
+def test_synthetic_chunks_are_deterministic() -> None:
+    first = list(iter_synthetic_chunks(250, seed=3, chunk_size=100))
+    second = list(iter_synthetic_chunks(250, seed=3, chunk_size=100))
+
+    assert [len(chunk) for chunk in first] == [100, 100, 50]
+    assert all(a.equals(b) for a, b in zip(first, second))
@@ -0,0 +1,30 @@
+from sklearn.calibration import CalibratedClassifierCV
+
+from ml.features import FEATURE_COLUMNS, TARGET_COLUMN
+from ml.synthetic import generate_applicants
+from ml.train import build_candidates, build_preprocessor, search_candidates
+
+
+def test_search_returns_calibrated_pipelines_and_stage_timings() -> None:
+    frame = generate_applicants(900, seed=11)
+    train, val = frame.iloc[:600], frame.iloc[600:]
+    candidates = [candidate for candidate in build_candidates(build_preprocessor()) if candidate.name == "logistic_regression"]
+    timings: dict[str, float] = {}
+
+    metrics, models, summary = search_candidates(
+        candidates,
+        train[FEATURE_COLUMNS],
+        train[TARGET_COLUMN],
+        val[FEATURE_COLUMNS],
+        val[TARGET_COLUMN],
+        n_candidates=3,
+        n_jobs=1,
+        timings=timings,
+    )
+
+    model = models["logistic_regression"]
+    assert isinstance(model, CalibratedClassifierCV)
+    assert model.predict_proba(val[FEATURE_COLUMNS]).shape == (300, 2)
+    assert 0.5 < metrics["logistic_regression"]["roc_auc"] <= 1.0
+    assert set(summary["families"]["logistic_regression"]["best_params"]) == {"C", "class_weight"}
+    assert {"preprocess", "search", "search_logistic_regression"} <= set(timings)
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+import pytest
+
+from app import main
+from app.workers import Overloaded, WorkerPool
+
+from test_schema_validation import base_payload
+
+
+def slow_job() -> str:
+    time.sleep(0.2)
+    return "done"
+
+
+def run_concurrently(pool: WorkerPool, endpoints: list[str]) -> list:
+    async def main() -> list:
+        return await asyncio.gather(
+            *(pool.run(endpoint, slow_job) for endpoint in endpoints),
+            return_exceptions=True,
+        )
+
+    return asyncio.run(main())
+
+
+def test_pool_rejects_work_beyond_queue_size() -> None:
+    pool = WorkerPool(max_queue=1, retry_after=3)
+    first, second = run_concurrently(pool, ["score", "score"])
+
+    assert first == "done"
+    assert isinstance(second, Overloaded)
+    assert second.status_code == 503
+    assert second.retry_after == 3
+    assert pool.pending == 0
+
+
+@pytest.mark.parametrize("endpoint, expected", [("score_batch", 429), ("score", "done")])
+def test_pool_enforces_per_endpoint_limits(endpoint, expected) -> None:
+    pool = WorkerPool(max_queue=10, endpoint_limits={"score_batch": 1})
+    results = run_concurrently(pool, ["score_batch", endpoint])
+
+    assert results[0] == "done"
+    outcome = results[1].status_code if isinstance(results[1], Overloaded) else results[1]
+    assert outcome == expected
+
+
+
+@pytest.mark.parametrize(
+    "limits, status_code",
+    [({"max_queue": 0}, 503), ({"endpoint_limits": {"score": 0}}, 429)],
+)
+def test_overloaded_requests_get_retry_after(api, monkeypatch, limits, status_code) -> None:
+    monkeypatch.setattr(main, "pool", WorkerPool(retry_after=3, **limits))
+
+    response = api.post("/score", json=base_payload())
+
+    assert response.status_code == status_code
+    assert response.headers["retry-after"] == "3"